@@ -0,0 +1,191 @@
+"""
+Cache odpowiedzi endpointów API.
+
+Widok deklaruje czas życia wpisu i modele, od których zależy odpowiedź:
+
+    @cache_api_response(timeout=30, models=[Event, Candidate, Vote], event_kwarg='event_id')
+    class EventResultsAPIView(APIView):
+        ...
+
+Klucz wpisu zawiera numery wersji zadeklarowanych modeli. Sygnały
+post_save/post_delete podbijają wersję modelu globalnie oraz w zakresie
+wydarzenia, którego dotyczy zmiana - głos w jednym sondażu nie unieważnia
+zapisanych wyników pozostałych sondaży.
+"""
+
+import functools
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework.response import Response
+
+VERSION_KEY_PREFIX = 'api_cache_version'
+RESPONSE_KEY_PREFIX = 'api_cache_response'
+STATS_KEY_PREFIX = 'api_cache_stats'
+
+# Nazwy widoków z włączonym cache (dla raportu api_cache_stats)
+cached_views = []
+
+
+def _model_label(model):
+    return model._meta.label_lower
+
+
+def _version_key(model, event_id=None):
+    if event_id is None:
+        return f'{VERSION_KEY_PREFIX}:{_model_label(model)}'
+    return f'{VERSION_KEY_PREFIX}:{_model_label(model)}:event:{event_id}'
+
+
+def _get_or_init_versions(keys):
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # Nowa wersja startuje od znacznika czasu, więc po wyrzuceniu
+            # klucza z cache nie wrócimy do numeru starych wpisów
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return versions
+
+
+def get_versions(models, event_id=None):
+    """Zwraca aktualne numery wersji modeli (globalnie lub w zakresie wydarzenia)"""
+    keys = [_version_key(model, event_id) for model in models]
+    versions = _get_or_init_versions(keys)
+    return [versions[key] for key in keys]
+
+
+def get_event_version_tokens(models, event_ids):
+    """Krótki identyfikator wersji danych każdego wydarzenia (jedno get_many dla wszystkich)"""
+    keys = {event_id: [_version_key(model, event_id) for model in models] for event_id in event_ids}
+    versions = _get_or_init_versions([key for event_keys in keys.values() for key in event_keys])
+    return {
+        event_id: hashlib.md5(str([versions[key] for key in event_keys]).encode()).hexdigest()[:12]
+        for event_id, event_keys in keys.items()
+    }
+
+
+def bump_version(model, event_id=None):
+    """Podbija wersję modelu globalnie i (jeśli znane) dla wydarzenia"""
+    keys = [_version_key(model)]
+    if event_id is not None:
+        keys.append(_version_key(model, event_id))
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def _event_id_for(instance):
+    """Wydarzenie, którego dotyczy zmieniony obiekt"""
+    from polls.models import Candidate, Event
+
+    if isinstance(instance, Event):
+        return instance.pk
+    if hasattr(instance, 'event_id'):
+        return instance.event_id
+    if hasattr(instance, 'candidate_id'):
+        return Candidate.objects.filter(pk=instance.candidate_id).values_list('event_id', flat=True).first()
+    return None
+
+
+def invalidate_for_instance(sender, instance, **kwargs):
+    """Odbiornik sygnałów - unieważnia odpowiedzi zależne od zmienionego modelu"""
+    event_id = _event_id_for(instance)
+    # Po zatwierdzeniu transakcji, żeby nikt nie zapisał starych danych pod nową wersją
+    transaction.on_commit(lambda: bump_version(sender, event_id))
+
+
+def connect_invalidation_signals():
+    """Podłącza unieważnianie cache do modeli, od których zależą endpointy API"""
+    from polls.models import Candidate, Comment, Event, SiteStatistics, Vote
+
+    for model in (Event, Candidate, Vote, Comment, SiteStatistics):
+        post_save.connect(invalidate_for_instance, sender=model, dispatch_uid=f'api_cache_save_{_model_label(model)}')
+        post_delete.connect(invalidate_for_instance, sender=model, dispatch_uid=f'api_cache_delete_{_model_label(model)}')
+
+
+def _record(view_name, outcome):
+    key = f'{STATS_KEY_PREFIX}:{view_name}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    """Liczba trafień i chybień cache dla każdego endpointu"""
+    keys = []
+    for view_name in cached_views:
+        keys += [f'{STATS_KEY_PREFIX}:{view_name}:hit', f'{STATS_KEY_PREFIX}:{view_name}:miss']
+    counters = cache.get_many(keys)
+
+    stats = {}
+    for view_name in cached_views:
+        hits = counters.get(f'{STATS_KEY_PREFIX}:{view_name}:hit', 0)
+        misses = counters.get(f'{STATS_KEY_PREFIX}:{view_name}:miss', 0)
+        total = hits + misses
+        stats[view_name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 4) if total else 0,
+        }
+    return stats
+
+
+def reset_cache_stats():
+    keys = []
+    for view_name in cached_views:
+        keys += [f'{STATS_KEY_PREFIX}:{view_name}:hit', f'{STATS_KEY_PREFIX}:{view_name}:miss']
+    cache.delete_many(keys)
+
+
+def cache_api_response(timeout, models, event_kwarg=None, event_query_param=None):
+    """
+    Dekorator klasy widoku DRF: cache'uje dane odpowiedzi GET.
+
+    timeout - czas życia wpisu w sekundach,
+    models - modele, których zmiana unieważnia odpowiedź,
+    event_kwarg / event_query_param - skąd wziąć id wydarzenia, jeśli
+    odpowiedź dotyczy jednego wydarzenia (wersje liczone w jego zakresie).
+    """
+    def decorator(view_class):
+        view_name = view_class.__name__
+        original_get = view_class.get
+
+        @functools.wraps(original_get)
+        def get(self, request, *args, **kwargs):
+            event_id = None
+            if event_kwarg:
+                event_id = kwargs.get(event_kwarg)
+            elif event_query_param:
+                event_id = request.query_params.get(event_query_param) or None
+
+            versions = get_versions(models, event_id)
+            raw_key = f'{request.build_absolute_uri()}|{versions}'
+            cache_key = f'{RESPONSE_KEY_PREFIX}:{view_name}:{hashlib.md5(raw_key.encode()).hexdigest()}'
+
+            data = cache.get(cache_key)
+            if data is not None:
+                _record(view_name, 'hit')
+                response = Response(data)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _record(view_name, 'miss')
+            response = original_get(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(cache_key, response.data, timeout)
+            response['X-Cache'] = 'MISS'
+            return response
+
+        view_class.get = get
+        cached_views.append(view_name)
+        return view_class
+
+    return decorator
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+import api.views  # noqa: F401 - rejestruje widoki z cache
+from api.cache import get_cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Pokazuje skuteczność cache odpowiedzi API (trafienia/chybienia per endpoint)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Wyzeruj liczniki po wyświetleniu')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"Endpoint":<28} {"Trafienia":>10} {"Chybienia":>10} {"Skuteczność":>12}')
+        for view_name, stats in get_cache_stats().items():
+            self.stdout.write(
+                f'{view_name:<28} {stats["hits"]:>10} {stats["misses"]:>10} {stats["hit_ratio"] * 100:>11.1f}%'
+            )
+
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Liczniki wyzerowane.'))
@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.renderers import ORJSONRenderer
+from api.views import CandidateListAPIView, EventListAPIView
+from polls.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Porównuje rozmiar i czas serializacji odpowiedzi API: pełne pola vs ?fields=, json vs orjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', help='ID wydarzenia dla listy kandydatów (domyślnie wydarzenie z największą liczbą kandydatów)')
+        parser.add_argument('--iterations', type=int, default=200, help='Liczba powtórzeń pomiaru')
+
+    def handle(self, *args, **options):
+        event_id = options['event']
+        if not event_id:
+            event = Event.objects.with_counts().order_by('-candidate_count').first()
+            if event is None:
+                raise CommandError('Brak wydarzeń w bazie - benchmark potrzebuje danych.')
+            event_id = str(event.id)
+
+        scenarios = [
+            ('kandydaci: wszystkie pola', CandidateListAPIView, {'event': event_id}),
+            ('kandydaci: ?fields=id,name,vote_count', CandidateListAPIView, {'event': event_id, 'fields': 'id,name,vote_count'}),
+            ('wydarzenia: wszystkie pola', EventListAPIView, {}),
+            ('wydarzenia: ?fields=id,title', EventListAPIView, {'fields': 'id,title'}),
+        ]
+        renderers = [('json', JSONRenderer()), ('orjson', ORJSONRenderer())]
+        iterations = options['iterations']
+
+        self.stdout.write(f'{"Scenariusz":<42} {"Renderer":<8} {"Bajty":>8} {"Zapytanie+serializacja":>23} {"Renderowanie":>13}')
+        for label, view_class, params in scenarios:
+            data, build_ms = self.build_data(view_class, params, iterations)
+            for renderer_name, renderer in renderers:
+                payload = renderer.render(data)
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    renderer.render(data)
+                render_ms = (time.perf_counter() - start) * 1000 / iterations
+                self.stdout.write(
+                    f'{label:<42} {renderer_name:<8} {len(payload):>8} {build_ms:>20.3f} ms {render_ms:>10.3f} ms'
+                )
+
+    def build_data(self, view_class, params, iterations):
+        """Dane odpowiedzi (bez cache i HTTP) oraz średni czas zapytania i serializacji"""
+        factory = APIRequestFactory()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            view = view_class()
+            view.setup(factory.get('/', params))
+            view.request = view.initialize_request(view.request)
+            view.format_kwarg = None
+            queryset = view.paginate_queryset(view.get_queryset())
+            data = view.get_serializer(queryset, many=True).data
+        return data, (time.perf_counter() - start) * 1000 / iterations
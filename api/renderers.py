@@ -0,0 +1,34 @@
+"""
+Szybki renderer JSON dla API.
+
+Korzysta z orjson, jeśli jest zainstalowany; bez niego zachowuje się
+dokładnie jak standardowy JSONRenderer z DRF.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Renderer JSON oparty na orjson"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if data is None:
+            return b''
+
+        options = orjson.OPT_NON_STR_KEYS
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            options |= orjson.OPT_INDENT_2
+
+        # Typy nieobsługiwane natywnie (Decimal, leniwe tłumaczenia itp.)
+        # przechodzą przez encoder DRF
+        return orjson.dumps(data, default=JSONEncoder().default, option=options)
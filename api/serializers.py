@@ -1,8 +1,49 @@
 from rest_framework import serializers
-from polls.models import Event, Candidate, Vote, Comment, PollAnalytics
+from polls.models import Event, Candidate, Vote, Comment, PollAnalytics, ReportJob
 
 
-class EventSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Obsługa parametru ?fields=a,b,c - serializer zwraca tylko wskazane pola.
+    
+    Meta.only_fields mapuje pole serializera na pola modelu potrzebne do jego
+    wyliczenia (domyślnie pole o tej samej nazwie), żeby widok mógł ograniczyć
+    zapytanie przez QuerySet.only(). Nazwę parametru można zmienić przez
+    context['fields_param'] (np. gdy odpowiedź łączy kilka serializerów).
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.get_requested_fields(
+            self.context.get('request'), self.context.get('fields_param', 'fields')
+        )
+        if requested:
+            for field_name in set(self.fields) - set(requested):
+                self.fields.pop(field_name)
+    
+    @classmethod
+    def get_requested_fields(cls, request, param='fields'):
+        """Lista znanych pól z ?fields= (None, gdy parametr nie został podany)"""
+        if request is None or not hasattr(request, 'query_params'):
+            return None
+        fields_param = request.query_params.get(param)
+        if not fields_param:
+            return None
+        known_fields = cls.Meta.fields
+        requested = [name.strip() for name in fields_param.split(',') if name.strip() in known_fields]
+        return requested or None
+    
+    @classmethod
+    def get_model_fields(cls, requested):
+        """Pola modelu potrzebne do serializacji żądanych pól (dla QuerySet.only())"""
+        only_fields = getattr(cls.Meta, 'only_fields', {})
+        model_fields = {'id'}
+        for field_name in requested:
+            model_fields.update(only_fields.get(field_name, [field_name]))
+        return sorted(model_fields)
+
+
+class EventSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer dla wydarzenia"""
     event_type_display = serializers.CharField(source='get_event_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -20,15 +61,28 @@ class EventSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        only_fields = {
+            'event_type_display': ['event_type'],
+            'status_display': ['status'],
+            'is_active': ['status', 'event_date'],
+            'is_finished': ['status', 'event_date'],
+            'candidate_count': [],
+            'vote_count': [],
+        }
     
     def get_candidate_count(self, obj):
+        # Widoki API adnotują queryset przez Event.objects.with_counts()
+        if hasattr(obj, 'candidate_count'):
+            return obj.candidate_count
         return obj.candidates.count()
     
     def get_vote_count(self, obj):
+        if hasattr(obj, 'vote_count'):
+            return obj.vote_count
         return obj.votes.count()
 
 
-class CandidateSerializer(serializers.ModelSerializer):
+class CandidateSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer dla kandydata"""
     candidate_type_display = serializers.CharField(source='get_candidate_type_display', read_only=True)
     vote_count = serializers.IntegerField(read_only=True)
@@ -45,6 +99,41 @@ class CandidateSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        only_fields = {
+            'event_title': ['event', 'event__title'],
+            'candidate_type_display': ['candidate_type'],
+            'vote_count': [],
+            'vote_percentage': [],
+        }
+
+
+class CandidateSummarySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Skrócony serializer kandydata (paczka danych wydarzenia dla aplikacji mobilnej)"""
+    candidate_type_display = serializers.CharField(source='get_candidate_type_display', read_only=True)
+    thumbnail_url = serializers.SerializerMethodField()
+    vote_count = serializers.IntegerField(read_only=True)
+    vote_percentage = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = Candidate
+        fields = [
+            'id', 'name', 'candidate_type', 'candidate_type_display', 'is_premium',
+            'thumbnail_url', 'vote_count', 'vote_percentage'
+        ]
+        only_fields = {
+            'candidate_type_display': ['candidate_type'],
+            'thumbnail_url': ['main_photo'],
+            'vote_count': [],
+            'vote_percentage': [],
+        }
+    
+    def get_thumbnail_url(self, obj):
+        # Osobnych miniatur nie generujemy - zwracamy adres głównego zdjęcia
+        if not obj.main_photo:
+            return None
+        request = self.context.get('request')
+        url = obj.main_photo.url
+        return request.build_absolute_uri(url) if request else url
 
 
 class VoteSerializer(serializers.ModelSerializer):
@@ -91,6 +180,7 @@ class StatisticsSerializer(serializers.Serializer):
     total_candidates = serializers.IntegerField()
     popular_events = serializers.ListField(child=serializers.DictField())
     geographic_stats = serializers.DictField()
+    computed_at = serializers.DateTimeField()
 
 
 class PollAnalyticsSerializer(serializers.ModelSerializer):
@@ -104,3 +194,15 @@ class PollAnalyticsSerializer(serializers.ModelSerializer):
             'geographic_data', 'demographic_data', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Serializer dla zleceń raportów (status i postęp)"""
+    
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'event', 'status', 'progress', 'data_version', 'content_hash',
+            'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -1,3 +1,346 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from polls.models import Event, Candidate, Vote
+
+from .cache import _version_key, get_versions
+from .views import RESULTS_MODELS
+
+
+class EventAPIQueryCountTests(TestCase):
+    """Liczba zapytań endpointów wydarzeń nie może rosnąć z rozmiarem strony"""
+
+    @classmethod
+    def setUpTestData(cls):
+        event_date = timezone.now() + timezone.timedelta(days=7)
+        for event_index in range(20):
+            event = Event.objects.create(
+                title=f'Sondaż {event_index}',
+                description='Opis',
+                event_type='other',
+                event_date=event_date,
+                status='active',
+            )
+            for candidate_index in range(3):
+                candidate = Candidate.objects.create(
+                    event=event,
+                    name=f'Kandydat {candidate_index}',
+                    description='Opis',
+                    candidate_type='individual',
+                    main_photo='candidates/test.jpg',
+                )
+                for vote_index in range(candidate_index + 1):
+                    Vote.objects.create(
+                        event=event,
+                        candidate=candidate,
+                        ip_address=f'10.0.{candidate_index}.{vote_index}',
+                    )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_event_list_uses_constant_number_of_queries(self):
+        # COUNT paginacji + jedno zapytanie z adnotacjami
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('api:event-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 20)
+        for event in response.data['results']:
+            self.assertEqual(event['candidate_count'], 3)
+            self.assertEqual(event['vote_count'], 6)
+
+    def test_event_detail_uses_single_query(self):
+        event = Event.objects.first()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:event-detail', args=[event.id]))
+
+        self.assertEqual(response.data['candidate_count'], 3)
+        self.assertEqual(response.data['vote_count'], 6)
+
+    def test_candidate_comparison_uses_constant_number_of_queries(self):
+        # Wydarzenia + znacznik agregatów + kandydaci z liczbami głosów
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api:candidate-comparison'), {'candidates': 'kandydat  2,Nieznany'})
+
+        self.assertEqual(len(response.data['events']), 12)
+        matched, missing = response.data['candidates']
+        self.assertEqual([point['vote_count'] for point in matched['series']], [3] * 12)
+        self.assertEqual(matched['series'][0]['percentage'], 50.0)
+        self.assertEqual({point['candidate_id'] for point in missing['series']}, {None})
+
+        # Ponownie z cache - tylko lista wydarzeń
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api:candidate-comparison'), {'candidates': 'kandydat  2,Nieznany'})
+
+
+class CandidateAPIQueryCountTests(TestCase):
+    """Lista kandydatów liczy głosy i procenty w jednym zapytaniu"""
+
+    @classmethod
+    def setUpTestData(cls):
+        event_date = timezone.now() + timezone.timedelta(days=7)
+        cls.event = Event.objects.create(
+            title='Sondaż',
+            description='Opis',
+            event_type='other',
+            event_date=event_date,
+            status='active',
+        )
+        other_event = Event.objects.create(
+            title='Inny sondaż',
+            description='Opis',
+            event_type='other',
+            event_date=event_date,
+            status='active',
+        )
+        for event in (cls.event, other_event):
+            for candidate_index in range(4):
+                candidate = Candidate.objects.create(
+                    event=event,
+                    name=f'Kandydat {candidate_index}',
+                    description='Opis',
+                    candidate_type='individual',
+                    main_photo='candidates/test.jpg',
+                )
+                for vote_index in range(candidate_index):
+                    Vote.objects.create(
+                        event=event,
+                        candidate=candidate,
+                        ip_address=f'10.0.{candidate_index}.{vote_index}',
+                    )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_candidate_list_uses_constant_number_of_queries(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('api:candidate-list'), {'event': str(self.event.id)})
+
+        results = response.data['results']
+        self.assertEqual(len(results), 4)
+        self.assertEqual([c['vote_count'] for c in results], [3, 2, 1, 0])
+        self.assertEqual([c['vote_percentage'] for c in results], [50.0, 33.33, 16.67, 0])
+        self.assertEqual(results[0]['event_title'], 'Sondaż')
+
+    def test_candidate_list_sparse_fields_limit_selected_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('api:candidate-list'),
+                {'event': str(self.event.id), 'fields': 'id,name,vote_count'}
+            )
+
+        self.assertEqual(response.json()['results'][0], {
+            'id': str(self.event.candidates.get(name='Kandydat 3').id),
+            'name': 'Kandydat 3',
+            'vote_count': 3,
+        })
+        self.assertNotIn('extended_description', queries.captured_queries[-1]['sql'])
+
+    def test_candidate_detail_percentage_covers_whole_event(self):
+        candidate = self.event.candidates.get(name='Kandydat 3')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api:candidate-detail', args=[candidate.id]))
+
+        self.assertEqual(response.data['vote_count'], 3)
+        self.assertEqual(response.data['vote_percentage'], 50.0)
+
+
+class APIResponseCacheTests(TestCase):
+    """Cache odpowiedzi API i unieważnianie w zakresie wydarzenia"""
+
+    @classmethod
+    def setUpTestData(cls):
+        event_date = timezone.now() + timezone.timedelta(days=7)
+        cls.events = []
+        for title in ('A', 'B'):
+            event = Event.objects.create(
+                title=title, description='Opis', event_type='other', event_date=event_date, status='active',
+            )
+            Candidate.objects.create(
+                event=event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+            )
+            cls.events.append(event)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_results(self, event):
+        return self.client.get(reverse('api:event-results', args=[event.id]))
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.get_results(self.events[0])
+        with self.assertNumQueries(0):
+            second = self.get_results(self.events[0])
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.json(), first.json())
+
+    def test_changes_invalidate_only_their_event(self):
+        event_a, event_b = self.events
+        for make_change in (
+            lambda: Vote.objects.create(event=event_a, candidate=event_a.candidates.get(), ip_address='203.0.113.1'),
+            lambda: Candidate.objects.filter(event=event_a).get().save(),
+        ):
+            self.get_results(event_a)
+            self.get_results(event_b)
+            versions_a = get_versions(RESULTS_MODELS, event_a.id)
+            versions_b = get_versions(RESULTS_MODELS, event_b.id)
+
+            with self.captureOnCommitCallbacks() as callbacks:
+                make_change()
+                # Wersja podbijana dopiero po zatwierdzeniu transakcji
+                self.assertEqual(get_versions(RESULTS_MODELS, event_a.id), versions_a)
+            self.assertEqual(len(callbacks), 1)
+            for callback in callbacks:
+                callback()
+
+            self.assertNotEqual(get_versions(RESULTS_MODELS, event_a.id), versions_a)
+            self.assertEqual(get_versions(RESULTS_MODELS, event_b.id), versions_b)
+            self.assertEqual(self.get_results(event_a)['X-Cache'], 'MISS')
+            self.assertEqual(self.get_results(event_b)['X-Cache'], 'HIT')
+
+
+class MultiEventResultsAPITests(TestCase):
+    """Wyniki wielu wydarzeń z pomijaniem niezmienionych"""
+
+    @classmethod
+    def setUpTestData(cls):
+        event_date = timezone.now() + timezone.timedelta(days=7)
+        cls.events = []
+        for title in ('A', 'B'):
+            event = Event.objects.create(
+                title=title, description='Opis', event_type='other', event_date=event_date, status='active',
+            )
+            Candidate.objects.create(
+                event=event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+            )
+            cls.events.append(event)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_results(self, **params):
+        return self.client.get(reverse('api:multi-event-results'), params)
+
+    def test_known_versions_skip_unchanged_events(self):
+        event_a, event_b = self.events
+        events = f'{event_a.id},{event_b.id}'
+        first = {entry['event']['id']: entry for entry in self.get_results(events=events).json()['events']}
+        self.assertEqual(set(first), {str(event_a.id), str(event_b.id)})
+        self.assertTrue(all('results' in entry for entry in first.values()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(event=event_a, candidate=event_a.candidates.get(), ip_address='203.0.113.1')
+
+        known = ','.join(f'{event_id}:{entry["version"]}' for event_id, entry in first.items())
+        second = {entry['event']['id']: entry for entry in self.get_results(events=events, known=known).json()['events']}
+
+        self.assertNotIn('unchanged', second[str(event_a.id)])
+        self.assertEqual(second[str(event_a.id)]['total_votes'], 1)
+        self.assertNotEqual(second[str(event_a.id)]['version'], first[str(event_a.id)]['version'])
+        self.assertEqual(second[str(event_b.id)], {
+            'event': {'id': str(event_b.id)}, 'version': first[str(event_b.id)]['version'], 'unchanged': True,
+        })
+
+    def test_malformed_event_id_returns_400(self):
+        response = self.get_results(events=f'{self.events[0].id},nie-uuid')
+        self.assertEqual(response.status_code, 400)
+
+
+class EventBundleAPITests(TestCase):
+    """Paczka danych wydarzenia z ETagiem"""
+
+    @classmethod
+    def setUpTestData(cls):
+        event_date = timezone.now() + timezone.timedelta(days=7)
+        cls.event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other', event_date=event_date, status='active',
+        )
+        cls.candidate = Candidate.objects.create(
+            event=cls.event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+        )
+        cls.private_event = Event.objects.create(
+            title='Prywatny', description='Opis', event_type='other', event_date=event_date, status='active', is_private=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_bundle(self, event_id, **headers):
+        return self.client.get(reverse('api:event-bundle', args=[event_id]), **headers)
+
+    def test_etag_round_trip(self):
+        first = self.get_bundle(self.event.id)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()['candidates'][0]['name'], 'Kandydat')
+
+        # Słaby ETag (po CompressionMiddleware) też pasuje
+        for etag in (first['ETag'], f'W/{first["ETag"]}'):
+            with self.subTest(etag=etag):
+                response = self.get_bundle(self.event.id, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], first['ETag'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(event=self.event, candidate=self.candidate, ip_address='203.0.113.1')
+        response = self.get_bundle(self.event.id, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.json()['total_votes'], 1)
+
+    def test_unknown_or_private_event_is_404_without_version_keys(self):
+        for event_id in (uuid.uuid4(), self.private_event.id):
+            with self.subTest(event_id=event_id):
+                version_keys = [_version_key(model, str(event_id)) for model in RESULTS_MODELS]
+                response = self.get_bundle(event_id, HTTP_IF_NONE_MATCH='"stary"')
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(cache.get_many(version_keys), {})
+
+
+class CandidateComparisonAPITests(TestCase):
+    """Porównanie kandydatów między wydarzeniami"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.events = []
+        for index, name in enumerate(('Łukasz Nowak', 'Ł. Nowak')):
+            event = Event.objects.create(
+                title=f'Sondaż {index}', description='Opis', event_type='other',
+                event_date=timezone.now() + timezone.timedelta(days=index + 1), status='active',
+            )
+            Candidate.objects.create(
+                event=event, name=name, series_key='lukasz-nowak', description='Opis',
+                candidate_type='individual', main_photo='candidates/test.jpg',
+            )
+            Candidate.objects.create(
+                event=event, name='Żaneta Łęcka', description='Opis',
+                candidate_type='individual', main_photo='candidates/test.jpg',
+            )
+            cls.events.append(event)
+
+    def setUp(self):
+        cache.clear()
+
+    def compare(self, candidates):
+        response = self.client.get(reverse('api:candidate-comparison'), {
+            'candidates': candidates, 'events': ','.join(str(event.id) for event in self.events),
+        })
+        self.assertEqual(response.status_code, 200)
+        return {entry['query']: [point['name'] for point in entry['series']] for entry in response.json()['candidates']}
 
-# Create your tests here.
+    def test_polish_name_matches_series_key(self):
+        series = self.compare('Łukasz Nowak,lukasz-nowak,żaneta łęcka')
+        self.assertEqual(series['Łukasz Nowak'], ['Łukasz Nowak', 'Ł. Nowak'])
+        self.assertEqual(series['lukasz-nowak'], ['Łukasz Nowak', 'Ł. Nowak'])
+        # Bez klucza serii - dopasowanie po nazwie
+        self.assertEqual(series['żaneta łęcka'], ['Żaneta Łęcka', 'Żaneta Łęcka'])
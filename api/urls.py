@@ -7,6 +7,11 @@ urlpatterns = [
     path('events/', views.EventListAPIView.as_view(), name='event-list'),
     path('events/<uuid:pk>/', views.EventDetailAPIView.as_view(), name='event-detail'),
     path('events/<uuid:event_id>/results/', views.EventResultsAPIView.as_view(), name='event-results'),
+    path('events/<uuid:event_id>/bundle/', views.EventBundleAPIView.as_view(), name='event-bundle'),
+    path('events/<uuid:event_id>/report/', views.EventReportAPIView.as_view(), name='event-report'),
+    path('reports/<uuid:pk>/', views.ReportJobAPIView.as_view(), name='report-job'),
+    path('results/', views.MultiEventResultsAPIView.as_view(), name='multi-event-results'),
+    path('candidates/compare/', views.CandidateComparisonAPIView.as_view(), name='candidate-comparison'),
     path('candidates/', views.CandidateListAPIView.as_view(), name='candidate-list'),
     path('candidates/<uuid:pk>/', views.CandidateDetailAPIView.as_view(), name='candidate-detail'),
     path('votes/', views.VoteCreateAPIView.as_view(), name='vote-create'),
@@ -1,96 +1,424 @@
 from rest_framework import generics, status
+from rest_framework.exceptions import Throttled
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
 from rest_framework.views import APIView
+from django.core.cache import cache
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from django.db.models import Count
-from polls.models import Event, Candidate, Vote, PollAnalytics
-from polls.utils import get_client_ip, check_vote_eligibility, generate_vote_report
+from django.utils.cache import patch_cache_control
+from django.utils import timezone
+from django.utils.text import slugify
+import hashlib
+import uuid
+from polls.models import Event, Candidate, Vote, PollAnalytics, SiteStatistics, ReportJob
+from polls.anomalies import BLOCK_MESSAGE as ANOMALY_BLOCK_MESSAGE, check_vote_anomalies
+from polls.fingerprints import fingerprint_fields
+from polls.reports import enqueue_report, get_current_report_job
+from polls.rollups import with_candidate_vote_totals
+from polls.throttling import check_write_throttle, register_endpoint
+from polls.utils import get_client_ip, get_trusted_client_ip, check_vote_eligibility, fingerprint_already_voted, refresh_site_statistics
+from .cache import cache_api_response, get_event_version_tokens
 from .serializers import (
     EventSerializer, 
     CandidateSerializer, 
+    CandidateSummarySerializer,
     VoteSerializer,
     EventResultsSerializer,
+    ReportJobSerializer,
     StatisticsSerializer
 )
 
 
-class EventListAPIView(generics.ListAPIView):
+class SparseFieldsetViewMixin:
+    """Ogranicza zapytanie do pól wybranych przez ?fields= (QuerySet.only())"""
+    
+    def get_requested_fields(self):
+        return self.get_serializer_class().get_requested_fields(self.request)
+    
+    def apply_sparse_fieldset(self, queryset):
+        requested = self.get_requested_fields()
+        if requested:
+            queryset = queryset.only(*self.get_serializer_class().get_model_fields(requested))
+        return queryset
+
+
+class EventQuerysetMixin(SparseFieldsetViewMixin):
+    """Publiczne wydarzenia z licznikami tylko wtedy, gdy są potrzebne"""
+    
+    def get_queryset(self):
+        queryset = Event.objects.filter(is_private=False)
+        requested = self.get_requested_fields()
+        if not requested or {'candidate_count', 'vote_count'} & set(requested):
+            queryset = queryset.with_counts()
+        return self.apply_sparse_fieldset(queryset).order_by('event_date')
+
+
+@cache_api_response(timeout=60, models=[Event, Candidate, Vote])
+class EventListAPIView(EventQuerysetMixin, generics.ListAPIView):
     """Lista wszystkich wydarzeń"""
-    queryset = Event.objects.filter(is_private=False).order_by('event_date')
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
-class EventDetailAPIView(generics.RetrieveAPIView):
+@cache_api_response(timeout=60, models=[Event, Candidate, Vote], event_kwarg='pk')
+class EventDetailAPIView(EventQuerysetMixin, generics.RetrieveAPIView):
     """Szczegóły wydarzenia"""
-    queryset = Event.objects.filter(is_private=False)
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
 
+RESULTS_MODELS = [Event, Candidate, Vote]
+
+# Pola wydarzenia używane przez build_event_results
+RESULTS_EVENT_FIELDS = {'id', 'title', 'event_type', 'event_date', 'status', 'updated_at'}
+
+MAX_RESULTS_EVENTS = 50
+
+
+def build_event_results(event, candidates):
+    """Ranking wyników wydarzenia z kandydatów z Candidate.objects.with_results()"""
+    results = [
+        {
+            'id': str(candidate.id),
+            'name': candidate.name,
+            'vote_count': candidate.vote_count,
+            'percentage': candidate.vote_percentage
+        } for candidate in candidates
+    ]
+    
+    # Sortuj malejąco
+    results.sort(key=lambda x: x['vote_count'], reverse=True)
+    
+    return {
+        'event': {
+            'id': str(event.id),
+            'title': event.title,
+            'event_type': event.get_event_type_display(),
+            'event_date': event.event_date.isoformat(),
+            'status': event.status,
+        },
+        'results': results,
+        'total_votes': sum(result['vote_count'] for result in results),
+        'last_updated': event.updated_at.isoformat()
+    }
+
+
+@cache_api_response(timeout=30, models=RESULTS_MODELS, event_kwarg='event_id')
 class EventResultsAPIView(APIView):
     """Wyniki wydarzenia w czasie rzeczywistym"""
     permission_classes = [IsAuthenticatedOrReadOnly]
     
     def get(self, request, event_id):
         event = get_object_or_404(Event, id=event_id, is_private=False)
-        candidates = event.candidates.all()
+        candidates = Candidate.objects.filter(event=event).with_results()
+        return Response(build_event_results(event, candidates))
+
+
+class MultiEventResultsAPIView(APIView):
+    """
+    Wyniki wielu wydarzeń naraz (ekran wieczoru wyborczego).
+    
+    ?events=<id>,<id> lub ?events=active (domyślnie) - wydarzenia do pobrania,
+    ?known=<id>:<wersja>,... - wersje, które klient już ma; dla niezmienionych
+    wydarzeń zwracamy tylko wersję z "unchanged": true.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    def get(self, request):
+        events_param = request.query_params.get('events', 'active')
+        events = Event.objects.filter(is_private=False)
+        if events_param == 'active':
+            events = events.filter(status='active', event_date__gt=timezone.now())
+        else:
+            try:
+                event_ids = [uuid.UUID(value.strip()) for value in events_param.split(',') if value.strip()]
+            except ValueError:
+                return Response({
+                    'message': 'Nieprawidłowy identyfikator wydarzenia.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            events = events.filter(id__in=event_ids)
+        events = list(events.order_by('event_date')[:MAX_RESULTS_EVENTS])
+        
+        known = {}
+        for item in request.query_params.get('known', '').split(','):
+            event_id, _, version = item.partition(':')
+            if version:
+                known[event_id.strip()] = version.strip()
         
-        results = []
-        total_votes = event.votes.count()
+        versions = get_event_version_tokens(RESULTS_MODELS, [str(event.id) for event in events])
+        changed_ids = {event.id for event in events if known.get(str(event.id)) != versions[str(event.id)]}
         
-        for candidate in candidates:
-            vote_count = candidate.vote_count
-            percentage = (vote_count / total_votes * 100) if total_votes > 0 else 0
-            results.append({
-                'id': str(candidate.id),
-                'name': candidate.name,
-                'vote_count': vote_count,
-                'percentage': round(percentage, 2)
-            })
+        # Jedno zapytanie agregujące dla wszystkich zmienionych wydarzeń
+        candidates_by_event = {}
+        if changed_ids:
+            for candidate in Candidate.objects.filter(event_id__in=changed_ids).with_results():
+                candidates_by_event.setdefault(candidate.event_id, []).append(candidate)
         
-        # Sortuj malejąco
-        results.sort(key=lambda x: x['vote_count'], reverse=True)
+        payload = []
+        for event in events:
+            version = versions[str(event.id)]
+            if event.id in changed_ids:
+                entry = build_event_results(event, candidates_by_event.get(event.id, []))
+                entry['version'] = version
+            else:
+                entry = {'event': {'id': str(event.id)}, 'version': version, 'unchanged': True}
+            payload.append(entry)
         
         return Response({
-            'event': {
-                'id': str(event.id),
-                'title': event.title,
-                'event_type': event.get_event_type_display(),
-                'event_date': event.event_date.isoformat(),
-                'status': event.status,
-            },
-            'results': results,
-            'total_votes': total_votes,
-            'last_updated': event.updated_at.isoformat()
+            'events': payload,
+            'generated_at': timezone.now().isoformat()
         })
 
 
-class CandidateListAPIView(generics.ListAPIView):
+class EventBundleAPIView(APIView):
+    """
+    Paczka danych ekranu wydarzenia dla aplikacji mobilnej: wydarzenie,
+    kandydaci (z miniaturami) i wyniki w jednej odpowiedzi, w dwóch zapytaniach.
+    
+    ?event_fields= i ?candidate_fields= ograniczają zwracane pola. Odpowiedź ma
+    ETag wyliczany z wersji danych wydarzenia (po jednym zapytaniu sprawdzającym,
+    że wydarzenie istnieje i jest publiczne), więc If-None-Match z aktualną
+    wersją kończy się odpowiedzią 304.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    def get_etag(self, request, event_id):
+        version = get_event_version_tokens(RESULTS_MODELS, [str(event_id)])[str(event_id)]
+        variant = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()[:8]
+        return f'"{version}-{variant}"'
+    
+    def get(self, request, event_id):
+        # Najpierw wydarzenie - nieznane lub prywatne id nie tworzy kluczy wersji i nie dostaje 304
+        if not Event.objects.filter(id=event_id, is_private=False).exists():
+            raise Http404
+        etag = self.get_etag(request, event_id)
+        # Porównanie słabe - CompressionMiddleware zamienia ETag na W/"..."
+        client_etags = [value.strip().removeprefix('W/') for value in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+        if etag in client_etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache_key = f'api_event_bundle:{event_id}:{etag}'
+            data = cache.get(cache_key)
+            if data is None:
+                data = self.build_bundle(request, event_id)
+                cache.set(cache_key, data, 60)
+            response = Response(data)
+        
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+        return response
+    
+    def build_bundle(self, request, event_id):
+        event_context = {'request': request, 'fields_param': 'event_fields'}
+        candidate_context = {'request': request, 'fields_param': 'candidate_fields'}
+        
+        event_fields = EventSerializer.get_requested_fields(request, 'event_fields')
+        events = Event.objects.filter(is_private=False)
+        if not event_fields or {'candidate_count', 'vote_count'} & set(event_fields):
+            events = events.with_counts()
+        if event_fields:
+            # Pola potrzebne do sekcji wyników są pobierane zawsze
+            events = events.only(*set(EventSerializer.get_model_fields(event_fields)) | RESULTS_EVENT_FIELDS)
+        event = get_object_or_404(events, id=event_id)
+        
+        candidates = Candidate.objects.filter(event=event)
+        candidate_fields = CandidateSummarySerializer.get_requested_fields(request, 'candidate_fields')
+        if candidate_fields:
+            candidates = candidates.only(*set(CandidateSummarySerializer.get_model_fields(candidate_fields)) | {'name'})
+        candidates = list(candidates.with_results().order_by('-annotated_vote_count', 'name'))
+        
+        results = build_event_results(event, candidates)
+        return {
+            'event': EventSerializer(event, context=event_context).data,
+            'candidates': CandidateSummarySerializer(candidates, many=True, context=candidate_context).data,
+            'results': results['results'],
+            'total_votes': results['total_votes'],
+            'last_updated': results['last_updated'],
+        }
+
+
+DEFAULT_COMPARISON_EVENTS = 12
+MAX_COMPARISON_CANDIDATES = 10
+
+
+def normalize_candidate_name(name):
+    """Nazwa do dopasowania kandydatów między wydarzeniami (bez wielkości liter i nadmiarowych spacji)"""
+    return ' '.join(name.split()).casefold()
+
+
+# slugify() pomija znaki bez rozkładu Unicode - "Łukasz" dałoby "ukasz"
+SERIES_KEY_TRANSLITERATION = str.maketrans({'Ł': 'L', 'ł': 'l'})
+
+
+def series_keys_for_query(query):
+    """Klucze serii pasujące do zapytania: slug (z Ł -> L) i samo zapytanie z '-' zamiast spacji"""
+    return {slugify(query.translate(SERIES_KEY_TRANSLITERATION)), '-'.join(query.split()).casefold()}
+
+
+class CandidateComparisonAPIView(APIView):
+    """
+    Porównanie kandydatów w kolejnych wydarzeniach (sondaże cykliczne).
+    
+    ?candidates=<nazwa lub klucz serii>,... - kandydaci do porównania; kandydat
+    pasuje po Candidate.series_key, a bez klucza po nazwie,
+    ?events=<id>,<id> - wydarzenia do porównania, domyślnie ostatnie ?limit=
+    (12) publiczne wydarzenia, opcjonalnie tylko typu ?event_type=.
+    
+    Liczby głosów pochodzą z dziennych agregatów (polls.rollups) - jedno
+    zapytanie dla wszystkich wydarzeń. Odpowiedź jest w cache pod wersjami
+    danych wybranych wydarzeń.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    def get(self, request):
+        queries = [value.strip() for value in request.query_params.get('candidates', '').split(',') if value.strip()]
+        if not queries or len(queries) > MAX_COMPARISON_CANDIDATES:
+            return Response({
+                'message': f'Podaj od 1 do {MAX_COMPARISON_CANDIDATES} kandydatów (?candidates=).'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        events = Event.objects.filter(is_private=False)
+        events_param = request.query_params.get('events')
+        if events_param:
+            try:
+                event_ids = [uuid.UUID(value.strip()) for value in events_param.split(',') if value.strip()]
+            except ValueError:
+                return Response({
+                    'message': 'Nieprawidłowy identyfikator wydarzenia.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            events = events.filter(id__in=event_ids)
+            limit = MAX_RESULTS_EVENTS
+        else:
+            try:
+                limit = min(int(request.query_params.get('limit', DEFAULT_COMPARISON_EVENTS)), MAX_RESULTS_EVENTS)
+            except ValueError:
+                limit = DEFAULT_COMPARISON_EVENTS
+        if request.query_params.get('event_type'):
+            events = events.filter(event_type=request.query_params['event_type'])
+        events = list(
+            events.order_by('-event_date').only('id', 'title', 'event_type', 'event_date', 'status')[:max(limit, 1)]
+        )
+        events.reverse()
+        
+        versions = get_event_version_tokens(RESULTS_MODELS, [str(event.id) for event in events])
+        raw_key = f'{queries}|{[versions[str(event.id)] for event in events]}'
+        cache_key = f'api_candidate_comparison:{hashlib.md5(raw_key.encode()).hexdigest()}'
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.build_comparison(events, queries)
+            cache.set(cache_key, data, 300)
+        return Response(data)
+    
+    def build_comparison(self, events, queries):
+        candidates_by_event = {}
+        if events:
+            candidates = with_candidate_vote_totals(
+                Candidate.objects.filter(event__in=events).only('id', 'event_id', 'name', 'series_key')
+            )
+            for candidate in candidates:
+                candidates_by_event.setdefault(candidate.event_id, []).append(candidate)
+        
+        totals = {
+            event.id: sum(candidate.rollup_vote_count for candidate in candidates_by_event.get(event.id, []))
+            for event in events
+        }
+        
+        compared = []
+        for query in queries:
+            keys, name = series_keys_for_query(query), normalize_candidate_name(query)
+            series = []
+            for event in events:
+                # Jawne połączenie (klucz serii) ma pierwszeństwo przed nazwą
+                matches = [
+                    candidate for candidate in candidates_by_event.get(event.id, [])
+                    if (candidate.series_key and candidate.series_key.casefold() in keys)
+                    or (not candidate.series_key and normalize_candidate_name(candidate.name) == name)
+                ]
+                if matches:
+                    candidate = matches[0]
+                    series.append({
+                        'event_id': str(event.id),
+                        'candidate_id': str(candidate.id),
+                        'name': candidate.name,
+                        'vote_count': candidate.rollup_vote_count,
+                        'percentage': round(candidate.rollup_vote_count / totals[event.id] * 100, 2) if totals[event.id] else 0,
+                    })
+                else:
+                    series.append({
+                        'event_id': str(event.id),
+                        'candidate_id': None,
+                        'name': None,
+                        'vote_count': None,
+                        'percentage': None,
+                    })
+            compared.append({'query': query, 'series': series})
+        
+        return {
+            'events': [
+                {
+                    'id': str(event.id),
+                    'title': event.title,
+                    'event_type': event.get_event_type_display(),
+                    'event_date': event.event_date.isoformat(),
+                    'status': event.status,
+                    'total_votes': totals[event.id],
+                } for event in events
+            ],
+            'candidates': compared,
+            'generated_at': timezone.now().isoformat()
+        }
+
+
+class CandidateQuerysetMixin(SparseFieldsetViewMixin):
+    """Kandydaci z liczbą głosów i procentem, ograniczeni do pól z ?fields="""
+    
+    def get_candidate_queryset(self):
+        requested = self.get_requested_fields()
+        queryset = Candidate.objects.all()
+        # Złączenie z wydarzeniem tylko dla event_title
+        if not requested or 'event_title' in requested:
+            queryset = queryset.select_related('event')
+        return self.apply_sparse_fieldset(queryset)
+
+
+@cache_api_response(timeout=60, models=[Event, Candidate, Vote], event_query_param='event')
+class CandidateListAPIView(CandidateQuerysetMixin, generics.ListAPIView):
     """Lista kandydatów"""
-    queryset = Candidate.objects.all()
     serializer_class = CandidateSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     
     def get_queryset(self):
-        queryset = Candidate.objects.all()
+        queryset = self.get_candidate_queryset()
         event_id = self.request.query_params.get('event', None)
         if event_id:
             queryset = queryset.filter(event_id=event_id)
-        return queryset
+        # Liczby głosów i procenty w jednym zapytaniu (funkcja okna po wydarzeniu)
+        return queryset.with_results().order_by('event__event_date', 'event_id', '-annotated_vote_count', 'name')
 
 
-class CandidateDetailAPIView(generics.RetrieveAPIView):
+@cache_api_response(timeout=60, models=[Event, Candidate, Vote])
+class CandidateDetailAPIView(CandidateQuerysetMixin, generics.RetrieveAPIView):
     """Szczegóły kandydata"""
-    queryset = Candidate.objects.all()
     serializer_class = CandidateSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    
+    def get_queryset(self):
+        return self.get_candidate_queryset().with_results(window=False)
 
 
 class VoteCreateAPIView(APIView):
     """Tworzenie głosu"""
     permission_classes = [IsAuthenticatedOrReadOnly]
+    throttle_endpoint = 'api_vote'
+    
+    def initial(self, request, *args, **kwargs):
+        # Limit sprawdzany przed uwierzytelnieniem - odrzucone żądanie nie dotyka bazy
+        if request.method == 'POST':
+            wait = check_write_throttle(request, 'vote', self.throttle_endpoint)
+            if wait is not None:
+                raise Throttled(wait=wait)
+        super().initial(request, *args, **kwargs)
     
     def post(self, request):
         try:
@@ -102,21 +430,35 @@ class VoteCreateAPIView(APIView):
             candidate = get_object_or_404(Candidate, id=candidate_id, event=event)
             
             client_ip = get_client_ip(request)
+            fingerprint = fingerprint_fields(browser_fingerprint)
+            user_agent = request.META.get('HTTP_USER_AGENT', '')
+            
+            # Fale głosów z jednej podsieci / przeglądarki / User Agenta
+            is_flagged, is_blocked = check_vote_anomalies(event.id, get_trusted_client_ip(request), fingerprint['browser_fingerprint'], user_agent)
+            if is_blocked:
+                return Response({
+                    'success': False,
+                    'message': ANOMALY_BLOCK_MESSAGE
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
             
             # Sprawdź czy można głosować
-            if not check_vote_eligibility(request, event, client_ip):
+            if not check_vote_eligibility(request, event, client_ip, browser_fingerprint):
                 return Response({
                     'success': False,
                     'message': 'Już oddałeś głos w tym sondażu lub sondaż jest nieaktywny.'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
+            # Ta sama przeglądarka z innego IP - możliwe dwa identyczne urządzenia, więc tylko oznaczamy
+            is_flagged = is_flagged or fingerprint_already_voted(event, browser_fingerprint)
+            
             # Utwórz głos
             vote = Vote.objects.create(
                 event=event,
                 candidate=candidate,
                 ip_address=client_ip,
-                browser_fingerprint=browser_fingerprint,
-                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                **fingerprint,
+                user_agent=user_agent,
+                is_flagged=is_flagged,
             )
             
             # Aktualizuj analitykę
@@ -138,46 +480,62 @@ class VoteCreateAPIView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+register_endpoint(VoteCreateAPIView.throttle_endpoint)
+
+
+@cache_api_response(timeout=300, models=[SiteStatistics])
 class StatisticsAPIView(APIView):
-    """Statystyki aplikacji"""
+    """Statystyki aplikacji (odczyt zmaterializowanego wiersza SiteStatistics)"""
     permission_classes = [IsAuthenticatedOrReadOnly]
     
     def get(self, request):
-        total_events = Event.objects.count()
-        active_events = Event.objects.filter(status='active').count()
-        total_votes = Vote.objects.count()
-        total_candidates = Candidate.objects.count()
-        
-        # Najpopularniejsze wydarzenia
-        popular_events = Event.objects.annotate(
-            vote_count=Count('votes')
-        ).order_by('-vote_count')[:5]
-        
-        # Statystyki geograficzne (przykład)
-        geographic_stats = {}
-        for vote in Vote.objects.all()[:1000]:  # Ogranicz do 1000 głosów dla wydajności
-            region = "Nieznany"
-            if vote.ip_address:
-                if vote.ip_address.startswith('192.168.'):
-                    region = "Sieć lokalna"
-                elif vote.ip_address.startswith('10.'):
-                    region = "Sieć prywatna"
-                else:
-                    region = "Internet"
-            
-            geographic_stats[region] = geographic_stats.get(region, 0) + 1
+        # Wiersz odświeża cyklicznie komenda refresh_site_statistics;
+        # liczymy go w żądaniu tylko przy pierwszym uruchomieniu
+        statistics = SiteStatistics.objects.first() or refresh_site_statistics()
+        return Response(StatisticsSerializer(statistics).data)
+
+
+class EventReportAPIView(APIView):
+    """
+    Raport z głosowania liczony w tle.
+    
+    POST zleca raport dla bieżącej wersji danych wydarzenia (202) albo zwraca
+    istniejące zlecenie tej wersji (200). GET zwraca gotowy raport aktualnej
+    wersji z ETagiem równym skrótowi treści; gdy raport jeszcze się liczy,
+    odpowiada 202 ze statusem zlecenia.
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get_data_version(self, event):
+        return get_event_version_tokens(RESULTS_MODELS, [str(event.id)])[str(event.id)]
+    
+    def get(self, request, event_id):
+        event = get_object_or_404(Event, id=event_id)
+        job = get_current_report_job(event, self.get_data_version(event))
+        if job is None:
+            return Response({'detail': 'Brak raportu dla aktualnych danych - zleć go metodą POST.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        if job.status != 'done':
+            return Response(ReportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
         
-        return Response({
-            'total_events': total_events,
-            'active_events': active_events,
-            'total_votes': total_votes,
-            'total_candidates': total_candidates,
-            'popular_events': [
-                {
-                    'id': str(event.id),
-                    'title': event.title,
-                    'vote_count': event.vote_count
-                } for event in popular_events
-            ],
-            'geographic_stats': geographic_stats
-        })
+        etag = f'"{job.content_hash}"'
+        client_etags = [value.strip().removeprefix('W/') for value in request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]
+        if etag in client_etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({**ReportJobSerializer(job).data, 'result': job.result})
+        response['ETag'] = etag
+        return response
+    
+    def post(self, request, event_id):
+        event = get_object_or_404(Event, id=event_id)
+        job, created = enqueue_report(event, self.get_data_version(event), request.user)
+        response_status = status.HTTP_200_OK if job.status == 'done' else status.HTTP_202_ACCEPTED
+        return Response(ReportJobSerializer(job).data, status=response_status)
+
+
+class ReportJobAPIView(generics.RetrieveAPIView):
+    """Status i postęp zlecenia raportu"""
+    queryset = ReportJob.objects.all()
+    serializer_class = ReportJobSerializer
+    permission_classes = [IsAdminUser]
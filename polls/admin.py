@@ -1,8 +1,15 @@
-from django.contrib import admin
+import tempfile
+
+from django.contrib import admin, messages
+from django.db.models import Count
+from django.http import FileResponse
+from django.utils import timezone
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import Event, Candidate, Vote, Comment, UserBadge, PollAnalytics
+from .models import Event, Candidate, Vote, Comment, UserBadge, PollAnalytics, SiteStatistics, ReportJob, VoteAnomaly
+from .exports import COLUMNAR_FORMATS, write_votes_columnar
+from .rollups import with_vote_totals
 
 
 class CandidateInline(admin.TabularInline):
@@ -20,6 +27,7 @@ class EventAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'created_at', 'updated_at']
     list_editable = ['status']
     inlines = [CandidateInline]
+    actions = ['download_votes_parquet']
     
     fieldsets = (
         ('Podstawowe informacje', {
@@ -35,27 +43,53 @@ class EventAdmin(admin.ModelAdmin):
     )
     
     def candidate_count(self, obj):
-        return obj.candidates.count()
+        return obj.candidate_count
     candidate_count.short_description = 'Liczba kandydatów'
+    candidate_count.admin_order_field = 'candidate_count'
     
     def vote_count(self, obj):
-        return obj.votes.count()
+        return obj.rollup_vote_count
     vote_count.short_description = 'Liczba głosów'
+    vote_count.admin_order_field = 'rollup_vote_count'
     
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('candidates', 'votes')
+        # Głosy z dziennych agregatów; bez pobierania wszystkich głosów wydarzeń
+        queryset = super().get_queryset(request).annotate(candidate_count=Count('candidates'))
+        return with_vote_totals(queryset)
+    
+    @admin.action(description='Pobierz głosy (Parquet)')
+    def download_votes_parquet(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, 'Zaznacz dokładnie jedno wydarzenie.', messages.ERROR)
+            return None
+        event = queryset.get()
+        
+        # Anonimowy plik tymczasowy na dysku - pamięć nie rośnie z liczbą głosów,
+        # a system usuwa go po zamknięciu przez FileResponse (także w Windows)
+        handle = tempfile.TemporaryFile(suffix='.parquet')
+        try:
+            write_votes_columnar(event, handle, 'parquet')
+        except RuntimeError as error:
+            handle.close()
+            self.message_user(request, str(error), messages.ERROR)
+            return None
+        handle.seek(0)
+        
+        extension, content_type = COLUMNAR_FORMATS['parquet']
+        filename = f'glosy_{event.id}_{timezone.now().strftime("%Y%m%d")}.{extension}'
+        return FileResponse(handle, as_attachment=True, filename=filename, content_type=content_type)
 
 
 @admin.register(Candidate)
 class CandidateAdmin(admin.ModelAdmin):
     list_display = ['name', 'event_link', 'candidate_type', 'is_premium', 'vote_count', 'vote_percentage', 'created_at']
     list_filter = ['candidate_type', 'is_premium', 'created_at', 'event__event_type']
-    search_fields = ['name', 'description', 'event__title']
+    search_fields = ['name', 'series_key', 'description', 'event__title']
     readonly_fields = ['id', 'created_at', 'updated_at', 'vote_count', 'vote_percentage']
     
     fieldsets = (
         ('Podstawowe informacje', {
-            'fields': ('event', 'name', 'description', 'candidate_type')
+            'fields': ('event', 'name', 'series_key', 'description', 'candidate_type')
         }),
         ('Zdjęcia', {
             'fields': ('main_photo', 'additional_photos'),
@@ -100,15 +134,15 @@ class CandidateAdmin(admin.ModelAdmin):
 
 @admin.register(Vote)
 class VoteAdmin(admin.ModelAdmin):
-    list_display = ['candidate_name', 'event_title', 'ip_address', 'created_at']
-    list_filter = ['created_at', 'event__event_type', 'candidate__candidate_type']
+    list_display = ['candidate_name', 'event_title', 'ip_address', 'is_flagged', 'created_at']
+    list_filter = ['is_flagged', 'created_at', 'event__event_type', 'candidate__candidate_type']
     search_fields = ['candidate__name', 'event__title', 'ip_address']
     readonly_fields = ['id', 'created_at', 'ip_address', 'browser_fingerprint', 'user_agent']
     date_hierarchy = 'created_at'
     
     fieldsets = (
         ('Głos', {
-            'fields': ('event', 'candidate')
+            'fields': ('event', 'candidate', 'is_flagged')
         }),
         ('Informacje techniczne', {
             'fields': ('ip_address', 'browser_fingerprint', 'user_agent', 'location_data'),
@@ -138,7 +172,7 @@ class VoteAdmin(admin.ModelAdmin):
 class CommentAdmin(admin.ModelAdmin):
     list_display = ['author_name', 'candidate_name', 'is_approved', 'created_at', 'content_preview']
     list_filter = ['is_approved', 'created_at', 'candidate__candidate_type']
-    search_fields = ['author_email', 'content', 'candidate__name']
+    search_fields = ['author_email', 'display_name', 'content', 'candidate__name']
     readonly_fields = ['id', 'created_at', 'ip_address', 'author_name']
     list_editable = ['is_approved']
     actions = ['approve_comments', 'reject_comments']
@@ -239,6 +273,62 @@ class PollAnalyticsAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('event')
 
 
+@admin.register(SiteStatistics)
+class SiteStatisticsAdmin(admin.ModelAdmin):
+    list_display = ['computed_at', 'total_events', 'active_events', 'total_votes', 'total_candidates']
+    readonly_fields = [
+        'computed_at', 'total_events', 'active_events', 'total_votes',
+        'total_candidates', 'popular_events', 'geographic_stats'
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['event', 'status', 'progress', 'requested_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['event__title', 'content_hash']
+    readonly_fields = [
+        'id', 'event', 'requested_by', 'status', 'progress', 'data_version',
+        'result', 'content_hash', 'error', 'created_at', 'started_at', 'finished_at'
+    ]
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(VoteAnomaly)
+class VoteAnomalyAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'value_preview', 'event', 'peak_count', 'detections', 'last_detected_at', 'flagged_votes_link', 'is_reviewed']
+    list_filter = ['kind', 'is_reviewed', 'last_detected_at']
+    search_fields = ['value', 'event__title']
+    list_editable = ['is_reviewed']
+    readonly_fields = ['event', 'kind', 'value', 'peak_count', 'detections', 'first_detected_at', 'last_detected_at']
+    actions = ['mark_reviewed']
+    
+    def value_preview(self, obj):
+        return obj.value[:60] + '...' if len(obj.value) > 60 else obj.value
+    value_preview.short_description = 'Wartość'
+    
+    def flagged_votes_link(self, obj):
+        url = reverse('admin:polls_vote_changelist') + f'?event__id__exact={obj.event_id}&is_flagged__exact=1'
+        return format_html('<a href="{}">Podejrzane głosy</a>', url)
+    flagged_votes_link.short_description = 'Głosy'
+    
+    def mark_reviewed(self, request, queryset):
+        updated = queryset.update(is_reviewed=True)
+        self.message_user(request, f'{updated} anomalii oznaczono jako sprawdzone.')
+    mark_reviewed.short_description = 'Oznacz jako sprawdzone'
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('event')
+
+
 # Customize admin site
 admin.site.site_header = 'Wysonda - Panel Administracyjny'
 admin.site.site_title = 'Wysonda Admin'
@@ -0,0 +1,175 @@
+"""
+Wykrywanie fal głosów w czasie rzeczywistym.
+
+Każdy głos (także odrzucony przez check_vote_eligibility) jest liczony w
+przesuwanym oknie VOTE_ANOMALY_WINDOW sekund osobno dla podsieci (/24, /64),
+fingerprintu przeglądarki i User Agenta - w zakresie wydarzenia. Liczniki
+to szkic count-min z aktualizacją zachowawczą: stała pamięć niezależnie od
+liczby adresów, a oszacowania rzadkich kluczy zostają blisko rzeczywistych
+mimo kolizji z popularnymi User Agentami. Okno składa się z kilku
+przegródek; szkic sumy okna jest aktualizowany przy każdym głosie, a przy
+zmianie przegródki odejmujemy najstarszą - głos kosztuje kilka operacji na
+tablicy (benchmark: python manage.py bench_vote_anomalies).
+
+Przekroczenie progu z VOTE_ANOMALY_THRESHOLDS oznacza głos jako podejrzany
+(Vote.is_flagged), a pierwsze przekroczenie w oknie zapisuje VoteAnomaly
+w tle (widoczne w panelu admina). Przy VOTE_ANOMALY_ACTION = 'block' głosy
+są odrzucane, dopóki liczba w oknie przekracza próg.
+
+Liczniki żyją w pamięci procesu - przy kilku procesach każdy widzi swoją
+część ruchu, więc progi dotyczą pojedynczego procesu.
+"""
+
+import threading
+import time
+from array import array
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import VoteAnomaly
+from .tasks import run_in_background
+from .throttling import get_subnet
+
+DEFAULT_THRESHOLDS = {'subnet': 50, 'fingerprint': 10, 'user_agent': 500}
+
+BLOCK_MESSAGE = 'Głosowanie z tej sieci lub przeglądarki jest chwilowo wstrzymane. Spróbuj ponownie później.'
+
+# Wartości dłuższe są przycinane (VoteAnomaly.value)
+MAX_VALUE_LENGTH = 255
+
+
+class SlidingCountMinSketch:
+    """Szkic count-min z przesuwanym oknem czasowym"""
+
+    def __init__(self, window: int = 300, slots: int = 6, width: int = 32768, depth: int = 4):
+        if width & (width - 1):
+            raise ValueError('Szerokość szkicu musi być potęgą dwójki')
+        self.width = width
+        self.depth = depth
+        self.mask = width - 1
+        self.offsets = [row * width for row in range(depth)]
+        self.slots = slots
+        self.slot_seconds = window / slots
+        # Liczniki 32-bitowe: (slots + 1) * depth * width * 4 B, domyślnie ok. 3,5 MB
+        self.slot_counters = [self._zeros() for _ in range(slots)]
+        self.window_counters = self._zeros()
+        self.current_slot = None
+
+    def _zeros(self):
+        return array('I', bytes(4 * self.width * self.depth))
+
+    def _indexes(self, key):
+        # Podwójne haszowanie (Kirsch-Mitzenmacher): dwie połówki jednego 64-bitowego hasha
+        value = hash(key)
+        position, step, mask = value & 0xFFFFFFFF, value >> 32 | 1, self.mask
+        indexes = []
+        for offset in self.offsets:
+            indexes.append(offset + (position & mask))
+            position += step
+        return indexes
+
+    def advance(self, now: float):
+        """Przesuwa okno do chwili now, zerując przegródki, które z niego wypadły"""
+        slot = int(now // self.slot_seconds)
+        if self.current_slot is None:
+            self.current_slot = slot
+            return
+        expired = min(slot - self.current_slot, self.slots)
+        for step in range(1, expired + 1):
+            position = (self.current_slot + step) % self.slots
+            counters = self.slot_counters[position]
+            if any(counters):
+                self.window_counters = array('I', map(int.__sub__, self.window_counters, counters))
+                self.slot_counters[position] = self._zeros()
+        if slot > self.current_slot:
+            self.current_slot = slot
+
+    def add(self, key) -> int:
+        """Dolicza klucz w bieżącej przegródce; zwraca oszacowanie liczby w oknie"""
+        window_counters = self.window_counters
+        indexes = self._indexes(key)
+        # Aktualizacja zachowawcza: podnosimy tylko liczniki poniżej nowego oszacowania,
+        # więc kolizje z częstymi kluczami nie zawyżają wyników rzadkich
+        estimate = min(map(window_counters.__getitem__, indexes)) + 1
+        counters = self.slot_counters[self.current_slot % self.slots]
+        for index in indexes:
+            delta = estimate - window_counters[index]
+            if delta > 0:
+                window_counters[index] = estimate
+                counters[index] += delta
+        return estimate
+
+    def estimate(self, key) -> int:
+        return min(map(self.window_counters.__getitem__, self._indexes(key)))
+
+
+class VoteAnomalyDetector:
+    """Liczniki podsieci, fingerprintów i User Agentów w oknie; zgłasza przekroczenia progów"""
+
+    def __init__(self, window: int = None, thresholds: dict = None, width: int = 32768, depth: int = 4):
+        self.window = window or getattr(settings, 'VOTE_ANOMALY_WINDOW', 300)
+        self.thresholds = thresholds or getattr(settings, 'VOTE_ANOMALY_THRESHOLDS', DEFAULT_THRESHOLDS)
+        self.sketch = SlidingCountMinSketch(self.window, width=width, depth=depth)
+        # Klucze z przekroczonym progiem -> koniec okna (zapis VoteAnomaly raz na okno)
+        self.flagged = {}
+        self.lock = threading.Lock()
+
+    def observe(self, event_id, ip_address: str, fingerprint: str = '', user_agent: str = '', now: float = None) -> dict:
+        """Liczy głos; zwraca {rodzaj: (wartość, liczba w oknie)} dla przekroczonych progów"""
+        now = time.time() if now is None else now
+        values = {'subnet': get_subnet(ip_address), 'fingerprint': fingerprint, 'user_agent': user_agent}
+        # Hash UUID liczony w Pythonie - raz na głos zamiast przy każdym kluczu
+        event_hash = hash(event_id)
+        exceeded = {}
+        with self.lock:
+            self.sketch.advance(now)
+            for kind, value in values.items():
+                threshold = self.thresholds.get(kind)
+                if not value or not threshold:
+                    continue
+                count = self.sketch.add((event_hash, kind, value))
+                if count > threshold:
+                    exceeded[kind] = (value, count)
+            if exceeded:
+                self._record(event_id, exceeded, now)
+        return exceeded
+
+    def _record(self, event_id, exceeded, now):
+        if len(self.flagged) > 10000:
+            self.flagged = {key: until for key, until in self.flagged.items() if until > now}
+        for kind, (value, count) in exceeded.items():
+            key = (event_id, kind, value)
+            if self.flagged.get(key, 0) > now:
+                continue
+            self.flagged[key] = now + self.window
+            run_in_background(record_anomaly, event_id, kind, value[:MAX_VALUE_LENGTH], count)
+
+
+def record_anomaly(event_id, kind: str, value: str, count: int):
+    """Zapisuje (lub aktualizuje) wykrytą anomalię"""
+    now = timezone.now()
+    anomaly, created = VoteAnomaly.objects.get_or_create(
+        event_id=event_id, kind=kind, value=value,
+        defaults={'peak_count': count, 'detections': 1, 'last_detected_at': now},
+    )
+    if not created:
+        VoteAnomaly.objects.filter(pk=anomaly.pk).update(
+            peak_count=Greatest(F('peak_count'), count),
+            detections=F('detections') + 1,
+            last_detected_at=now,
+            is_reviewed=False,
+        )
+
+
+detector = VoteAnomalyDetector()
+
+
+def check_vote_anomalies(event_id, ip_address: str, fingerprint: str = '', user_agent: str = ''):
+    """Sprawdzenie na ścieżce głosu: (oznaczyć głos, odrzucić głos)"""
+    exceeded = detector.observe(event_id, ip_address, fingerprint, user_agent)
+    if not exceeded:
+        return False, False
+    return True, getattr(settings, 'VOTE_ANOMALY_ACTION', 'flag') == 'block'
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PollsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'polls'
+
+    def ready(self):
+        from .geoip import connect_location_signals
+        from .rollups import connect_rollup_signals
+        connect_location_signals()
+        connect_rollup_signals()
@@ -0,0 +1,222 @@
+"""
+Eksport surowych głosów wydarzenia.
+
+Głosy są czytane przez values_list(...).iterator(chunk_size=...) - bez
+tworzenia instancji modelu i bez ładowania całego wyniku do pamięci, więc
+zużycie pamięci nie zależy od liczby głosów. Adres IP jest eksportowany
+wyłącznie jako skrót (HMAC z SECRET_KEY).
+
+Format kolumnowy (Parquet / Arrow IPC) wymaga pakietu pyarrow. Kolumny
+wydarzenia i kandydata są kodowane słownikowo ze stałym słownikiem
+(wszyscy kandydaci wydarzenia), więc każda partia ma ten sam schemat.
+"""
+
+import csv
+import hashlib
+import hmac
+import math
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Candidate, Vote
+from .xlsx import MAX_SHEET_ROWS, iter_xlsx
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    pyarrow = None
+
+EXPORT_CHUNK_SIZE = 5000
+
+VOTE_EXPORT_HEADER = ['Data głosu', 'Kandydat', 'Skrót IP', 'Fingerprint', 'User Agent']
+
+COLUMNAR_FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+COLUMNAR_COMPRESSION = 'zstd'
+
+
+def hash_ip_address(ip_address: str) -> str:
+    """Skrót adresu IP - stały w obrębie instalacji, nieodwracalny bez SECRET_KEY"""
+    return hmac.new(settings.SECRET_KEY.encode(), ip_address.encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def parse_export_bound(value: str, end: bool = False):
+    """
+    Granica zakresu dat z parametru GET ('2026-10-19' lub pełna data i godzina).
+    Sama data jako koniec zakresu obejmuje cały dzień. Zwraca None dla pustej
+    wartości, ValueError dla niepoprawnej.
+    """
+    if not value:
+        return None
+    # Najpierw sama data - parse_datetime przyjmuje też '2026-10-19' (jako północ)
+    day = parse_date(value)
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def get_export_votes(event, date_from=None, date_to=None, fields=('created_at', 'candidate_id', 'ip_address', 'browser_fingerprint', 'user_agent')):
+    """Krotki głosów wydarzenia z zakresu [date_from, date_to) w kolejności oddania"""
+    votes = Vote.objects.filter(event=event)
+    if date_from:
+        votes = votes.filter(created_at__gte=date_from)
+    if date_to:
+        votes = votes.filter(created_at__lt=date_to)
+    return votes.order_by('created_at').values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    """Bufor dla csv.writer, który zwraca zapisany wiersz zamiast go przechowywać"""
+
+    def write(self, value):
+        return value
+
+
+def iter_votes_csv(event, date_from=None, date_to=None):
+    """Kolejne wiersze CSV z surowymi głosami wydarzenia"""
+    candidate_names = dict(event.candidates.values_list('id', 'name'))
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(VOTE_EXPORT_HEADER)
+    for created_at, candidate_id, ip_address, fingerprint, user_agent in get_export_votes(event, date_from, date_to):
+        yield writer.writerow([
+            created_at.isoformat(),
+            candidate_names.get(candidate_id, ''),
+            hash_ip_address(ip_address),
+            fingerprint,
+            user_agent,
+        ])
+
+
+def iter_results_rows(event, until=None):
+    candidates = Candidate.objects.filter(event=event).with_results(until=until).order_by('-annotated_vote_count', 'name')
+    yield ['Kandydat', 'Typ kandydata', 'Liczba głosów', 'Procent']
+    for candidate in candidates:
+        yield [
+            candidate.name,
+            candidate.get_candidate_type_display(),
+            candidate.vote_count,
+            candidate.vote_percentage,
+        ]
+
+
+def iter_hourly_rows(event, date_to=None):
+    """Liczba głosów w każdej godzinie (agregacja w bazie) z sumą narastającą"""
+    votes = Vote.objects.filter(event=event)
+    if date_to:
+        votes = votes.filter(created_at__lt=date_to)
+    hours = votes.annotate(hour=TruncHour('created_at')).values('hour').annotate(
+        count=Count('pk')
+    ).order_by('hour').values_list('hour', 'count')
+    yield ['Godzina', 'Liczba głosów', 'Suma narastająco']
+    running_total = 0
+    for hour, count in hours.iterator():
+        running_total += count
+        yield [hour, count, running_total]
+
+
+def iter_event_xlsx(event):
+    """
+    Skoroszyt XLSX wydarzenia: wyniki, surowe głosy i trend godzinowy.
+    Głosy przekraczające limit wierszy Excela trafiają do kolejnych arkuszy.
+    Wszystkie arkusze (wyniki, głosy i ich liczba, trend) dotyczą tej samej
+    chwili (snapshot) - głosy oddane w trakcie eksportu są pomijane.
+    """
+    candidate_names = dict(event.candidates.values_list('id', 'name'))
+    snapshot = timezone.now()
+    votes = get_export_votes(event, date_to=snapshot)
+    rows_per_sheet = MAX_SHEET_ROWS - 1
+    vote_sheets = max(1, math.ceil(Vote.objects.filter(event=event, created_at__lt=snapshot).count() / rows_per_sheet))
+
+    def vote_rows():
+        yield VOTE_EXPORT_HEADER
+        for created_at, candidate_id, ip_address, fingerprint, user_agent in islice(votes, rows_per_sheet):
+            yield [created_at, candidate_names.get(candidate_id, ''), hash_ip_address(ip_address), fingerprint, user_agent]
+
+    sheets = [('Wyniki', iter_results_rows(event, snapshot))]
+    for number in range(1, vote_sheets + 1):
+        sheets.append(('Głosy' if number == 1 else f'Głosy ({number})', vote_rows()))
+    sheets.append(('Trend godzinowy', iter_hourly_rows(event, snapshot)))
+    return iter_xlsx(sheets)
+
+
+def get_vote_arrow_schema():
+    dictionary_string = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+    return pyarrow.schema([
+        ('created_at', pyarrow.timestamp('us', tz='UTC')),
+        ('event', dictionary_string),
+        ('candidate', dictionary_string),
+        ('ip_hash', pyarrow.string()),
+        ('browser_fingerprint', pyarrow.string()),
+        ('user_agent', pyarrow.string()),
+    ])
+
+
+def iter_vote_record_batches(event, date_from=None, date_to=None, batch_size=EXPORT_CHUNK_SIZE):
+    """Głosy wydarzenia jako kolejne pyarrow.RecordBatch po batch_size wierszy"""
+    schema = get_vote_arrow_schema()
+    candidate_ids = list(event.candidates.order_by('name').values_list('id', 'name'))
+    candidate_index = {candidate_id: index for index, (candidate_id, _) in enumerate(candidate_ids)}
+    event_dictionary = pyarrow.array([event.title], pyarrow.string())
+    candidate_dictionary = pyarrow.array([name for _, name in candidate_ids], pyarrow.string())
+
+    def build_batch(rows):
+        created_at, candidates, ip_hashes, fingerprints, user_agents = zip(*rows)
+        return pyarrow.RecordBatch.from_arrays([
+            pyarrow.array(created_at, schema.field('created_at').type),
+            pyarrow.DictionaryArray.from_arrays(pyarrow.repeat(pyarrow.scalar(0, pyarrow.int32()), len(rows)), event_dictionary),
+            pyarrow.DictionaryArray.from_arrays(pyarrow.array(candidates, pyarrow.int32()), candidate_dictionary),
+            pyarrow.array(ip_hashes, pyarrow.string()),
+            pyarrow.array(fingerprints, pyarrow.string()),
+            pyarrow.array(user_agents, pyarrow.string()),
+        ], schema=schema)
+
+    rows = []
+    for created_at, candidate_id, ip_address, fingerprint, user_agent in get_export_votes(event, date_from, date_to):
+        rows.append((created_at, candidate_index[candidate_id], hash_ip_address(ip_address), fingerprint, user_agent))
+        if len(rows) >= batch_size:
+            yield build_batch(rows)
+            rows = []
+    if rows:
+        yield build_batch(rows)
+
+
+def write_votes_columnar(event, sink, file_format='parquet', date_from=None, date_to=None, batch_size=EXPORT_CHUNK_SIZE):
+    """
+    Zapisuje głosy wydarzenia do pliku Parquet lub Arrow IPC (ścieżka lub
+    plik binarny) partia po partii. Zwraca liczbę zapisanych głosów.
+    """
+    if pyarrow is None:
+        raise RuntimeError('Eksport kolumnowy wymaga pakietu pyarrow (pip install pyarrow).')
+    if file_format not in COLUMNAR_FORMATS:
+        raise ValueError(f'Nieobsługiwany format: {file_format}')
+
+    schema = get_vote_arrow_schema()
+    if file_format == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression=COLUMNAR_COMPRESSION)
+    else:
+        options = pyarrow.ipc.IpcWriteOptions(compression=COLUMNAR_COMPRESSION)
+        writer = pyarrow.ipc.new_file(sink, schema, options=options)
+
+    total = 0
+    with writer:
+        for batch in iter_vote_record_batches(event, date_from, date_to, batch_size):
+            writer.write_batch(batch)
+            total += batch.num_rows
+    return total
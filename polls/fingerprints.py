@@ -0,0 +1,71 @@
+"""
+Kanoniczna postać fingerprintu przeglądarki.
+
+Klient wysyła fingerprint jako base64 z JSON-em (static/js/main.js); inne
+wartości (np. sam data URL canvasu ze starszych wersji strony) też są
+zapisywane, ale nie są porównywane z innymi głosami. Przed
+zapisem i przy sprawdzaniu głosu sprowadzamy go do tej samej postaci -
+JSON z posortowanymi kluczami albo przycięty napis - i zapisujemy skrót
+BLAKE2b o stałej długości w Vote.fingerprint_digest (indeks z wydarzeniem).
+
+Zgodny fingerprint z innego adresu IP tylko oznacza głos (Vote.is_flagged),
+nie blokuje go: pełny fingerprint jest taki sam na dwóch telefonach tego
+samego modelu z tym samym systemem, językiem i strefą czasową.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+
+FINGERPRINT_DIGEST_SIZE = 16
+
+
+def canonical_fingerprint(raw: str) -> str:
+    """Fingerprint klienta w postaci niezależnej od kodowania i kolejności pól"""
+    fingerprint = decode_fingerprint(raw)
+    if fingerprint is not None:
+        return json.dumps(fingerprint, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return (raw or '').strip()
+
+
+def decode_fingerprint(raw: str):
+    """Pełny fingerprint z main.js (słownik) albo None dla innych wartości"""
+    raw = (raw or '').strip()
+    if not raw:
+        return None
+    try:
+        decoded = json.loads(base64.b64decode(raw + '=' * (-len(raw) % 4), validate=True))
+    except (binascii.Error, ValueError):
+        return None
+    return decoded if isinstance(decoded, dict) else None
+
+
+def fingerprint_digest(raw: str):
+    """Skrót fingerprintu (bytes) albo None, jeśli klient go nie wysłał"""
+    canonical = canonical_fingerprint(raw)
+    if not canonical:
+        return None
+    return hashlib.blake2b(canonical.encode(), digest_size=FINGERPRINT_DIGEST_SIZE).digest()
+
+
+def matching_fingerprint_digest(raw: str):
+    """
+    Skrót fingerprintu porównywany z innymi głosami albo None.
+    
+    Porównujemy tylko pełny fingerprint z main.js. Sam obraz canvasu (lub inny
+    napis) jest taki sam na urządzeniach z tą samą kartą graficzną, systemem
+    i przeglądarką - np. na każdym iPhonie jednego modelu.
+    """
+    if decode_fingerprint(raw) is None:
+        return None
+    return fingerprint_digest(raw)
+
+
+def fingerprint_fields(raw: str) -> dict:
+    """Pola fingerprintu nowego głosu: skrót i jego zapis szesnastkowy do podglądu i eksportów"""
+    digest = fingerprint_digest(raw)
+    return {
+        'fingerprint_digest': digest,
+        'browser_fingerprint': digest.hex() if digest else '',
+    }
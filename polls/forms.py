@@ -29,9 +29,10 @@ class CandidateForm(forms.ModelForm):
     """Formularz dla kandydata"""
     class Meta:
         model = Candidate
-        fields = ['name', 'description', 'candidate_type', 'main_photo', 'extended_description', 'background_info', 'is_premium']
+        fields = ['name', 'series_key', 'description', 'candidate_type', 'main_photo', 'extended_description', 'background_info', 'is_premium']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
+            'series_key': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'candidate_type': forms.Select(attrs={'class': 'form-select'}),
             'main_photo': forms.FileInput(attrs={'class': 'form-control'}),
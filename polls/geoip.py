@@ -0,0 +1,102 @@
+"""
+Lokalna baza regionów adresów IP (bez zewnętrznych usług).
+
+Plik GEOIP_RANGES_FILE (CSV, bez nagłówka, '#' rozpoczyna komentarz) ma
+wiersze w jednej z postaci:
+
+    sieć_CIDR,kod_kraju,region
+    pierwszy_adres,ostatni_adres,kod_kraju,region
+
+Zakresy z adresami różnych wersji IP albo z początkiem po końcu są
+pomijane z ostrzeżeniem w logu.
+
+Plik jest wczytywany raz na proces do IPRangeTable (posortowane tablice
+liczb + bisect), więc wyszukiwanie trwa mikrosekundy. Brak pliku oznacza
+pustą tablicę (tak samo niepoprawny plik - błąd trafia do logu) - głosy
+po prostu nie dostają lokalizacji.
+"""
+
+import csv
+import functools
+import ipaddress
+import logging
+
+from django.conf import settings
+from django.db.models.signals import post_save
+
+from .iprange import IPRangeTable, pack_ip
+from .models import Vote
+from .tasks import run_in_background
+
+logger = logging.getLogger('wysonda.geoip')
+
+
+def load_geoip_table(path) -> IPRangeTable:
+    """Wczytuje zakresy adresów z pliku CSV"""
+    ranges = []
+    with open(path, encoding='utf-8', newline='') as source:
+        for line_number, row in enumerate(csv.reader(source), start=1):
+            row = [value.strip() for value in row]
+            if not row or not row[0] or row[0].startswith('#'):
+                continue
+            try:
+                if len(row) == 3:
+                    network = ipaddress.ip_network(row[0], strict=False)
+                    version, start, end = network.version, int(network.network_address), int(network.broadcast_address)
+                    country, region = row[1], row[2]
+                else:
+                    (version, start), (end_version, end) = pack_ip(row[0]), pack_ip(row[1])
+                    country, region = row[2], row[3]
+            except (TypeError, ValueError, IndexError):
+                raise ValueError(f'{path}:{line_number}: niepoprawny wiersz {row!r}')
+            # Taki zakres psułby wyszukiwanie bisect - pomijamy go zamiast odrzucać cały plik
+            if len(row) != 3 and (version != end_version or start > end):
+                logger.warning('%s:%d: pominięto zakres %s-%s (różne wersje IP lub początek po końcu)', path, line_number, row[0], row[1])
+                continue
+            ranges.append((version, start, end, (country.upper(), region)))
+    return IPRangeTable(ranges, default=None)
+
+
+@functools.lru_cache(maxsize=1)
+def get_geoip_table() -> IPRangeTable:
+    path = getattr(settings, 'GEOIP_RANGES_FILE', None)
+    try:
+        table = load_geoip_table(path)
+    except (OSError, TypeError):
+        logger.warning('Brak pliku zakresów GeoIP (%s) - lokalizacja głosów jest wyłączona', path)
+        return IPRangeTable([], default=None)
+    except ValueError as error:
+        logger.error('Niepoprawny plik zakresów GeoIP (%s) - lokalizacja głosów jest wyłączona', error)
+        return IPRangeTable([], default=None)
+    logger.info('Wczytano %d zakresów GeoIP z %s', len(table), path)
+    return table
+
+
+def lookup_location(ip_address: str) -> dict:
+    """{'country': 'PL', 'region': 'mazowieckie'} lub {} dla adresu spoza bazy"""
+    packed = pack_ip(ip_address)
+    if packed is None:
+        return {}
+    label = get_geoip_table().lookup_packed(*packed)
+    if label is None:
+        return {}
+    country, region = label
+    return {'country': country, 'region': region}
+
+
+def save_vote_location(vote_id, location: dict):
+    """Zapisuje lokalizację głosu w Vote.location_data"""
+    Vote.objects.filter(pk=vote_id).update(location_data=location)
+
+
+def locate_new_vote(sender, instance, created, **kwargs):
+    """Odbiornik post_save - wyszukanie od razu (mikrosekundy), zapis lokalizacji w tle"""
+    if not created or instance.location_data or not len(get_geoip_table()):
+        return
+    location = lookup_location(instance.ip_address)
+    if location:
+        run_in_background(save_vote_location, instance.pk, location)
+
+
+def connect_location_signals():
+    post_save.connect(locate_new_vote, sender=Vote, dispatch_uid='polls_locate_new_vote')
@@ -0,0 +1,135 @@
+"""
+Klasyfikacja adresów IP według tablic zakresów (CIDR).
+
+Zakresy są trzymane jako posortowane tablice liczb - początek i koniec
+zakresu oraz indeks etykiety - osobno dla IPv4 i IPv6. Pojedynczy adres
+jest wyszukiwany przez bisect, a klasyfikacja zbiorcza (count) najpierw
+usuwa duplikaty, zamienia adresy na liczby, sortuje je i przechodzi po
+tablicy zakresów jednym scaleniem - koszt nie zależy od liczby zakresów
+dla każdego adresu z osobna.
+"""
+
+import bisect
+import ipaddress
+import socket
+from array import array
+from collections import Counter
+
+UNKNOWN_LABEL = 'Nieznany'
+
+IPV4_MAPPED_PREFIX = 0xFFFF << 32
+
+
+def pack_ip(ip_address: str):
+    """'10.0.0.1' -> (4, 167772161); adres IPv4 zmapowany w IPv6 traktowany jak IPv4; None dla błędnych"""
+    if not ip_address:
+        return None
+    try:
+        if ':' in ip_address:
+            value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip_address), 'big')
+            if value >> 32 == 0xFFFF:
+                return 4, value - IPV4_MAPPED_PREFIX
+            return 6, value
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip_address), 'big')
+    except (OSError, ValueError):
+        return None
+
+
+class IPRangeTable:
+    """Niezachodzące na siebie zakresy adresów z etykietami"""
+
+    def __init__(self, ranges, default: str = UNKNOWN_LABEL):
+        """ranges - krotki (wersja, początek, koniec, etykieta) z końcem włącznie"""
+        self.default = default
+        self.labels = []
+        label_index = {}
+        tables = {4: [], 6: []}
+        for version, start, end, label in ranges:
+            if label not in label_index:
+                label_index[label] = len(self.labels)
+                self.labels.append(label)
+            tables[version].append((start, end, label_index[label]))
+
+        self.starts, self.ends, self.label_ids = {}, {}, {}
+        for version, rows in tables.items():
+            rows.sort()
+            for previous, current in zip(rows, rows[1:]):
+                if current[0] <= previous[1]:
+                    raise ValueError(f'Zakresy IPv{version} nachodzą na siebie: {previous[:2]} i {current[:2]}')
+            # IPv4 mieści się w tablicach 32-bitowych; IPv6 wymaga liczb Pythona
+            container = (lambda values: array('L', values)) if version == 4 else list
+            self.starts[version] = container(row[0] for row in rows)
+            self.ends[version] = container(row[1] for row in rows)
+            self.label_ids[version] = array('H', (row[2] for row in rows))
+
+    @classmethod
+    def from_networks(cls, networks, default: str = UNKNOWN_LABEL):
+        """networks - pary (CIDR, etykieta), np. ('10.0.0.0/8', 'Sieć prywatna')"""
+        ranges = []
+        for cidr, label in networks:
+            network = ipaddress.ip_network(cidr)
+            ranges.append((network.version, int(network.network_address), int(network.broadcast_address), label))
+        return cls(ranges, default)
+
+    def __len__(self):
+        return len(self.starts[4]) + len(self.starts[6])
+
+    def lookup_packed(self, version: int, value: int):
+        starts = self.starts[version]
+        position = bisect.bisect_right(starts, value) - 1
+        if position >= 0 and value <= self.ends[version][position]:
+            return self.labels[self.label_ids[version][position]]
+        return None
+
+    def lookup(self, ip_address: str, unmatched: str = None):
+        """Etykieta adresu; `unmatched` dla adresów spoza tablicy, domyślna etykieta dla błędnych"""
+        packed = pack_ip(ip_address)
+        if packed is None:
+            return self.default
+        label = self.lookup_packed(*packed)
+        return label if label is not None else (unmatched or self.default)
+
+    def count(self, ip_addresses, unmatched: str = None) -> Counter:
+        """Liczba adresów w każdej etykiecie (klasyfikacja zbiorcza)"""
+        occurrences = Counter(ip_addresses)
+        packed = {4: [], 6: []}
+        result = Counter()
+        for ip_address, occurrence in occurrences.items():
+            packed_ip = pack_ip(ip_address)
+            if packed_ip is None:
+                result[self.default] += occurrence
+            else:
+                packed[packed_ip[0]].append((packed_ip[1], occurrence))
+
+        for version, values in packed.items():
+            values.sort()
+            starts, ends, label_ids = self.starts[version], self.ends[version], self.label_ids[version]
+            position, size = 0, len(starts)
+            for value, occurrence in values:
+                # Wartości i zakresy są posortowane - wskaźnik zakresu tylko rośnie
+                while position < size and ends[position] < value:
+                    position += 1
+                if position < size and starts[position] <= value:
+                    result[self.labels[label_ids[position]]] += occurrence
+                else:
+                    result[unmatched or self.default] += occurrence
+        return result
+
+
+PRIVATE_NETWORK_LABEL = 'Sieć prywatna'
+LOCAL_NETWORK_LABEL = 'Sieć lokalna'
+PUBLIC_NETWORK_LABEL = 'Internet'
+
+SPECIAL_NETWORKS = [
+    ('10.0.0.0/8', PRIVATE_NETWORK_LABEL),
+    ('172.16.0.0/12', PRIVATE_NETWORK_LABEL),
+    ('192.168.0.0/16', LOCAL_NETWORK_LABEL),  # zgodnie z zapisanymi statystykami
+    ('100.64.0.0/10', PRIVATE_NETWORK_LABEL),  # CGNAT
+    ('fc00::/7', PRIVATE_NETWORK_LABEL),
+    ('127.0.0.0/8', LOCAL_NETWORK_LABEL),
+    ('169.254.0.0/16', LOCAL_NETWORK_LABEL),
+    ('::1/128', LOCAL_NETWORK_LABEL),
+    ('fe80::/10', LOCAL_NETWORK_LABEL),
+]
+
+network_table = IPRangeTable.from_networks(SPECIAL_NETWORKS)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from polls.models import Comment
+
+
+class Command(BaseCommand):
+    help = (
+        'Uzupełnia zapisane nazwy autorów (display_name) w komentarzach. Istniejące komentarze uzupełnia migracja '
+        '0014; z --force przelicza nazwy po zmianie nicków z pominięciem sygnałów (QuerySet.update, zmiany w bazie)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Liczba komentarzy w jednej paczce')
+        parser.add_argument('--force', action='store_true', help='Przelicz również komentarze z już zapisaną nazwą')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Comment.objects.select_related('author__profile').order_by('pk')
+        if not options['force']:
+            queryset = queryset.filter(display_name='')
+
+        updated = 0
+        last_pk = None
+        while True:
+            # Stronicowanie po kluczu głównym - stały koszt każdej paczki
+            batch_qs = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch_qs[:batch_size])
+            if not batch:
+                break
+
+            for comment in batch:
+                comment.display_name = comment.build_display_name()
+            Comment.objects.bulk_update(batch, ['display_name'])
+
+            updated += len(batch)
+            last_pk = batch[-1].pk
+            self.stdout.write(f'Zaktualizowano {updated} komentarzy...')
+
+        self.stdout.write(self.style.SUCCESS(f'Gotowe. Uzupełniono nazwy w {updated} komentarzach.'))
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from polls.geoip import get_geoip_table, lookup_location
+from polls.models import Vote
+
+
+class Command(BaseCommand):
+    help = 'Uzupełnia lokalizację (Vote.location_data) istniejących głosów z lokalnej bazy GeoIP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Liczba głosów w jednej paczce')
+        parser.add_argument('--event', help='Tylko głosy wskazanego wydarzenia')
+        parser.add_argument('--force', action='store_true', help='Przelicz również głosy z już zapisaną lokalizacją')
+
+    def handle(self, *args, **options):
+        table = get_geoip_table()
+        if not len(table):
+            self.stdout.write(self.style.WARNING('Baza GeoIP jest pusta - ustaw GEOIP_RANGES_FILE.'))
+            return
+
+        batch_size = options['batch_size']
+        queryset = Vote.objects.order_by('pk')
+        if options['event']:
+            queryset = queryset.filter(event_id=options['event'])
+        if not options['force']:
+            queryset = queryset.filter(location_data={})
+
+        processed = located = 0
+        lookup_seconds = 0.0
+        last_pk = None
+        while True:
+            # Stronicowanie po kluczu głównym - stały koszt każdej paczki
+            batch_qs = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch_qs.only('pk', 'ip_address', 'location_data')[:batch_size])
+            if not batch:
+                break
+
+            start = time.perf_counter()
+            changed = []
+            for vote in batch:
+                location = lookup_location(vote.ip_address)
+                if location and location != vote.location_data:
+                    vote.location_data = location
+                    changed.append(vote)
+            lookup_seconds += time.perf_counter() - start
+
+            Vote.objects.bulk_update(changed, ['location_data'])
+            processed += len(batch)
+            located += len(changed)
+            last_pk = batch[-1].pk
+
+        per_lookup_us = lookup_seconds / processed * 1_000_000 if processed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Sprawdzono {processed} głosów, zlokalizowano {located} '
+            f'(zakresów w bazie: {len(table)}, średnio {per_lookup_us:.1f} µs na wyszukanie).'
+        ))
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+from django.utils.text import compress_string
+
+from wysonda.middleware import BROTLI_QUALITY, brotli
+
+from .bench_templates import TEMPLATE_NAME, Command as TemplateBenchCommand
+
+
+class Command(BaseCommand):
+    help = 'Mierzy zysk z kompresji gzip/brotli dla typowych odpowiedzi (strona wydarzenia, wyniki JSON, eksport CSV)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=12, help='Liczba kandydatów w sondażu')
+        parser.add_argument('--votes', type=int, default=5000, help='Liczba wierszy w próbce eksportu CSV')
+
+    def handle(self, *args, **options):
+        context_data = TemplateBenchCommand().build_context(options['candidates'])
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+
+        payloads = [
+            (TEMPLATE_NAME, render_to_string(TEMPLATE_NAME, context_data, request).encode()),
+            ('wyniki wydarzenia (JSON)', self.build_results_json(context_data)),
+            (f'eksport głosów (CSV, {options["votes"]} wierszy)', self.build_votes_csv(context_data, options['votes'])),
+        ]
+
+        self.stdout.write(f'{"Odpowiedź":<40} {"Surowa":>9} {"gzip":>9} {"brotli":>9} {"Oszczędność":>12}')
+        for label, payload in payloads:
+            gzip_size, gzip_ms = self.measure(lambda: compress_string(payload))
+            if brotli is not None:
+                brotli_size, brotli_ms = self.measure(lambda: brotli.compress(payload, quality=BROTLI_QUALITY))
+            else:
+                brotli_size, brotli_ms = None, None
+
+            # HTML zawsze idzie gzipem (ochrona przed BREACH), reszta brotli, jeśli jest
+            best = gzip_size if label == TEMPLATE_NAME or brotli_size is None else brotli_size
+            saved = len(payload) - best
+            self.stdout.write(
+                f'{label:<40} {len(payload):>9} {gzip_size:>9} {brotli_size or "-":>9} '
+                f'{saved:>7} ({saved / len(payload):.0%})'
+            )
+            self.stdout.write(
+                f'{"":<40} {"":>9} {gzip_ms:>7.2f}ms '
+                f'{f"{brotli_ms:.2f}ms" if brotli_ms is not None else "-":>9}'
+            )
+
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('Pakiet brotli nie jest zainstalowany - mierzono tylko gzip.'))
+
+    def measure(self, compress, repeat=20):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            compressed = compress()
+        return len(compressed), (time.perf_counter() - start) * 1000 / repeat
+
+    def build_results_json(self, context_data):
+        event = context_data['event']
+        return json.dumps({
+            'event': {
+                'title': event.title,
+                'event_type': event.get_event_type_display(),
+                'event_date': event.event_date.isoformat(),
+                'status': event.status,
+            },
+            'results': [
+                {
+                    'id': str(candidate.id),
+                    'name': candidate.name,
+                    'vote_count': candidate.vote_count,
+                    'percentage': candidate.vote_percentage,
+                } for candidate in context_data['candidates']
+            ],
+            'total_votes': context_data['total_votes'],
+        }).encode()
+
+    def build_votes_csv(self, context_data, rows):
+        candidates = context_data['candidates']
+        now = timezone.now()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(['candidate', 'ip_address', 'created_at'])
+        for index in range(rows):
+            writer.writerow([
+                candidates[index % len(candidates)].name,
+                f'83.{index % 256}.{index // 256 % 256}.{index * 7 % 256}',
+                (now - timezone.timedelta(seconds=index * 13)).isoformat(),
+            ])
+        return buffer.getvalue().encode()
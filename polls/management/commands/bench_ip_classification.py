@@ -0,0 +1,90 @@
+import ipaddress
+import random
+import time
+from collections import Counter
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from polls.iprange import LOCAL_NETWORK_LABEL, PRIVATE_NETWORK_LABEL, PUBLIC_NETWORK_LABEL, network_table
+
+
+class Command(BaseCommand):
+    help = 'Benchmark klasyfikacji adresów IP głosów: dopasowanie prefiksów vs ipaddress vs tablica zakresów'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--votes', type=int, default=1_000_000, help='Liczba adresów IP')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Wielkość porcji adresów')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        ip_addresses = self.generate_ips(options['votes'], random.Random(options['seed']))
+        chunk_size = options['chunk_size']
+        self.stdout.write(f'Adresów: {len(ip_addresses)}, porcja: {chunk_size}')
+
+        methods = [
+            ('prefiksy tekstowe (dawniej)', self.classify_by_prefix),
+            ('ipaddress na adres', self.classify_with_ipaddress),
+            ('tablica zakresów, porcjami', lambda ips: self.classify_with_table(ips, chunk_size)),
+        ]
+        reference = None
+        for label, method in methods:
+            start = time.perf_counter()
+            counts = method(ip_addresses)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{label:<30} {elapsed:7.2f} s  {len(ip_addresses) / elapsed:>12,.0f} adresów/s  {dict(counts)}')
+            if label.startswith('ipaddress'):
+                reference = counts
+            elif reference is not None and counts != reference:
+                self.stdout.write(self.style.ERROR('  wynik różni się od klasyfikacji ipaddress'))
+
+    def generate_ips(self, count, rng):
+        """Mieszanka adresów publicznych, prywatnych (w tym 172.16/12) i IPv6"""
+        ips = []
+        for _ in range(count):
+            kind = rng.random()
+            if kind < 0.70:
+                ips.append(f'{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}')
+            elif kind < 0.80:
+                ips.append(f'172.{rng.randint(16, 31)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}')
+            elif kind < 0.88:
+                ips.append(f'192.168.{rng.randint(0, 255)}.{rng.randint(1, 254)}')
+            elif kind < 0.95:
+                ips.append(f'2a02:{rng.randint(0, 0xffff):x}:{rng.randint(0, 0xffff):x}::{rng.randint(1, 0xffff):x}')
+            else:
+                ips.append(f'fd{rng.randint(0, 0xff):02x}::{rng.randint(1, 0xffff):x}')
+        return ips
+
+    def classify_by_prefix(self, ip_addresses):
+        counts = Counter()
+        for ip_address in ip_addresses:
+            if ip_address.startswith('192.168.'):
+                counts['Sieć lokalna'] += 1
+            elif ip_address.startswith('10.'):
+                counts['Sieć prywatna'] += 1
+            else:
+                counts['Internet'] += 1
+        return counts
+
+    def classify_with_ipaddress(self, ip_addresses):
+        local_networks = [
+            ipaddress.ip_network(n) for n in ('192.168.0.0/16', '127.0.0.0/8', '169.254.0.0/16', '::1/128', 'fe80::/10')
+        ]
+        private_networks = [ipaddress.ip_network(n) for n in ('10.0.0.0/8', '172.16.0.0/12', '100.64.0.0/10', 'fc00::/7')]
+        counts = Counter()
+        for ip_address in ip_addresses:
+            address = ipaddress.ip_address(ip_address)
+            if any(address in network for network in local_networks if network.version == address.version):
+                counts[LOCAL_NETWORK_LABEL] += 1
+            elif any(address in network for network in private_networks if network.version == address.version):
+                counts[PRIVATE_NETWORK_LABEL] += 1
+            else:
+                counts[PUBLIC_NETWORK_LABEL] += 1
+        return counts
+
+    def classify_with_table(self, ip_addresses, chunk_size):
+        counts = Counter()
+        iterator = iter(ip_addresses)
+        for chunk in iter(lambda: list(islice(iterator, chunk_size)), []):
+            counts.update(network_table.count(chunk, unmatched=PUBLIC_NETWORK_LABEL))
+        return counts
@@ -0,0 +1,122 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.utils import timezone
+
+from polls.models import Event
+
+
+TEMPLATE_NAME = 'polls/event_detail.html'
+
+BASE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark renderowania polls/event_detail.html dla różnych konfiguracji silnika szablonów'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500, help='Liczba renderowań na konfigurację')
+        parser.add_argument('--candidates', type=int, default=12, help='Liczba kandydatów w sondażu')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        context_data = self.build_context(options['candidates'])
+        request = RequestFactory().get(f"/event/{context_data['event'].id}/")
+        request.user = AnonymousUser()
+
+        template_settings = settings.TEMPLATES[0]
+        dirs = template_settings.get('DIRS', [])
+        all_processors = template_settings['OPTIONS'].get('context_processors', [])
+        trimmed_processors = [p for p in all_processors if p != 'django.template.context_processors.debug']
+
+        configurations = [
+            ('bez cache, DEBUG, wszystkie procesory', dict(
+                debug=True, context_processors=all_processors, loaders=BASE_LOADERS,
+            )),
+            ('cached loader, wszystkie procesory', dict(
+                debug=False, context_processors=all_processors,
+                loaders=[('django.template.loaders.cached.Loader', BASE_LOADERS)],
+            )),
+            ('produkcja: cached loader, przycięte procesory', dict(
+                debug=False, context_processors=trimmed_processors,
+                loaders=[('django.template.loaders.cached.Loader', BASE_LOADERS)],
+            )),
+        ]
+
+        self.stdout.write(f'Szablon: {TEMPLATE_NAME}, kandydatów: {options["candidates"]}, iteracji: {iterations}')
+        baseline = None
+        for label, engine_options in configurations:
+            backend = DjangoTemplates({
+                'NAME': 'bench',
+                'DIRS': dirs,
+                'APP_DIRS': False,
+                'OPTIONS': engine_options,
+            })
+            per_render_ms = self.measure(backend, request, context_data, iterations)
+            baseline = baseline or per_render_ms
+            self.stdout.write(
+                f'{label:<50} {per_render_ms:8.3f} ms/render  (x{baseline / per_render_ms:.2f})'
+            )
+
+    def measure(self, backend, request, context_data, iterations):
+        # Rozgrzewka - kompilacja szablonu w wariantach z cache
+        backend.get_template(TEMPLATE_NAME).render(context_data, request)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            template = backend.get_template(TEMPLATE_NAME)
+            template.render(context_data, request)
+        return (time.perf_counter() - start) * 1000 / iterations
+
+    def build_context(self, candidate_count):
+        """Buduje realistyczny kontekst bez dostępu do bazy danych"""
+        now = timezone.now()
+        event = Event(
+            title='Wybory Prezydenckie 2030 - sondaż',
+            description='Sondaż poparcia kandydatów w wyborach prezydenckich. ' * 5,
+            event_type='presidential',
+            event_date=now + timezone.timedelta(days=7),
+            status='active',
+        )
+
+        total_votes = 0
+        candidates = []
+        for index in range(candidate_count):
+            vote_count = (candidate_count - index) * 137
+            total_votes += vote_count
+            candidates.append(SimpleNamespace(
+                id=uuid.uuid4(),
+                name=f'Kandydat Testowy {index + 1}',
+                main_photo=None,
+                candidate_type='individual',
+                get_candidate_type_display='Osoba fizyczna',
+                vote_count=vote_count,
+            ))
+
+        for candidate in candidates:
+            candidate.vote_percentage = round(candidate.vote_count / total_votes * 100, 2)
+            candidate.proportional_width = candidate.vote_count / total_votes * 100
+
+        return {
+            'event': event,
+            'candidates': candidates,
+            'results': [
+                {'candidate': c, 'vote_count': c.vote_count, 'percentage': c.vote_percentage}
+                for c in candidates
+            ],
+            'total_votes': total_votes,
+            'max_votes': candidates[0].vote_count if candidates else 0,
+            'has_voted': False,
+            'user_vote': None,
+            'client_ip': '127.0.0.1',
+            'now': now,
+        }
@@ -0,0 +1,46 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from polls.anomalies import VoteAnomalyDetector
+
+
+class Command(BaseCommand):
+    help = 'Benchmark detektora fal głosów: czas sprawdzenia jednego głosu i wykrycie fali z jednej podsieci'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--votes', type=int, default=200_000, help='Liczba głosów')
+        parser.add_argument('--events', type=int, default=5, help='Liczba wydarzeń')
+        parser.add_argument('--wave', type=float, default=0.02, help='Udział głosów z jednej podsieci (fala)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        events = [uuid.uuid4() for _ in range(options['events'])]
+        user_agents = [f'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/{version}.0' for version in range(100, 130)]
+        votes = []
+        for _ in range(options['votes']):
+            if rng.random() < options['wave']:
+                ip_address = f'203.0.113.{rng.randint(1, 254)}'
+            else:
+                ip_address = f'{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}'
+            votes.append((rng.choice(events), ip_address, f'{rng.getrandbits(128):032x}', rng.choice(user_agents)))
+
+        # Bez zapisu VoteAnomaly - mierzymy tylko liczniki
+        detector = VoteAnomalyDetector(window=300, thresholds={'subnet': 50, 'fingerprint': 10, 'user_agent': 10**9})
+        detector._record = lambda event_id, exceeded, now: None
+
+        # Głosy rozłożone równomiernie na 10 minut - okno przesuwa się w trakcie
+        step = 600 / len(votes)
+        start_time = 1_700_000_000
+        flagged = 0
+        start = time.perf_counter()
+        for index, (event_id, ip_address, fingerprint, user_agent) in enumerate(votes):
+            if detector.observe(event_id, ip_address, fingerprint, user_agent, now=start_time + index * step):
+                flagged += 1
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(f'Głosów: {len(votes)}, wydarzeń: {len(events)}, udział fali: {options["wave"]:.0%}')
+        self.stdout.write(f'{elapsed * 1e6 / len(votes):.2f} µs/głos, oznaczonych głosów: {flagged}')
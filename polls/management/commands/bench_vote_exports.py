@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from polls.exports import COLUMNAR_FORMATS, iter_votes_csv, pyarrow, write_votes_columnar
+from polls.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Porównuje przepustowość i rozmiar eksportu głosów: CSV vs Parquet vs Arrow IPC'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', help='ID wydarzenia (domyślnie wydarzenie z największą liczbą głosów)')
+
+    def handle(self, *args, **options):
+        if options['event']:
+            event = Event.objects.filter(pk=options['event']).first()
+        else:
+            event = Event.objects.annotate(total=Count('votes')).order_by('-total').first()
+        if event is None:
+            raise CommandError('Brak wydarzeń w bazie - benchmark potrzebuje danych.')
+
+        self.stdout.write(f'Wydarzenie: {event.title}')
+        self.stdout.write(f'{"Format":<10} {"Głosy":>10} {"Bajty":>12} {"Czas":>9} {"Głosy/s":>12}')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'votes.csv')
+            start = time.perf_counter()
+            rows = -1  # bez nagłówka
+            with open(path, 'w', encoding='utf-8', newline='') as output:
+                for line in iter_votes_csv(event):
+                    output.write(line)
+                    rows += 1
+            self.report('csv', rows, path, time.perf_counter() - start)
+
+            if pyarrow is None:
+                self.stdout.write(self.style.WARNING('Pakiet pyarrow nie jest zainstalowany - pominięto formaty kolumnowe.'))
+                return
+
+            for file_format, (extension, _) in COLUMNAR_FORMATS.items():
+                path = os.path.join(directory, f'votes.{extension}')
+                start = time.perf_counter()
+                rows = write_votes_columnar(event, path, file_format)
+                self.report(file_format, rows, path, time.perf_counter() - start)
+
+    def report(self, label, rows, path, elapsed):
+        self.stdout.write(
+            f'{label:<10} {rows:>10} {os.path.getsize(path):>12} {elapsed:>8.2f}s '
+            f'{rows / elapsed if elapsed else 0:>12,.0f}'
+        )
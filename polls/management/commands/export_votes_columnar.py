@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from polls.exports import COLUMNAR_FORMATS, EXPORT_CHUNK_SIZE, parse_export_bound, write_votes_columnar
+from polls.models import Event
+
+
+class Command(BaseCommand):
+    help = 'Zapisuje głosy wydarzenia do pliku kolumnowego (Parquet lub Arrow IPC) do analiz offline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_id', help='ID wydarzenia')
+        parser.add_argument('--format', choices=sorted(COLUMNAR_FORMATS), default='parquet', help='Format pliku')
+        parser.add_argument('--output', help='Ścieżka pliku wynikowego (domyślnie glosy_<id>.<format>)')
+        parser.add_argument('--date-from', help='Początek zakresu (RRRR-MM-DD)')
+        parser.add_argument('--date-to', help='Koniec zakresu, włącznie (RRRR-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=EXPORT_CHUNK_SIZE, help='Liczba głosów w jednej partii')
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options['event_id'])
+        except (Event.DoesNotExist, ValueError):
+            raise CommandError(f'Nie znaleziono wydarzenia {options["event_id"]}.')
+
+        try:
+            date_from = parse_export_bound(options['date_from'])
+            date_to = parse_export_bound(options['date_to'], end=True)
+        except ValueError as error:
+            raise CommandError(f'Niepoprawny format daty: {error}')
+
+        file_format = options['format']
+        extension, _ = COLUMNAR_FORMATS[file_format]
+        output = options['output'] or f'glosy_{event.id}.{extension}'
+
+        start = time.perf_counter()
+        try:
+            total = write_votes_columnar(event, output, file_format, date_from, date_to, options['batch_size'])
+        except RuntimeError as error:
+            raise CommandError(str(error))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Zapisano {total} głosów do {output} w {elapsed:.2f} s ({total / elapsed if elapsed else 0:,.0f} głosów/s).'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from polls.models import ReportJob
+from polls.reports import expire_stale_report_jobs, run_report_job
+
+
+class Command(BaseCommand):
+    help = 'Przelicza oczekujące zlecenia raportów (np. pozostałe po restarcie procesu)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Maksymalna liczba zleceń w jednym uruchomieniu')
+
+    def handle(self, *args, **options):
+        expired = expire_stale_report_jobs()
+        if expired:
+            self.stdout.write(f'Przeterminowane zlecenia oznaczone jako błędne: {expired}')
+
+        job_ids = list(
+            ReportJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)[:options['limit']]
+        )
+        for job_id in job_ids:
+            try:
+                run_report_job(job_id)
+            except Exception as error:
+                self.stderr.write(f'Zlecenie {job_id}: {error}')
+
+        self.stdout.write(self.style.SUCCESS(f'Przetworzono {len(job_ids)} zleceń raportów.'))
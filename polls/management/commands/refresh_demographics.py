@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from polls.models import Event
+from polls.useragent import get_parse_cache_stats
+from polls.utils import refresh_poll_demographics
+
+
+class Command(BaseCommand):
+    help = 'Przelicza rozkład urządzeń, systemów i przeglądarek głosujących (PollAnalytics.demographic_data)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', help='Tylko wskazane wydarzenie (domyślnie aktywne)')
+        parser.add_argument('--all', action='store_true', help='Wszystkie wydarzenia, również zakończone')
+
+    def handle(self, *args, **options):
+        events = Event.objects.all()
+        if options['event']:
+            events = events.filter(pk=options['event'])
+        elif not options['all']:
+            events = events.filter(status='active')
+
+        for event in events:
+            analytics = refresh_poll_demographics(event)
+            devices = analytics.demographic_data['devices']
+            self.stdout.write(f'{event.title}: {devices}')
+
+        stats = get_parse_cache_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Cache parsowania User Agentów: {stats["hits"]} trafień, {stats["misses"]} chybień '
+            f'(skuteczność {stats["hit_ratio"]:.1%}, {stats["size"]}/{stats["max_size"]} wpisów).'
+        ))
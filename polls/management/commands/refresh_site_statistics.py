@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from polls.utils import refresh_site_statistics
+
+
+class Command(BaseCommand):
+    help = 'Przelicza zmaterializowane statystyki serwisu (uruchamiane cyklicznie, np. z crona)'
+
+    def handle(self, *args, **options):
+        statistics = refresh_site_statistics()
+        self.stdout.write(self.style.SUCCESS(
+            f'Statystyki przeliczone ({statistics.total_votes} głosów, {statistics.total_events} wydarzeń) '
+            f'o {timezone.localtime(statistics.computed_at):%Y-%m-%d %H:%M:%S}.'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from polls.rollups import get_rollup_watermark, rollup_votes
+
+
+class Command(BaseCommand):
+    help = 'Przelicza dzienne agregaty głosów (kandydat × dzień, serwis × dzień) - uruchamiane co noc'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help='Pierwszy przeliczany dzień (RRRR-MM-DD)')
+        parser.add_argument('--to', dest='date_to', help='Ostatni przeliczany dzień (domyślnie wczoraj)')
+        parser.add_argument('--full', action='store_true', help='Odbuduj agregaty od pierwszego głosu')
+
+    def handle(self, *args, **options):
+        start = self.parse_day(options['date_from'])
+        end = self.parse_day(options['date_to'])
+
+        days = rollup_votes(start, end, full=options['full'])
+        watermark = get_rollup_watermark()
+        self.stdout.write(self.style.SUCCESS(
+            f'Przeliczono {days} dni; agregaty obejmują głosy do {watermark or "-"} włącznie.'
+        ))
+
+    def parse_day(self, value):
+        """Dzień z --from/--to albo None; parse_date zwraca None dla złego formatu"""
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError as error:
+            raise CommandError(f'Niepoprawna data {value}: {error}')
+        if day is None:
+            raise CommandError(f'Niepoprawna data {value} (oczekiwano RRRR-MM-DD).')
+        return day
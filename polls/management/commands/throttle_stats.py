@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+import api.views  # noqa: F401 - rejestrują endpointy z limitami
+import polls.views  # noqa: F401
+from polls.throttling import get_throttle_stats, reset_throttle_stats
+
+
+class Command(BaseCommand):
+    help = 'Pokazuje liczbę żądań odrzuconych przez limity zapisów (per endpoint)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Wyzeruj liczniki po wyświetleniu')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"Endpoint":<20} {"Odrzucone":>10}')
+        for endpoint, rejected in get_throttle_stats().items():
+            self.stdout.write(f'{endpoint:<20} {rejected:>10}')
+
+        if options['reset']:
+            reset_throttle_stats()
+            self.stdout.write(self.style.SUCCESS('Liczniki wyzerowane.'))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_add_author_to_comment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['candidate', 'is_approved', '-created_at'], name='comment_cand_approved_idx'),
+        ),
+    ]
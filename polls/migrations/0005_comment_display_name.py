@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0004_comment_candidate_approved_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='display_name',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Nazwa wyświetlana autora'),
+        ),
+    ]
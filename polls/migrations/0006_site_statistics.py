@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0005_comment_display_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_events', models.IntegerField(default=0, verbose_name='Liczba wydarzeń')),
+                ('active_events', models.IntegerField(default=0, verbose_name='Aktywne wydarzenia')),
+                ('total_votes', models.IntegerField(default=0, verbose_name='Łączna liczba głosów')),
+                ('total_candidates', models.IntegerField(default=0, verbose_name='Liczba kandydatów')),
+                ('popular_events', models.JSONField(default=list, verbose_name='Najpopularniejsze wydarzenia')),
+                ('geographic_stats', models.JSONField(default=dict, verbose_name='Dane geograficzne')),
+                ('computed_at', models.DateTimeField(verbose_name='Obliczono')),
+            ],
+            options={
+                'verbose_name': 'Statystyki serwisu',
+                'verbose_name_plural': 'Statystyki serwisu',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0006_site_statistics'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['event', 'created_at'], name='vote_event_created_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 00:59
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0007_vote_event_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('pending', 'Oczekuje'), ('running', 'W trakcie'), ('done', 'Gotowy'), ('failed', 'Błąd')], default='pending', max_length=20, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Postęp (%)')),
+                ('data_version', models.CharField(max_length=32, verbose_name='Wersja danych')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='Raport')),
+                ('content_hash', models.CharField(blank=True, max_length=64, verbose_name='Skrót treści')),
+                ('error', models.TextField(blank=True, verbose_name='Błąd')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_jobs', to='polls.event', verbose_name='Wydarzenie')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Zlecający')),
+            ],
+            options={
+                'verbose_name': 'Raport',
+                'verbose_name_plural': 'Raporty',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['event', 'data_version', 'status'], name='reportjob_event_version_idx')],
+            },
+        ),
+    ]
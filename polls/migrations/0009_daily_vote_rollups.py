@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0008_report_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySiteVotes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True, verbose_name='Dzień')),
+                ('vote_count', models.PositiveIntegerField(default=0, verbose_name='Liczba głosów')),
+                ('unique_voters', models.PositiveIntegerField(default=0, verbose_name='Unikalne adresy IP')),
+                ('voting_events', models.PositiveIntegerField(default=0, verbose_name='Wydarzenia z głosami')),
+                ('computed_at', models.DateTimeField(verbose_name='Obliczono')),
+            ],
+            options={
+                'verbose_name': 'Dzienne głosy serwisu',
+                'verbose_name_plural': 'Dzienne głosy serwisu',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCandidateVotes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Dzień')),
+                ('vote_count', models.PositiveIntegerField(default=0, verbose_name='Liczba głosów')),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_votes', to='polls.candidate', verbose_name='Kandydat')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_votes', to='polls.event', verbose_name='Wydarzenie')),
+            ],
+            options={
+                'verbose_name': 'Dzienne głosy kandydata',
+                'verbose_name_plural': 'Dzienne głosy kandydatów',
+                'indexes': [models.Index(fields=['event', 'day'], name='daily_cand_votes_event_idx'), models.Index(fields=['day'], name='daily_cand_votes_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('candidate', 'day'), name='daily_candidate_votes_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0009_daily_vote_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='series_key',
+            field=models.SlugField(blank=True, help_text='Łączy tego samego kandydata w kolejnych wydarzeniach (porównania); puste - dopasowanie po nazwie', max_length=100, verbose_name='Klucz serii'),
+        ),
+    ]
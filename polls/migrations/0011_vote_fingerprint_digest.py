@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:06
+
+import base64
+import binascii
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+# Kopia polls.fingerprints z chwili tworzenia migracji - migracja nie może
+# zależeć od bieżącego kodu
+def canonical_fingerprint(raw):
+    raw = (raw or '').strip()
+    try:
+        decoded = json.loads(base64.b64decode(raw + '=' * (-len(raw) % 4), validate=True))
+    except (binascii.Error, ValueError):
+        decoded = None
+    if isinstance(decoded, dict):
+        return json.dumps(decoded, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return raw
+
+
+def digest_existing_fingerprints(apps, schema_editor):
+    """Uzupełnia skróty fingerprintów istniejących głosów; surowe wartości zostają w browser_fingerprint"""
+    Vote = apps.get_model('polls', 'Vote')
+    votes = Vote.objects.exclude(browser_fingerprint='').only('id', 'browser_fingerprint')
+    batch = []
+    for vote in votes.iterator(chunk_size=2000):
+        canonical = canonical_fingerprint(vote.browser_fingerprint)
+        if not canonical:
+            continue
+        vote.fingerprint_digest = hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+        batch.append(vote)
+        if len(batch) >= 2000:
+            Vote.objects.bulk_update(batch, ['fingerprint_digest'])
+            batch = []
+    Vote.objects.bulk_update(batch, ['fingerprint_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0010_candidate_series_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='fingerprint_digest',
+            field=models.BinaryField(blank=True, max_length=16, null=True, verbose_name='Skrót fingerprintu'),
+        ),
+        migrations.RunPython(digest_existing_fingerprints, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['event', 'fingerprint_digest'], name='vote_event_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0011_vote_fingerprint_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='is_flagged',
+            field=models.BooleanField(default=False, verbose_name='Podejrzany (anomalia)'),
+        ),
+        migrations.CreateModel(
+            name='VoteAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('subnet', 'Podsieć'), ('fingerprint', 'Fingerprint przeglądarki'), ('user_agent', 'User Agent')], max_length=20, verbose_name='Rodzaj')),
+                ('value', models.CharField(max_length=255, verbose_name='Wartość')),
+                ('peak_count', models.PositiveIntegerField(default=0, verbose_name='Najwięcej głosów w oknie')),
+                ('detections', models.PositiveIntegerField(default=0, verbose_name='Liczba wykryć')),
+                ('first_detected_at', models.DateTimeField(auto_now_add=True, verbose_name='Pierwsze wykrycie')),
+                ('last_detected_at', models.DateTimeField(verbose_name='Ostatnie wykrycie')),
+                ('is_reviewed', models.BooleanField(default=False, verbose_name='Sprawdzone')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='polls.event', verbose_name='Wydarzenie')),
+            ],
+            options={
+                'verbose_name': 'Anomalia głosowania',
+                'verbose_name_plural': 'Anomalie głosowania',
+                'ordering': ['-last_detected_at'],
+                'constraints': [models.UniqueConstraint(fields=('event', 'kind', 'value'), name='vote_anomaly_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-19 01:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fail_duplicate_jobs(apps, schema_editor):
+    """Zostawia najnowsze aktywne lub gotowe zlecenie każdej wersji danych, starsze oznacza jako błędne"""
+    ReportJob = apps.get_model('polls', 'ReportJob')
+    seen = set()
+    jobs = ReportJob.objects.filter(status__in=['pending', 'running', 'done']).order_by('-created_at')
+    for job_id, event_id, data_version in jobs.values_list('id', 'event_id', 'data_version'):
+        if (event_id, data_version) in seen:
+            ReportJob.objects.filter(pk=job_id).update(status='failed', error='Zduplikowane zlecenie.')
+        seen.add((event_id, data_version))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0012_vote_anomalies'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running', 'done'])), fields=('event', 'data_version'), name='reportjob_active_version_unique'),
+        ),
+    ]
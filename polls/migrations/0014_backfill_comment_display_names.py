@@ -0,0 +1,49 @@
+# Generated by Django 5.2.5 on 2026-10-19 02:10
+
+import hashlib
+
+from django.db import migrations
+
+# Kopia polls.models.anonymous_display_name z chwili tworzenia migracji -
+# migracja nie może zależeć od bieżącego kodu modeli
+ANONYMOUS_ADJECTIVES = ['Mądry', 'Szybki', 'Cichy', 'Wesoły', 'Spokojny', 'Aktywny', 'Kreatywny', 'Dzielny', 'Uczciwy', 'Przyjazny']
+ANONYMOUS_NOUNS = ['Obywatel', 'Głosujący', 'Komentator', 'Użytkownik', 'Mieszkaniec', 'Polak', 'Wyborca', 'Krytyk', 'Fan', 'Sympatyk']
+
+
+def anonymous_display_name(ip_address, author_email):
+    short_hash = hashlib.md5(f"{ip_address}_{author_email or 'anonymous'}".encode()).hexdigest()[:6]
+    adjective = ANONYMOUS_ADJECTIVES[int(short_hash[:2], 16) % len(ANONYMOUS_ADJECTIVES)]
+    noun = ANONYMOUS_NOUNS[int(short_hash[2:4], 16) % len(ANONYMOUS_NOUNS)]
+    number = int(short_hash[4:6], 16) % 999 + 1
+    return f"{adjective}{noun}{number}"
+
+
+def backfill_display_names(apps, schema_editor):
+    """Uzupełnia display_name komentarzy zapisanych przed dodaniem kolumny"""
+    Comment = apps.get_model('polls', 'Comment')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    comments = Comment.objects.filter(display_name='').order_by('pk')
+    author_ids = comments.exclude(author_id=None).values_list('author_id', flat=True).distinct()
+    nicknames = dict(UserProfile.objects.filter(user_id__in=author_ids).values_list('user_id', 'nickname'))
+
+    batch = []
+    for comment in comments.only('pk', 'author_id', 'author_email', 'ip_address').iterator(chunk_size=1000):
+        comment.display_name = nicknames.get(comment.author_id) or anonymous_display_name(comment.ip_address, comment.author_email)
+        batch.append(comment)
+        if len(batch) >= 1000:
+            Comment.objects.bulk_update(batch, ['display_name'])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ['display_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('polls', '0013_report_job_active_version_unique'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_display_names, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,36 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+import hashlib
 import uuid
 
 
+# Słowa do generowania anonimowych nazw autorów komentarzy
+ANONYMOUS_ADJECTIVES = ['Mądry', 'Szybki', 'Cichy', 'Wesoły', 'Spokojny', 'Aktywny', 'Kreatywny', 'Dzielny', 'Uczciwy', 'Przyjazny']
+ANONYMOUS_NOUNS = ['Obywatel', 'Głosujący', 'Komentator', 'Użytkownik', 'Mieszkaniec', 'Polak', 'Wyborca', 'Krytyk', 'Fan', 'Sympatyk']
+
+
+class EventQuerySet(models.QuerySet):
+    """QuerySet wydarzeń z pomocniczymi adnotacjami"""
+    
+    def with_counts(self):
+        """Dodaje candidate_count i vote_count jako podzapytania (bez mnożenia złączeń)"""
+        candidates = Candidate.objects.filter(event=models.OuterRef('pk')).order_by().values('event').annotate(
+            count=models.Count('pk')
+        ).values('count')
+        votes = Vote.objects.filter(event=models.OuterRef('pk')).order_by().values('event').annotate(
+            count=models.Count('pk')
+        ).values('count')
+        return self.annotate(
+            candidate_count=Coalesce(models.Subquery(candidates), 0),
+            vote_count=Coalesce(models.Subquery(votes), 0),
+        )
+
+
 class Event(models.Model):
     """Model reprezentujący wydarzenie wyborcze"""
     EVENT_TYPES = [
@@ -32,6 +58,8 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = EventQuerySet.as_manager()
+    
     class Meta:
         ordering = ['event_date']
         verbose_name = "Wydarzenie"
@@ -75,6 +103,39 @@ class Event(models.Model):
         super().save(*args, **kwargs)
 
 
+class CandidateQuerySet(models.QuerySet):
+    """QuerySet kandydatów z pomocniczymi adnotacjami"""
+    
+    def with_results(self, window=True, until=None):
+        """
+        Dodaje annotated_vote_count i annotated_event_votes w jednym zapytaniu.
+        
+        Suma głosów wydarzenia liczona jest funkcją okna po partycji event_id,
+        więc obejmuje tylko kandydatów obecnych w zapytaniu - dlatego filtrować
+        wolno jedynie po całych wydarzeniach. Dla pojedynczych kandydatów
+        (window=False) suma liczona jest podzapytaniem. Z until liczone są
+        tylko głosy oddane przed tą chwilą.
+        """
+        counted_votes = Vote.objects.all() if until is None else Vote.objects.filter(created_at__lt=until)
+        votes = counted_votes.filter(candidate=models.OuterRef('pk')).order_by().values('candidate').annotate(
+            count=models.Count('pk')
+        ).values('count')
+        queryset = self.annotate(annotated_vote_count=Coalesce(models.Subquery(votes), 0))
+        
+        if window:
+            event_votes = models.Window(
+                expression=models.Sum('annotated_vote_count'),
+                partition_by=[models.F('event_id')],
+            )
+        else:
+            event_votes = Coalesce(models.Subquery(
+                counted_votes.filter(event=models.OuterRef('event_id')).order_by().values('event').annotate(
+                    count=models.Count('pk')
+                ).values('count')
+            ), 0)
+        return queryset.annotate(annotated_event_votes=event_votes)
+
+
 class Candidate(models.Model):
     """Model reprezentujący kandydata lub partię"""
     CANDIDATE_TYPES = [
@@ -85,6 +146,10 @@ class Candidate(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='candidates', verbose_name="Wydarzenie")
     name = models.CharField(max_length=200, verbose_name="Nazwa")
+    series_key = models.SlugField(
+        max_length=100, blank=True, db_index=True, verbose_name="Klucz serii",
+        help_text="Łączy tego samego kandydata w kolejnych wydarzeniach (porównania); puste - dopasowanie po nazwie"
+    )
     description = models.TextField(verbose_name="Opis")
     candidate_type = models.CharField(max_length=20, choices=CANDIDATE_TYPES, verbose_name="Typ kandydata")
     main_photo = models.ImageField(upload_to='candidates/', verbose_name="Główne zdjęcie")
@@ -96,6 +161,8 @@ class Candidate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = CandidateQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Kandydat"
         verbose_name_plural = "Kandydaci"
@@ -106,13 +173,19 @@ class Candidate(models.Model):
     @property
     def vote_count(self):
         """Liczba głosów dla kandydata"""
+        # Wartość z Candidate.objects.with_results(), jeśli queryset ją dodał
+        if hasattr(self, 'annotated_vote_count'):
+            return self.annotated_vote_count
         return self.votes.count()
     
     @property
     def vote_percentage(self):
         """Procent głosów dla kandydata"""
-        total_votes = self.event.votes.count()
-        if total_votes == 0:
+        if hasattr(self, 'annotated_event_votes'):
+            total_votes = self.annotated_event_votes
+        else:
+            total_votes = self.event.votes.count()
+        if not total_votes:
             return 0
         return round((self.vote_count / total_votes) * 100, 2)
 
@@ -124,12 +197,20 @@ class Vote(models.Model):
     candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='votes', verbose_name="Kandydat")
     ip_address = models.GenericIPAddressField(verbose_name="Adres IP")
     browser_fingerprint = models.CharField(max_length=255, blank=True, verbose_name="Fingerprint przeglądarki")
+    fingerprint_digest = models.BinaryField(
+        max_length=16, null=True, blank=True, editable=False, verbose_name="Skrót fingerprintu"
+    )
     user_agent = models.TextField(blank=True, verbose_name="User Agent")
     location_data = models.JSONField(default=dict, blank=True, verbose_name="Dane lokalizacji")
+    is_flagged = models.BooleanField(default=False, verbose_name="Podejrzany (anomalia)")
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ['event', 'ip_address']
+        indexes = [
+            models.Index(fields=['event', 'created_at'], name='vote_event_created_idx'),
+            models.Index(fields=['event', 'fingerprint_digest'], name='vote_event_fingerprint_idx'),
+        ]
         verbose_name = "Głos"
         verbose_name_plural = "Głosy"
     
@@ -146,19 +227,33 @@ class Comment(models.Model):
     content = models.TextField(verbose_name="Treść komentarza")
     is_approved = models.BooleanField(default=False, verbose_name="Zatwierdzony")
     ip_address = models.GenericIPAddressField(verbose_name="Adres IP")
+    display_name = models.CharField(max_length=100, blank=True, verbose_name="Nazwa wyświetlana autora")
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['candidate', 'is_approved', '-created_at'], name='comment_cand_approved_idx'),
+        ]
         verbose_name = "Komentarz"
         verbose_name_plural = "Komentarze"
     
     def __str__(self):
         return f"Komentarz od {self.author_name} na {self.candidate.name}"
     
+    def save(self, *args, **kwargs):
+        """Przed zapisem utrwala nazwę wyświetlaną autora"""
+        if not self.display_name:
+            self.display_name = self.build_display_name()
+        super().save(*args, **kwargs)
+    
     @property
     def author_name(self):
-        """Zwraca nazwę autora - nickname użytkownika lub anonimową nazwę"""
+        """Zwraca zapisaną nazwę autora (bez hashowania i zapytań o profil)"""
+        return self.display_name
+    
+    def build_display_name(self):
+        """Wylicza nazwę autora - nickname użytkownika lub anonimową nazwę"""
         if self.author and hasattr(self.author, 'profile'):
             return self.author.profile.nickname
         else:
@@ -167,32 +262,51 @@ class Comment(models.Model):
     @property
     def anonymous_author_name(self):
         """Generuje anonimową nazwę autora na podstawie IP i email (dla niezalogowanych)"""
-        import hashlib
-        
-        # Utwórz unikalny identyfikator na podstawie IP i email (lub tylko IP jeśli email jest None)
-        email_part = self.author_email or "anonymous"
-        unique_string = f"{self.ip_address}_{email_part}"
-        hash_object = hashlib.md5(unique_string.encode())
-        hash_hex = hash_object.hexdigest()
-        
-        # Weź pierwsze 6 znaków hasha
-        short_hash = hash_hex[:6]
-        
-        # Lista przymiotników i rzeczowników dla generowania nazw
-        adjectives = ['Mądry', 'Szybki', 'Cichy', 'Wesoły', 'Spokojny', 'Aktywny', 'Kreatywny', 'Dzielny', 'Uczciwy', 'Przyjazny']
-        nouns = ['Obywatel', 'Głosujący', 'Komentator', 'Użytkownik', 'Mieszkaniec', 'Polak', 'Wyborca', 'Krytyk', 'Fan', 'Sympatyk']
-        
-        # Użyj hasha do wyboru przymiotnika i rzeczownika
-        adj_index = int(short_hash[:2], 16) % len(adjectives)
-        noun_index = int(short_hash[2:4], 16) % len(nouns)
-        
-        adjective = adjectives[adj_index]
-        noun = nouns[noun_index]
-        
-        # Dodaj numer na końcu dla unikalności
-        number = int(short_hash[4:6], 16) % 999 + 1
-        
-        return f"{adjective}{noun}{number}"
+        return anonymous_display_name(self.ip_address, self.author_email)
+
+
+def anonymous_display_name(ip_address, author_email):
+    """Anonimowa nazwa autora wyliczona z IP i email (używana też w migracji uzupełniającej)"""
+    # Utwórz unikalny identyfikator na podstawie IP i email (lub tylko IP jeśli email jest None)
+    email_part = author_email or "anonymous"
+    unique_string = f"{ip_address}_{email_part}"
+    hash_object = hashlib.md5(unique_string.encode())
+    hash_hex = hash_object.hexdigest()
+    
+    # Weź pierwsze 6 znaków hasha
+    short_hash = hash_hex[:6]
+    
+    # Użyj hasha do wyboru przymiotnika i rzeczownika
+    adj_index = int(short_hash[:2], 16) % len(ANONYMOUS_ADJECTIVES)
+    noun_index = int(short_hash[2:4], 16) % len(ANONYMOUS_NOUNS)
+    
+    adjective = ANONYMOUS_ADJECTIVES[adj_index]
+    noun = ANONYMOUS_NOUNS[noun_index]
+    
+    # Dodaj numer na końcu dla unikalności
+    number = int(short_hash[4:6], 16) % 999 + 1
+    
+    return f"{adjective}{noun}{number}"
+
+
+@receiver(post_init, sender='accounts.UserProfile')
+def remember_profile_nickname(sender, instance, **kwargs):
+    """Zapamiętuje nick wczytanego profilu, żeby wykryć jego zmianę przy zapisie"""
+    instance._saved_nickname = instance.nickname
+
+
+@receiver(post_save, sender='accounts.UserProfile')
+def sync_comment_display_names(sender, instance, created, update_fields=None, **kwargs):
+    """Aktualizuje zapisane nazwy autora w komentarzach po zmianie nicku"""
+    # Profil jest zapisywany przy każdym zapisie użytkownika (np. logowaniu) - bez zmiany nicku nic nie robimy
+    if created or instance.nickname == instance._saved_nickname:
+        return
+    if update_fields is not None and 'nickname' not in update_fields:
+        return
+    Comment.objects.filter(author_id=instance.user_id).exclude(
+        display_name=instance.nickname
+    ).update(display_name=instance.nickname)
+    instance._saved_nickname = instance.nickname
 
 
 class UserBadge(models.Model):
@@ -236,3 +350,131 @@ class PollAnalytics(models.Model):
     
     def __str__(self):
         return f"Analityka dla {self.event.title}"
+
+
+class SiteStatistics(models.Model):
+    """Zmaterializowane statystyki całej aplikacji (jeden wiersz, odświeżany cyklicznie)"""
+    total_events = models.IntegerField(default=0, verbose_name="Liczba wydarzeń")
+    active_events = models.IntegerField(default=0, verbose_name="Aktywne wydarzenia")
+    total_votes = models.IntegerField(default=0, verbose_name="Łączna liczba głosów")
+    total_candidates = models.IntegerField(default=0, verbose_name="Liczba kandydatów")
+    popular_events = models.JSONField(default=list, verbose_name="Najpopularniejsze wydarzenia")
+    geographic_stats = models.JSONField(default=dict, verbose_name="Dane geograficzne")
+    computed_at = models.DateTimeField(verbose_name="Obliczono")
+    
+    class Meta:
+        verbose_name = "Statystyki serwisu"
+        verbose_name_plural = "Statystyki serwisu"
+    
+    def __str__(self):
+        return f"Statystyki serwisu z {self.computed_at:%Y-%m-%d %H:%M}"
+
+
+class ReportJob(models.Model):
+    """Zlecenie wygenerowania raportu z głosowania (liczone w tle)"""
+    STATUS_CHOICES = [
+        ('pending', 'Oczekuje'),
+        ('running', 'W trakcie'),
+        ('done', 'Gotowy'),
+        ('failed', 'Błąd'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='report_jobs', verbose_name="Wydarzenie")
+    requested_by = models.ForeignKey('auth.User', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Zlecający")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="Postęp (%)")
+    data_version = models.CharField(max_length=32, verbose_name="Wersja danych")
+    result = models.JSONField(null=True, blank=True, verbose_name="Raport")
+    content_hash = models.CharField(max_length=64, blank=True, verbose_name="Skrót treści")
+    error = models.TextField(blank=True, verbose_name="Błąd")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # Jedno aktywne lub gotowe zlecenie na wersję danych (równoległe POST-y)
+            models.UniqueConstraint(
+                fields=['event', 'data_version'],
+                condition=models.Q(status__in=['pending', 'running', 'done']),
+                name='reportjob_active_version_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['event', 'data_version', 'status'], name='reportjob_event_version_idx'),
+        ]
+        verbose_name = "Raport"
+        verbose_name_plural = "Raporty"
+    
+    def __str__(self):
+        return f"Raport {self.event.title} ({self.get_status_display()})"
+
+
+class DailyCandidateVotes(models.Model):
+    """Dzienna liczba głosów kandydata (agregat przeliczany przez polls.rollups)"""
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='daily_votes', verbose_name="Wydarzenie")
+    candidate = models.ForeignKey(Candidate, on_delete=models.CASCADE, related_name='daily_votes', verbose_name="Kandydat")
+    day = models.DateField(verbose_name="Dzień")
+    vote_count = models.PositiveIntegerField(default=0, verbose_name="Liczba głosów")
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['candidate', 'day'], name='daily_candidate_votes_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['event', 'day'], name='daily_cand_votes_event_idx'),
+            models.Index(fields=['day'], name='daily_cand_votes_day_idx'),
+        ]
+        verbose_name = "Dzienne głosy kandydata"
+        verbose_name_plural = "Dzienne głosy kandydatów"
+    
+    def __str__(self):
+        return f"{self.candidate.name} {self.day}: {self.vote_count}"
+
+
+class DailySiteVotes(models.Model):
+    """Dzienne podsumowanie głosów w całym serwisie (agregat przeliczany przez polls.rollups)"""
+    day = models.DateField(unique=True, verbose_name="Dzień")
+    vote_count = models.PositiveIntegerField(default=0, verbose_name="Liczba głosów")
+    unique_voters = models.PositiveIntegerField(default=0, verbose_name="Unikalne adresy IP")
+    voting_events = models.PositiveIntegerField(default=0, verbose_name="Wydarzenia z głosami")
+    computed_at = models.DateTimeField(verbose_name="Obliczono")
+    
+    class Meta:
+        ordering = ['-day']
+        verbose_name = "Dzienne głosy serwisu"
+        verbose_name_plural = "Dzienne głosy serwisu"
+    
+    def __str__(self):
+        return f"{self.day}: {self.vote_count}"
+
+
+class VoteAnomaly(models.Model):
+    """Wykryty wzrost liczby głosów z jednej podsieci, przeglądarki lub User Agenta (polls.anomalies)"""
+    KIND_CHOICES = [
+        ('subnet', 'Podsieć'),
+        ('fingerprint', 'Fingerprint przeglądarki'),
+        ('user_agent', 'User Agent'),
+    ]
+    
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='anomalies', verbose_name="Wydarzenie")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Rodzaj")
+    value = models.CharField(max_length=255, verbose_name="Wartość")
+    peak_count = models.PositiveIntegerField(default=0, verbose_name="Najwięcej głosów w oknie")
+    detections = models.PositiveIntegerField(default=0, verbose_name="Liczba wykryć")
+    first_detected_at = models.DateTimeField(auto_now_add=True, verbose_name="Pierwsze wykrycie")
+    last_detected_at = models.DateTimeField(verbose_name="Ostatnie wykrycie")
+    is_reviewed = models.BooleanField(default=False, verbose_name="Sprawdzone")
+    
+    class Meta:
+        ordering = ['-last_detected_at']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'kind', 'value'], name='vote_anomaly_unique'),
+        ]
+        verbose_name = "Anomalia głosowania"
+        verbose_name_plural = "Anomalie głosowania"
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.value} ({self.event.title})"
@@ -0,0 +1,114 @@
+"""
+Raporty z głosowania liczone w tle.
+
+enqueue_report() tworzy zlecenie ReportJob dla bieżącej wersji danych
+wydarzenia (identyfikator z api.cache, zmienia się przy każdej zmianie
+wydarzenia, kandydatów lub głosów) i przekazuje je do puli wątków. Dopóki
+wersja się nie zmieni, kolejne prośby dostają istniejące zlecenie - gotowy
+raport albo to, które właśnie się liczy. Wynik jest zapisywany razem ze
+skrótem SHA-256 treści.
+
+Zlecenia, które nie trafiły do puli (np. restart procesu), przelicza
+komenda process_report_jobs. Zlecenie liczone dłużej niż REPORT_JOB_TIMEOUT
+sekund (np. po awarii wątku) jest uznawane za błędne, więc kolejna prośba
+zleca raport od nowa. Dla jednej wersji danych może istnieć tylko jedno
+aktywne lub gotowe zlecenie (warunkowe ograniczenie unikalności).
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ReportJob
+from .tasks import run_in_background
+from .utils import generate_vote_report
+
+# Co ile punktów procentowych zapisywać postęp
+PROGRESS_STEP = 5
+
+# Próby utworzenia zlecenia przy wyścigu z równoległymi prośbami
+ENQUEUE_ATTEMPTS = 3
+
+
+def report_content_hash(result: dict) -> str:
+    payload = json.dumps(result, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def expire_stale_report_jobs(jobs=None) -> int:
+    """Oznacza jako błędne zlecenia liczone dłużej niż REPORT_JOB_TIMEOUT; zwraca ich liczbę"""
+    jobs = ReportJob.objects.all() if jobs is None else jobs
+    started_before = timezone.now() - timedelta(seconds=getattr(settings, 'REPORT_JOB_TIMEOUT', 600))
+    return jobs.filter(status='running', started_at__lt=started_before).update(
+        status='failed', error='Przekroczono czas liczenia raportu.', finished_at=timezone.now()
+    )
+
+
+def get_current_report_job(event, data_version: str):
+    """Najnowsze aktywne lub gotowe zlecenie dla wersji danych (bez błędnych i przeterminowanych)"""
+    expire_stale_report_jobs(ReportJob.objects.filter(event=event, data_version=data_version))
+    return ReportJob.objects.filter(
+        event=event, data_version=data_version, status__in=['pending', 'running', 'done']
+    ).order_by('-created_at').first()
+
+
+def enqueue_report(event, data_version: str, user=None):
+    """Zwraca (zlecenie, utworzone) - istniejące dla tej wersji danych albo nowe"""
+    for _ in range(ENQUEUE_ATTEMPTS):
+        job = get_current_report_job(event, data_version)
+        if job is not None:
+            return job, False
+        try:
+            with transaction.atomic():
+                job = ReportJob.objects.create(
+                    event=event,
+                    data_version=data_version,
+                    requested_by=user if user is not None and user.is_authenticated else None,
+                )
+                run_in_background(run_report_job, job.pk)
+        except IntegrityError:
+            # Równoległa prośba utworzyła zlecenie tej wersji danych; mogło już
+            # zostać przeterminowane, więc szukamy go (albo tworzymy) od nowa
+            continue
+        return job, True
+    # Zlecenia tej wersji ciągle się zmieniają - zwracamy ostatnie, nawet błędne
+    return ReportJob.objects.filter(event=event, data_version=data_version).order_by('-created_at').first(), False
+
+
+def run_report_job(job_id):
+    """Liczy raport zlecenia; pomija zlecenia już przejęte przez inny proces"""
+    claimed = ReportJob.objects.filter(pk=job_id, status='pending').update(
+        status='running', started_at=timezone.now(), progress=0
+    )
+    if not claimed:
+        return
+
+    job = ReportJob.objects.select_related('event').get(pk=job_id)
+    total_votes = job.event.votes.count()
+    last_reported = 0
+
+    def progress(processed):
+        nonlocal last_reported
+        percent = min(99, processed * 100 // max(total_votes, 1))
+        if percent - last_reported >= PROGRESS_STEP:
+            ReportJob.objects.filter(pk=job_id).update(progress=percent)
+            last_reported = percent
+
+    try:
+        result = generate_vote_report(job.event, progress=progress)
+    except Exception as error:
+        ReportJob.objects.filter(pk=job_id, status='running').update(status='failed', error=str(error), finished_at=timezone.now())
+        raise
+
+    # Zlecenie uznane w międzyczasie za przeterminowane nie wraca do 'done'
+    ReportJob.objects.filter(pk=job_id, status='running').update(
+        status='done',
+        progress=100,
+        result=result,
+        content_hash=report_content_hash(result),
+        finished_at=timezone.now(),
+    )
@@ -0,0 +1,195 @@
+"""
+Dzienne agregaty głosów (kandydat × dzień oraz serwis × dzień).
+
+Komenda rollup_votes (np. co noc z crona) przelicza zamknięte dni - do
+wczoraj włącznie, w strefie czasowej serwisu - i zapisuje je w
+DailyCandidateVotes / DailySiteVotes. Ostatni przeliczony dzień to znacznik
+(watermark); zapytania poniżej sumują agregaty i dokładają tylko głosy
+oddane po znaczniku, więc panel i analityka nie skanują historii głosów.
+
+Usunięcie głosu z dnia objętego agregatami (także zmiana głosu, która
+usuwa stary głos) od razu zmniejsza jego liczniki - odbiornik post_delete.
+Liczby unikalnych adresów i wydarzeń w DailySiteVotes nie dają się tak
+poprawić; każde uruchomienie przelicza ponownie ROLLUP_REFRESH_DAYS
+ostatnich dni, a starszą historię odbudowuje `rollup_votes --full`.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .models import DailyCandidateVotes, DailySiteVotes, Vote
+
+
+def day_start(day):
+    """Początek dnia w strefie czasowej serwisu"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_rollup_watermark():
+    """Ostatni dzień objęty agregatami (None, jeśli agregatów jeszcze nie ma)"""
+    return DailySiteVotes.objects.aggregate(last=Max('day'))['last']
+
+
+def live_votes(votes, watermark):
+    """Zawęża głosy do tych, których nie obejmują agregaty"""
+    if watermark is None:
+        return votes
+    return votes.filter(created_at__gte=day_start(watermark + timedelta(days=1)))
+
+
+def rollup_votes(start=None, end=None, full=False) -> int:
+    """Przelicza agregaty dni [start, end]; zwraca liczbę przeliczonych dni"""
+    end = min(end or timezone.localdate() - timedelta(days=1), timezone.localdate() - timedelta(days=1))
+    if full or start is None:
+        watermark = None if full else get_rollup_watermark()
+        if watermark is not None:
+            start = watermark - timedelta(days=getattr(settings, 'ROLLUP_REFRESH_DAYS', 3) - 1)
+        else:
+            first_vote = Vote.objects.aggregate(first=Min('created_at'))['first']
+            start = timezone.localdate(first_vote) if first_vote else end
+    if start > end:
+        return 0
+
+    votes = Vote.objects.filter(created_at__gte=day_start(start), created_at__lt=day_start(end + timedelta(days=1)))
+    by_day = votes.annotate(day=TruncDate('created_at')).order_by()
+    candidate_rows = by_day.values('event_id', 'candidate_id', 'day').annotate(vote_count=Count('pk'))
+    site_rows = {
+        row['day']: row for row in by_day.values('day').annotate(
+            vote_count=Count('pk'),
+            unique_voters=Count('ip_address', distinct=True),
+            voting_events=Count('event', distinct=True),
+        )
+    }
+
+    computed_at = timezone.now()
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    with transaction.atomic():
+        if full:
+            DailyCandidateVotes.objects.all().delete()
+            DailySiteVotes.objects.all().delete()
+        else:
+            DailyCandidateVotes.objects.filter(day__range=(start, end)).delete()
+            DailySiteVotes.objects.filter(day__range=(start, end)).delete()
+
+        DailyCandidateVotes.objects.bulk_create(
+            (DailyCandidateVotes(**row) for row in candidate_rows.iterator()),
+            batch_size=1000,
+        )
+        # Wiersz serwisu powstaje dla każdego dnia (również bez głosów) - ciągłość znacznika
+        DailySiteVotes.objects.bulk_create([
+            DailySiteVotes(
+                day=day,
+                vote_count=site_rows.get(day, {}).get('vote_count', 0),
+                unique_voters=site_rows.get(day, {}).get('unique_voters', 0),
+                voting_events=site_rows.get(day, {}).get('voting_events', 0),
+                computed_at=computed_at,
+            ) for day in days
+        ], batch_size=1000)
+    return len(days)
+
+
+def forget_deleted_vote(sender, instance, **kwargs):
+    """Odbiornik post_delete - odejmuje głos z agregatów, jeśli jego dzień jest już przeliczony"""
+    day = timezone.localdate(instance.created_at)
+    watermark = get_rollup_watermark()
+    if watermark is None or day > watermark:
+        return
+    DailyCandidateVotes.objects.filter(candidate_id=instance.candidate_id, day=day, vote_count__gt=0).update(
+        vote_count=F('vote_count') - 1
+    )
+    DailySiteVotes.objects.filter(day=day, vote_count__gt=0).update(vote_count=F('vote_count') - 1)
+
+
+def connect_rollup_signals():
+    post_delete.connect(forget_deleted_vote, sender=Vote, dispatch_uid='polls_forget_deleted_vote')
+
+
+def site_total_votes() -> int:
+    """Łączna liczba głosów w serwisie"""
+    watermark = get_rollup_watermark()
+    rolled_up = DailySiteVotes.objects.aggregate(total=Sum('vote_count'))['total'] or 0
+    return rolled_up + live_votes(Vote.objects.all(), watermark).count()
+
+
+def event_vote_totals(event_ids=None) -> dict:
+    """Liczba głosów wydarzeń: {event_id: liczba}"""
+    watermark = get_rollup_watermark()
+    rolled_up = DailyCandidateVotes.objects.all()
+    live = live_votes(Vote.objects.all(), watermark)
+    if event_ids is not None:
+        rolled_up = rolled_up.filter(event_id__in=event_ids)
+        live = live.filter(event_id__in=event_ids)
+
+    totals = dict(rolled_up.order_by().values('event_id').annotate(total=Sum('vote_count')).values_list('event_id', 'total'))
+    for event_id, count in live.order_by().values('event_id').annotate(total=Count('pk')).values_list('event_id', 'total'):
+        totals[event_id] = totals.get(event_id, 0) + count
+    return totals
+
+
+def candidate_vote_totals(event) -> dict:
+    """Liczba głosów kandydatów wydarzenia: {candidate_id: liczba}"""
+    watermark = get_rollup_watermark()
+    rolled_up = DailyCandidateVotes.objects.filter(event=event).order_by().values('candidate_id').annotate(
+        total=Sum('vote_count')
+    ).values_list('candidate_id', 'total')
+    totals = dict(rolled_up)
+    live = live_votes(Vote.objects.filter(event=event), watermark).order_by().values('candidate_id').annotate(
+        total=Count('pk')
+    ).values_list('candidate_id', 'total')
+    for candidate_id, count in live:
+        totals[candidate_id] = totals.get(candidate_id, 0) + count
+    return totals
+
+
+def daily_votes(event=None, start=None, end=None) -> list:
+    """Liczba głosów w kolejnych dniach (wydarzenia lub całego serwisu): [{'day', 'vote_count'}]"""
+    watermark = get_rollup_watermark()
+    if event is not None:
+        rolled_up = DailyCandidateVotes.objects.filter(event=event).order_by().values('day').annotate(total=Sum('vote_count'))
+        live = live_votes(Vote.objects.filter(event=event), watermark)
+    else:
+        rolled_up = DailySiteVotes.objects.order_by().values('day').annotate(total=Sum('vote_count'))
+        live = live_votes(Vote.objects.all(), watermark)
+
+    if start:
+        rolled_up = rolled_up.filter(day__gte=start)
+        live = live.filter(created_at__gte=day_start(start))
+    if end:
+        rolled_up = rolled_up.filter(day__lte=end)
+        live = live.filter(created_at__lt=day_start(end + timedelta(days=1)))
+
+    totals = dict(rolled_up.values_list('day', 'total'))
+    live_by_day = live.annotate(day=TruncDate('created_at')).order_by().values('day').annotate(total=Count('pk'))
+    for day, count in live_by_day.values_list('day', 'total'):
+        totals[day] = totals.get(day, 0) + count
+    return [{'day': day, 'vote_count': totals[day]} for day in sorted(totals)]
+
+
+def with_vote_totals(events):
+    """Adnotuje QuerySet wydarzeń polem rollup_vote_count (agregaty + głosy po znaczniku)"""
+    watermark = get_rollup_watermark()
+    rolled_up = DailyCandidateVotes.objects.filter(event=OuterRef('pk')).order_by().values('event').annotate(
+        total=Sum('vote_count')
+    ).values('total')
+    live = live_votes(Vote.objects.filter(event=OuterRef('pk')), watermark).order_by().values('event').annotate(
+        total=Count('pk')
+    ).values('total')
+    return events.annotate(rollup_vote_count=Coalesce(Subquery(rolled_up), 0) + Coalesce(Subquery(live), 0))
+
+
+def with_candidate_vote_totals(candidates):
+    """Adnotuje QuerySet kandydatów polem rollup_vote_count (agregaty + głosy po znaczniku)"""
+    watermark = get_rollup_watermark()
+    rolled_up = DailyCandidateVotes.objects.filter(candidate=OuterRef('pk')).order_by().values('candidate').annotate(
+        total=Sum('vote_count')
+    ).values('total')
+    live = live_votes(Vote.objects.filter(candidate=OuterRef('pk')), watermark).order_by().values('candidate').annotate(
+        total=Count('pk')
+    ).values('total')
+    return candidates.annotate(rollup_vote_count=Coalesce(Subquery(rolled_up), 0) + Coalesce(Subquery(live), 0))
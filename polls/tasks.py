@@ -0,0 +1,35 @@
+"""
+Zadania w tle bez zewnętrznej kolejki.
+
+Zadania trafiają do wspólnej puli wątków procesu dopiero po zatwierdzeniu
+transakcji (widzą zapisane dane). Po każdym zadaniu wątek zamyka swoje
+połączenia z bazą. Wyjątki są logowane - nie wpływają na żądanie, które
+zleciło zadanie.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger('wysonda.tasks')
+
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+    thread_name_prefix='wysonda-task',
+)
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Zadanie w tle %s zakończone błędem', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Zleca func(*args, **kwargs) do puli wątków po zatwierdzeniu bieżącej transakcji"""
+    transaction.on_commit(lambda: executor.submit(_run, func, args, kwargs))
@@ -1,3 +1,783 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime, time, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import anomalies, exports, geoip, reports, utils
+from .anomalies import SlidingCountMinSketch, VoteAnomalyDetector
+from .exports import (
+    COLUMNAR_FORMATS, VOTE_EXPORT_HEADER, get_vote_arrow_schema, hash_ip_address, pyarrow, write_votes_columnar,
+)
+from .fingerprints import fingerprint_digest
+from .models import Event, Candidate, Comment, PollAnalytics, Vote, ReportJob
+from .reports import enqueue_report, get_current_report_job
+from .rollups import (
+    candidate_vote_totals, daily_votes, event_vote_totals, get_rollup_watermark, rollup_votes, site_total_votes,
+)
+from .useragent import get_parse_cache_stats, parse_user_agent
+from .utils import classify_ip_region, get_dashboard_stats, refresh_poll_demographics
+
+
+def encode_fingerprint(**fields):
+    """Fingerprint w postaci wysyłanej przez generateFingerprint z main.js"""
+    return base64.b64encode(json.dumps(fields).encode()).decode()
+
+
+class VoteFingerprintTests(TestCase):
+    """Blokada głosu po fingerprincie przeglądarki"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(
+            title='Sondaż',
+            description='Opis',
+            event_type='other',
+            event_date=timezone.now() + timedelta(days=7),
+            status='active',
+        )
+        cls.candidate = Candidate.objects.create(
+            event=cls.event,
+            name='Kandydat',
+            description='Opis',
+            candidate_type='individual',
+            main_photo='candidates/test.jpg',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def vote(self, ip_address, fingerprint):
+        return self.client.post(
+            reverse('polls:vote', args=[self.event.id]),
+            json.dumps({'candidate_id': str(self.candidate.id), 'fingerprint': fingerprint}),
+            content_type='application/json',
+            REMOTE_ADDR=ip_address,
+        )
+
+    def test_different_fingerprints_vote_from_different_ips(self):
+        canvas = 'data:image/png;base64,iVBORw0KGgo='
+        first = encode_fingerprint(canvas=canvas, userAgent='iPhone', screenResolution='390x844', timezone='Europe/Warsaw')
+        second = encode_fingerprint(canvas=canvas, userAgent='iPhone', screenResolution='390x844', timezone='Europe/London')
+
+        self.assertEqual(self.vote('198.51.100.1', first).status_code, 200)
+        self.assertEqual(self.vote('198.51.100.2', second).status_code, 200)
+        self.assertEqual(Vote.objects.count(), 2)
+
+    def test_canvas_only_fingerprint_does_not_block(self):
+        canvas = 'data:image/png;base64,iVBORw0KGgo='
+
+        self.assertEqual(self.vote('198.51.100.1', canvas).status_code, 200)
+        self.assertEqual(self.vote('198.51.100.2', canvas).status_code, 200)
+
+    def test_stored_fingerprint_flags_same_browser(self):
+        fingerprint = encode_fingerprint(canvas='c', userAgent='Firefox', language='pl-PL', colorDepth=24)
+        # Ten sam fingerprint z inną kolejnością pól - ta sama postać kanoniczna
+        reordered = encode_fingerprint(colorDepth=24, language='pl-PL', userAgent='Firefox', canvas='c')
+
+        self.assertEqual(self.vote('198.51.100.1', fingerprint).status_code, 200)
+        vote = Vote.objects.get()
+        self.assertEqual(bytes(vote.fingerprint_digest), fingerprint_digest(reordered))
+        self.assertEqual(vote.browser_fingerprint, fingerprint_digest(reordered).hex())
+        self.assertFalse(vote.is_flagged)
+
+        self.assertEqual(self.vote('198.51.100.2', reordered).status_code, 200)
+        self.assertTrue(Vote.objects.get(ip_address='198.51.100.2').is_flagged)
+        # Ten sam adres IP nadal blokuje
+        self.assertEqual(self.vote('198.51.100.2', encode_fingerprint(canvas='inny')).status_code, 400)
+
+    def test_identical_devices_on_different_networks_both_vote(self):
+        # Dwa telefony tego samego modelu, z tym samym systemem, językiem i strefą czasową
+        phone = dict(
+            canvas='data:image/png;base64,iVBORw0KGgo=', userAgent='Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X)',
+            language='pl-PL', platform='iPhone', screenResolution='390x844', timezone='Europe/Warsaw', colorDepth=24,
+        )
+
+        self.assertEqual(self.vote('198.51.100.1', encode_fingerprint(**phone)).status_code, 200)
+        self.assertEqual(self.vote('203.0.113.9', encode_fingerprint(**phone)).status_code, 200)
+        self.assertEqual(Vote.objects.count(), 2)
+        self.assertEqual(Vote.objects.filter(is_flagged=True).count(), 1)
+
+
+class ReportJobTests(TestCase):
+    """Zlecenia raportów: przerwane zlecenia i jedno zlecenie na wersję danych"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(
+            title='Sondaż',
+            description='Opis',
+            event_type='other',
+            event_date=timezone.now() + timedelta(days=7),
+            status='active',
+        )
+
+    def test_stale_running_job_is_replaced(self):
+        job, created = enqueue_report(self.event, 'v1')
+        ReportJob.objects.filter(pk=job.pk).update(status='running', started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertIsNone(get_current_report_job(self.event, 'v1'))
+        self.assertEqual(ReportJob.objects.get(pk=job.pk).status, 'failed')
+        new_job, created = enqueue_report(self.event, 'v1')
+        self.assertTrue(created)
+        self.assertNotEqual(new_job.pk, job.pk)
+
+    def test_one_active_job_per_data_version(self):
+        job, created = enqueue_report(self.event, 'v1')
+        self.assertEqual(enqueue_report(self.event, 'v1'), (job, False))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ReportJob.objects.create(event=self.event, data_version='v1')
+
+    def test_racing_job_finished_before_lookup(self):
+        racing_job = ReportJob.objects.create(event=self.event, data_version='v1')
+        lookups = []
+
+        def racing_lookup(event, data_version):
+            lookups.append(data_version)
+            if len(lookups) == 1:
+                # Równoległa prośba jeszcze niewidoczna
+                return None
+            # ...a zanim ją znajdziemy, zostaje przeterminowana
+            ReportJob.objects.filter(pk=racing_job.pk).update(status='failed')
+            return get_current_report_job(event, data_version)
+
+        with mock.patch.object(reports, 'get_current_report_job', racing_lookup):
+            job, created = enqueue_report(self.event, 'v1')
+
+        self.assertTrue(created)
+        self.assertNotEqual(job.pk, racing_job.pk)
+        self.assertEqual(len(lookups), 2)
+
+    def test_enqueue_never_returns_none(self):
+        ReportJob.objects.create(event=self.event, data_version='v1')
+        with mock.patch.object(reports, 'get_current_report_job', return_value=None):
+            job, created = enqueue_report(self.event, 'v1')
+        self.assertIsNotNone(job)
+        self.assertFalse(created)
+
+
+class WriteThrottleTests(TestCase):
+    """Limity zapisów nie dają się ominąć podrobionym X-Forwarded-For"""
+
+    def setUp(self):
+        cache.clear()
+
+    def post_vote(self, **headers):
+        return self.client.post(reverse('polls:vote', args=[uuid.uuid4()]), '{}', content_type='application/json', **headers)
+
+    @override_settings(WRITE_THROTTLE_RATES={'vote': {'ip': '2/min', 'subnet': '100/min'}}, TRUSTED_PROXY_COUNT=0)
+    def test_spoofed_forwarded_for_is_ignored_without_proxy(self):
+        statuses = [
+            self.post_vote(REMOTE_ADDR='198.51.100.1', HTTP_X_FORWARDED_FOR=f'203.0.{index}.1').status_code
+            for index in range(3)
+        ]
+        self.assertEqual(statuses[-1], 429)
+
+    @override_settings(WRITE_THROTTLE_RATES={'vote': {'ip': '2/min', 'subnet': '100/min'}}, TRUSTED_PROXY_COUNT=1)
+    def test_proxy_appended_address_is_used(self):
+        # Klient podaje losowy pierwszy wpis, proxy dopisuje prawdziwy adres na końcu
+        statuses = [
+            self.post_vote(REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'203.0.{index}.1, 198.51.100.1').status_code
+            for index in range(3)
+        ]
+        self.assertEqual(statuses[-1], 429)
+        self.assertNotEqual(self.post_vote(REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='198.51.100.2').status_code, 429)
+
+
+class VoteAnomalyDetectorTests(TestCase):
+    """Przesuwane okno szkicu count-min i reakcja na przekroczenie progów"""
+
+    def setUp(self):
+        cache.clear()
+        self.event_id = uuid.uuid4()
+        self.detector = VoteAnomalyDetector(window=60, thresholds={'subnet': 3, 'fingerprint': 2, 'user_agent': 100})
+
+    def test_sketch_counts_keys_in_window(self):
+        sketch = SlidingCountMinSketch(window=60, slots=6, width=1024, depth=4)
+        sketch.advance(1000.0)
+        for _ in range(5):
+            sketch.add('a')
+        sketch.add('b')
+
+        self.assertEqual(sketch.estimate('a'), 5)
+        self.assertEqual(sketch.estimate('b'), 1)
+        sketch.advance(1030.0)
+        sketch.add('a')
+        self.assertEqual(sketch.estimate('a'), 6)
+        # Przegródka z pierwszymi głosami wypada z okna, ostatni głos zostaje
+        sketch.advance(1065.0)
+        self.assertEqual(sketch.estimate('a'), 1)
+        sketch.advance(1200.0)
+        self.assertEqual(sketch.estimate('a'), 0)
+
+    def test_threshold_crossing_and_window_expiry(self):
+        results = [
+            self.detector.observe(self.event_id, f'203.0.113.{index}', now=1000.0 + index)
+            for index in range(5)
+        ]
+
+        self.assertEqual([bool(result) for result in results], [False, False, False, True, True])
+        self.assertEqual(results[3], {'subnet': ('203.0.113.0/24', 4)})
+        # Inna podsieć i inne wydarzenie liczą się osobno
+        self.assertEqual(self.detector.observe(self.event_id, '198.51.100.1', now=1005.0), {})
+        self.assertEqual(self.detector.observe(uuid.uuid4(), '203.0.113.9', now=1005.0), {})
+        # Po upływie okna liczenie zaczyna się od nowa
+        self.assertEqual(self.detector.observe(self.event_id, '203.0.113.9', now=1100.0), {})
+
+    def test_fingerprint_and_user_agent_thresholds(self):
+        for index in range(2):
+            self.assertEqual(self.detector.observe(self.event_id, f'198.51.{index}.1', fingerprint='ab', now=1000.0), {})
+        exceeded = self.detector.observe(self.event_id, '198.51.9.1', fingerprint='ab', now=1000.0)
+        self.assertEqual(set(exceeded), {'fingerprint'})
+
+    def test_flag_or_block(self):
+        with mock.patch.object(anomalies, 'detector', self.detector):
+            results = [anomalies.check_vote_anomalies(self.event_id, f'203.0.113.{index}') for index in range(4)]
+            self.assertEqual(results, [(False, False)] * 3 + [(True, False)])
+            with override_settings(VOTE_ANOMALY_ACTION='block'):
+                self.assertEqual(anomalies.check_vote_anomalies(self.event_id, '203.0.113.50'), (True, True))
+
+    def test_changed_vote_keeps_flag(self):
+        event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        first, second = [
+            Candidate.objects.create(
+                event=event, name=name, description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+            ) for name in ('A', 'B')
+        ]
+        Vote.objects.create(event=event, candidate=first, ip_address='203.0.113.1', is_flagged=True)
+
+        with mock.patch.object(anomalies, 'detector', self.detector):
+            response = self.client.post(
+                reverse('polls:change_vote', args=[event.id]),
+                json.dumps({'candidate_id': str(second.id)}),
+                content_type='application/json',
+                REMOTE_ADDR='203.0.113.1',
+            )
+
+        self.assertEqual(response.status_code, 200)
+        vote = Vote.objects.get()
+        self.assertEqual(vote.candidate, second)
+        self.assertTrue(vote.is_flagged)
+
+
+class CommentDisplayNameTests(TestCase):
+    """Zapisana nazwa autora komentarza"""
+
+    @classmethod
+    def setUpTestData(cls):
+        event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        cls.candidate = Candidate.objects.create(
+            event=event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+        )
+        cls.user = User.objects.create_user('jan', 'jan@example.com', 'haslo')
+
+    def test_nickname_change_updates_comments(self):
+        comment = Comment.objects.create(candidate=self.candidate, author=self.user, content='Treść', ip_address='203.0.113.1')
+        self.assertEqual(comment.author_name, f'user_{self.user.id}')
+
+        profile = User.objects.get(pk=self.user.pk).profile
+        profile.nickname = 'Jan'
+        profile.save()
+
+        self.assertEqual(Comment.objects.get().author_name, 'Jan')
+
+    def test_user_save_without_nickname_change_skips_comments(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        # Zapis użytkownika i profilu, bez zapytania o komentarze
+        with self.assertNumQueries(2):
+            user.save(update_fields=['last_login'])
+
+    def test_anonymous_name_is_stored(self):
+        comment = Comment.objects.create(candidate=self.candidate, content='Treść', ip_address='203.0.113.1')
+        self.assertEqual(comment.display_name, comment.anonymous_author_name)
+
+
+class DailyVotesInputTests(TestCase):
+    """Walidacja parametrów dziennych agregatów"""
+
+    def test_invalid_event_id_returns_400(self):
+        staff = User.objects.create_user('admin', 'admin@example.com', 'haslo', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('polls:dashboard_daily_votes'), {'event': 'nie-uuid'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rollup_rejects_invalid_date(self):
+        for value in ('2026-13-45', 'wczoraj'):
+            with self.subTest(value=value), self.assertRaises(CommandError):
+                call_command('rollup_votes', '--from', value, stdout=StringIO())
+
+
+class VoteLocationTests(TestCase):
+    """Lokalizacja nowych głosów z lokalnej bazy GeoIP"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        cls.candidate = Candidate.objects.create(
+            event=cls.event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+        )
+
+    def setUp(self):
+        geoip.get_geoip_table.cache_clear()
+        self.addCleanup(geoip.get_geoip_table.cache_clear)
+
+    def ranges_file(self, content):
+        source = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        self.addCleanup(os.unlink, source.name)
+        with source:
+            source.write(content)
+        return source.name
+
+    def test_location_is_looked_up_before_deferring(self):
+        with override_settings(GEOIP_RANGES_FILE=self.ranges_file('203.0.113.0/24,pl,mazowieckie\n')), \
+                mock.patch.object(geoip, 'run_in_background') as background:
+            vote = Vote.objects.create(event=self.event, candidate=self.candidate, ip_address='203.0.113.7')
+        background.assert_called_once_with(geoip.save_vote_location, vote.pk, {'country': 'PL', 'region': 'mazowieckie'})
+
+    def test_malformed_file_disables_lookup(self):
+        with override_settings(GEOIP_RANGES_FILE=self.ranges_file('203.0.113.0/24,PL\nnie-adres,PL,x\n')), \
+                mock.patch.object(geoip, 'run_in_background') as background, \
+                self.assertLogs('wysonda.geoip', 'ERROR'):
+            Vote.objects.create(event=self.event, candidate=self.candidate, ip_address='203.0.113.7')
+        background.assert_not_called()
+
+    def test_invalid_ranges_are_skipped(self):
+        content = (
+            '198.51.100.0,2001:db8::ff,PL,mieszany\n'
+            '198.51.100.200,198.51.100.100,PL,odwrocony\n'
+            '198.51.100.0,198.51.100.255,PL,pomorskie\n'
+        )
+        with self.assertLogs('wysonda.geoip', 'WARNING') as logs:
+            table = geoip.load_geoip_table(self.ranges_file(content))
+
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.lookup('198.51.100.150'), ('PL', 'pomorskie'))
+        self.assertIsNone(table.lookup('2001:db8::1'))
+
+
+class CommentPageTests(TestCase):
+    """Doładowywanie stron komentarzy (JSON)"""
+
+    def test_can_delete_only_for_staff(self):
+        event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        candidate = Candidate.objects.create(
+            event=event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+        )
+        Comment.objects.create(candidate=candidate, content='Treść', ip_address='203.0.113.1', is_approved=True)
+        url = reverse('polls:candidate_comments', args=[candidate.id])
+
+        self.assertFalse(self.client.get(url).json()['comments'][0]['can_delete'])
+        self.client.force_login(User.objects.create_user('admin', 'admin@example.com', 'haslo', is_staff=True))
+        self.assertTrue(self.client.get(url).json()['comments'][0]['can_delete'])
+
+
+class IPClassificationTests(TestCase):
+    """Klasy sieci w statystykach"""
+
+    def test_labels_match_stored_statistics(self):
+        self.assertEqual(classify_ip_region('192.168.1.10'), 'Sieć lokalna')
+        self.assertEqual(classify_ip_region('10.1.2.3'), 'Sieć prywatna')
+        self.assertEqual(classify_ip_region('172.20.0.1'), 'Sieć prywatna')
+        self.assertEqual(classify_ip_region('203.0.113.7'), 'Internet')
+
+
+class EventXlsxExportTests(TestCase):
+    """Eksport wydarzenia do XLSX"""
+
+    def test_votes_after_snapshot_are_not_exported(self):
+        event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        candidate = Candidate.objects.create(
+            event=event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+        )
+        for number in range(2):
+            Vote.objects.create(event=event, candidate=candidate, ip_address=f'203.0.113.{number + 1}')
+
+        # Dwa głosy na arkusz; iter_xlsx zwraca arkusze do sprawdzenia
+        with mock.patch.object(exports, 'MAX_SHEET_ROWS', 3), mock.patch.object(exports, 'iter_xlsx', lambda sheets: sheets):
+            sheets = exports.iter_event_xlsx(event)
+        Vote.objects.create(event=event, candidate=candidate, ip_address='203.0.113.3')
+
+        sheets = {name: list(rows) for name, rows in sheets}
+        self.assertEqual(list(sheets), ['Wyniki', 'Głosy', 'Trend godzinowy'])
+        self.assertEqual(sheets['Wyniki'][1][2:], [2, 100.0])
+        self.assertEqual([row[2] for row in sheets['Głosy'][1:]], [hash_ip_address(f'203.0.113.{number}') for number in (1, 2)])
+        self.assertEqual(sheets['Trend godzinowy'][-1][2], 2)
+
+
+class VoteRollupTests(TestCase):
+    """Dzienne agregaty głosów i głosy po znaczniku"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        cls.first, cls.second = [
+            Candidate.objects.create(
+                event=cls.event, name=name, description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+            ) for name in ('A', 'B')
+        ]
+
+    def vote(self, days_ago, candidate=None, ip_address=None):
+        vote = Vote.objects.create(
+            event=self.event, candidate=candidate or self.first,
+            ip_address=ip_address or f'203.0.113.{Vote.objects.count() + 1}',
+        )
+        created_at = timezone.now() - timedelta(days=days_ago)
+        Vote.objects.filter(pk=vote.pk).update(created_at=created_at)
+        vote.created_at = created_at
+        return vote
+
+    def assertTotalsMatchVotes(self):
+        self.assertEqual(site_total_votes(), Vote.objects.count())
+        self.assertEqual(event_vote_totals().get(self.event.id, 0), Vote.objects.count())
+        totals = candidate_vote_totals(self.event)
+        self.assertEqual({candidate_id: total for candidate_id, total in totals.items() if total}, {
+            candidate_id: Vote.objects.filter(candidate_id=candidate_id).count()
+            for candidate_id in Vote.objects.values_list('candidate_id', flat=True).distinct()
+        })
+
+    def test_rollup_plus_live_votes_equal_raw_count(self):
+        for days_ago in (10, 10, 2):
+            self.vote(days_ago)
+        self.vote(1, candidate=self.second)
+        self.vote(0)
+
+        rollup_votes()
+
+        self.assertEqual(get_rollup_watermark(), timezone.localdate() - timedelta(days=1))
+        self.assertTotalsMatchVotes()
+
+    @override_settings(ROLLUP_REFRESH_DAYS=3)
+    def test_refresh_window_and_full_rebuild(self):
+        self.vote(10)
+        rollup_votes()
+        # Dopisane po fakcie: stary dzień jest poza oknem odświeżania, świeży w oknie
+        self.vote(10)
+        self.vote(2)
+
+        rollup_votes()
+        self.assertEqual(site_total_votes(), 2)
+
+        rollup_votes(full=True)
+        self.assertEqual(site_total_votes(), 3)
+        self.assertTotalsMatchVotes()
+
+    def test_deleted_vote_leaves_totals(self):
+        votes = [self.vote(10) for _ in range(4)]
+        self.vote(0)
+        rollup_votes()
+
+        votes[0].delete()
+        self.assertEqual(site_total_votes(), 4)
+        rollup_votes()
+        self.assertTotalsMatchVotes()
+
+        Vote.objects.filter(pk__in=[vote.pk for vote in votes[1:3]]).delete()
+        self.assertTotalsMatchVotes()
+
+    def test_changed_old_vote_is_counted_once(self):
+        self.vote(10, ip_address='203.0.113.77')
+        rollup_votes()
+
+        response = self.client.post(
+            reverse('polls:change_vote', args=[self.event.id]),
+            json.dumps({'candidate_id': str(self.second.id)}),
+            content_type='application/json',
+            REMOTE_ADDR='203.0.113.77',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(site_total_votes(), 1)
+        totals = candidate_vote_totals(self.event)
+        self.assertEqual((totals[self.first.id], totals[self.second.id]), (0, 1))
+
+    def test_daily_votes_date_bounds(self):
+        for days_ago in (5, 3, 3, 0):
+            self.vote(days_ago)
+        rollup_votes()
+        today = timezone.localdate()
+
+        days = daily_votes(self.event, today - timedelta(days=3), today)
+        self.assertEqual(days, [
+            {'day': today - timedelta(days=3), 'vote_count': 2},
+            {'day': today, 'vote_count': 1},
+        ])
+        self.assertEqual(daily_votes(None, end=today - timedelta(days=4)), [
+            {'day': today - timedelta(days=5), 'vote_count': 1},
+            {'day': today - timedelta(days=4), 'vote_count': 0},
+        ])
+
+
+@skipUnless(pyarrow, 'eksport kolumnowy wymaga pakietu pyarrow')
+class ColumnarExportTests(TestCase):
+    """Eksport głosów do Parquet i Arrow IPC"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        cls.first, cls.second = [
+            Candidate.objects.create(
+                event=cls.event, name=name, description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+            ) for name in ('A', 'B')
+        ]
+        now = timezone.now()
+        for number, (candidate, days_ago) in enumerate([(cls.first, 3), (cls.second, 2), (cls.second, 1)], start=1):
+            vote = Vote.objects.create(
+                event=cls.event, candidate=candidate, ip_address=f'203.0.113.{number}', browser_fingerprint=f'fp{number}',
+            )
+            Vote.objects.filter(pk=vote.pk).update(created_at=now - timedelta(days=days_ago))
+
+    def read_table(self, file_format, **bounds):
+        sink = pyarrow.BufferOutputStream()
+        rows = write_votes_columnar(self.event, sink, file_format, **bounds)
+        source = pyarrow.BufferReader(sink.getvalue())
+        if file_format == 'parquet':
+            table = pyarrow.parquet.read_table(source)
+        else:
+            table = pyarrow.ipc.open_file(source).read_all()
+        self.assertEqual(table.num_rows, rows)
+        return table
+
+    def test_round_trip(self):
+        for file_format in COLUMNAR_FORMATS:
+            with self.subTest(file_format=file_format):
+                table = self.read_table(file_format, batch_size=2)
+                self.assertEqual(table.num_rows, 3)
+                self.assertEqual(table.schema.names, get_vote_arrow_schema().names)
+                self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('candidate').type))
+                self.assertTrue(pyarrow.types.is_dictionary(table.schema.field('event').type))
+                self.assertEqual(table.column('candidate').to_pylist(), ['A', 'B', 'B'])
+                self.assertEqual(table.column('event').to_pylist(), ['Sondaż'] * 3)
+                self.assertEqual(table.column('browser_fingerprint').to_pylist(), ['fp1', 'fp2', 'fp3'])
+                self.assertEqual(table.column('ip_hash').to_pylist()[0], hash_ip_address('203.0.113.1'))
+
+    def test_date_bounds(self):
+        now = timezone.now()
+        table = self.read_table('parquet', date_from=now - timedelta(days=2, hours=12), date_to=now - timedelta(hours=12))
+        self.assertEqual(table.column('browser_fingerprint').to_pylist(), ['fp2', 'fp3'])
+        table = self.read_table('arrow', date_to=now - timedelta(days=2, hours=12))
+        self.assertEqual(table.column('browser_fingerprint').to_pylist(), ['fp1'])
+
+    def test_admin_download(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'haslo'))
+        response = self.client.post(reverse('admin:polls_event_changelist'), {
+            'action': 'download_votes_parquet', '_selected_action': [str(self.event.pk)],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], COLUMNAR_FORMATS['parquet'][1])
+        self.assertIn('.parquet', response['Content-Disposition'])
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(b''.join(response.streaming_content)))
+        response.close()
+        self.assertEqual(table.num_rows, 3)
+
+
+class DashboardStatsTests(TestCase):
+    """Liczby panelu administratora"""
+
+    @classmethod
+    def setUpTestData(cls):
+        future, past = timezone.now() + timedelta(days=7), timezone.now() - timedelta(days=7)
+        for index, (event_date, status, candidates) in enumerate([
+            (future, 'active', 3), (future, 'upcoming', 2), (past, 'active', 4), (future, 'finished', 1),
+        ]):
+            event = Event.objects.create(
+                title=f'Sondaż {index}', description='Opis', event_type='other', event_date=event_date, status=status,
+            )
+            for number in range(candidates):
+                candidate = Candidate.objects.create(
+                    event=event, name=f'Kandydat {number}', description='Opis', candidate_type='individual',
+                    main_photo='candidates/test.jpg',
+                )
+                Vote.objects.create(event=event, candidate=candidate, ip_address=f'203.0.113.{index * 10 + number}')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts_from_single_aggregate_and_cache(self):
+        # Agregat wydarzeń i kandydatów + głosy: znacznik agregatów oraz site_total_votes (znacznik, suma, głosy bieżące)
+        with self.assertNumQueries(5):
+            stats = get_dashboard_stats()
+
+        self.assertEqual(
+            (stats['total_events'], stats['active_events'], stats['total_candidates'], stats['total_votes']),
+            (4, 2, 10, 10),
+        )
+        self.assertFalse(stats['votes_approximate'])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_dashboard_stats(), stats)
+
+    @override_settings(DASHBOARD_ESTIMATE_THRESHOLD=1000)
+    def test_large_vote_table_is_estimated(self):
+        with mock.patch.object(utils, 'estimated_row_count', return_value=250000):
+            stats = get_dashboard_stats()
+        self.assertEqual(stats['total_votes'], 250000)
+        self.assertTrue(stats['votes_approximate'])
+
+        self.client.force_login(User.objects.create_user('admin', 'admin@example.com', 'haslo', is_staff=True))
+        response = self.client.get(reverse('polls:admin_dashboard'))
+        self.assertContains(response, '~250000')
+        self.assertContains(response, '(szacunkowo)')
+
+    @override_settings(DASHBOARD_ESTIMATE_THRESHOLD=1000)
+    def test_small_estimate_uses_exact_count(self):
+        with mock.patch.object(utils, 'estimated_row_count', return_value=500):
+            stats = get_dashboard_stats()
+        self.assertEqual(stats['total_votes'], 10)
+        self.assertFalse(stats['votes_approximate'])
+
+
+CHROME_WINDOWS = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36'
+SAFARI_IPHONE = (
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) '
+    'Version/17.5 Mobile/15E148 Safari/604.1'
+)
+
+
+class UserAgentTests(TestCase):
+    """Rozpoznawanie urządzenia, systemu i przeglądarki"""
+
+    def test_parse_rules(self):
+        cases = [
+            (CHROME_WINDOWS, ('Komputer', 'Windows', 'Chrome')),
+            (CHROME_WINDOWS + ' Edg/126.0.0.0', ('Komputer', 'Windows', 'Edge')),
+            ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.5 Safari/605.1.15',
+             ('Komputer', 'macOS', 'Safari')),
+            ('Mozilla/5.0 (X11; Linux x86_64; rv:127.0) Gecko/20100101 Firefox/127.0', ('Komputer', 'Linux', 'Firefox')),
+            (SAFARI_IPHONE, ('Telefon', 'iOS', 'Safari')),
+            ('Mozilla/5.0 (iPad; CPU OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/126.0 Mobile/15E148 Safari/604.1',
+             ('Tablet', 'iOS', 'Chrome')),
+            ('Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/25.0 '
+             'Chrome/121.0.0.0 Mobile Safari/537.36', ('Telefon', 'Android', 'Samsung Internet')),
+            ('Mozilla/5.0 (Linux; Android 13; SM-X700) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36',
+             ('Tablet', 'Android', 'Chrome')),
+            ('Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)', ('Bot', 'Inne', 'Inne')),
+            ('python-requests/2.32.3', ('Bot', 'Inne', 'Inne')),
+            ('', ('Nieznane', 'Nieznane', 'Nieznane')),
+        ]
+        for user_agent, expected in cases:
+            with self.subTest(user_agent=user_agent):
+                self.assertEqual(parse_user_agent(user_agent), expected)
+
+    def test_cache_size_follows_settings(self):
+        with override_settings(USER_AGENT_CACHE_SIZE=2):
+            for user_agent in ('a', 'b', 'c', 'a'):
+                parse_user_agent(user_agent)
+            stats = get_parse_cache_stats()
+        self.assertEqual((stats['max_size'], stats['size'], stats['misses']), (2, 2, 4))
+
+    def test_demographics_are_stored_in_poll_analytics(self):
+        event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        candidate = Candidate.objects.create(
+            event=event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+        )
+        for number, user_agent in enumerate([SAFARI_IPHONE, SAFARI_IPHONE, CHROME_WINDOWS, '']):
+            Vote.objects.create(event=event, candidate=candidate, ip_address=f'203.0.113.{number + 1}', user_agent=user_agent)
+
+        refresh_poll_demographics(event)
+
+        data = PollAnalytics.objects.get(event=event).demographic_data
+        self.assertEqual(data['devices'], {'Telefon': 2, 'Komputer': 1, 'Nieznane': 1})
+        self.assertEqual(data['operating_systems'], {'iOS': 2, 'Windows': 1, 'Nieznane': 1})
+        self.assertEqual(data['browsers'], {'Safari': 2, 'Chrome': 1, 'Nieznane': 1})
+        self.assertIn('computed_at', data)
+
+
+class VoteCSVExportTests(TestCase):
+    """Strumieniowy eksport głosów do CSV"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(
+            title='Sondaż', description='Opis', event_type='other',
+            event_date=timezone.now() + timedelta(days=7), status='active',
+        )
+        candidate = Candidate.objects.create(
+            event=cls.event, name='Kandydat', description='Opis', candidate_type='individual', main_photo='candidates/test.jpg',
+        )
+        cls.day = timezone.localdate() - timedelta(days=3)
+        cls.moments = [
+            timezone.make_aware(datetime.combine(cls.day, time(10, 0))),
+            timezone.make_aware(datetime.combine(cls.day, time(23, 30))),
+            timezone.make_aware(datetime.combine(cls.day + timedelta(days=1), time(0, 30))),
+        ]
+        for number, moment in enumerate(cls.moments, start=1):
+            vote = Vote.objects.create(
+                event=cls.event, candidate=candidate, ip_address=f'203.0.113.{number}',
+                browser_fingerprint=f'fp{number}', user_agent='Firefox',
+            )
+            Vote.objects.filter(pk=vote.pk).update(created_at=moment)
+        cls.staff = User.objects.create_user('admin', 'admin@example.com', 'haslo', is_staff=True)
+
+    def export(self, **params):
+        return self.client.get(reverse('polls:export_votes', args=[self.event.id]), params)
+
+    def rows(self, **params):
+        self.client.force_login(self.staff)
+        response = self.export(**params)
+        self.assertEqual(response.status_code, 200)
+        return list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_staff_only(self):
+        self.assertEqual(self.export().status_code, 302)
+        self.client.force_login(User.objects.create_user('jan', 'jan@example.com', 'haslo'))
+        self.assertEqual(self.export().status_code, 302)
+
+    def test_header_and_rows(self):
+        rows = self.rows()
+        self.assertEqual(rows[0], VOTE_EXPORT_HEADER)
+        self.assertEqual(datetime.fromisoformat(rows[1][0]), self.moments[0])
+        self.assertEqual(rows[1][1:], ['Kandydat', hash_ip_address('203.0.113.1'), 'fp1', 'Firefox'])
+        self.assertEqual(len(rows), 4)
+
+    def test_date_only_bound_covers_whole_day(self):
+        rows = self.rows(date_from=self.day.isoformat(), date_to=self.day.isoformat())
+        self.assertEqual([row[3] for row in rows[1:]], ['fp1', 'fp2'])
+
+    def test_datetime_bound(self):
+        rows = self.rows(date_from=f'{self.day.isoformat()}T12:00:00')
+        self.assertEqual([row[3] for row in rows[1:]], ['fp2', 'fp3'])
+
+    def test_malformed_bound_returns_400(self):
+        self.client.force_login(self.staff)
+        for params in ({'date_from': '2026-13-01'}, {'date_to': 'jutro'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.export(**params).status_code, 400)
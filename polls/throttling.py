@@ -0,0 +1,142 @@
+"""
+Ograniczanie częstotliwości zapisów (głosy, komentarze).
+
+Każdy adres IP i każda podsieć (/24 dla IPv4, /64 dla IPv6) ma własny
+kubełek o pojemności N żetonów, który napełnia się w ciągu okresu z
+WRITE_THROTTLE_RATES (np. '10/min'). Django cache nie ma operacji
+compare-and-set, więc kubełek jest liczony jako przesuwane okno na
+atomowych cache.incr - działa tak samo na LocMem i na współdzielonym Redisie.
+Sprawdzenie nie wykonuje żadnych zapytań do bazy danych. Adres klienta
+pochodzi z get_trusted_client_ip - podrobiony X-Forwarded-For nie omija limitu.
+"""
+
+import functools
+import math
+import socket
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+from .utils import get_trusted_client_ip
+
+KEY_PREFIX = 'write_throttle'
+STATS_KEY_PREFIX = 'write_throttle_stats'
+
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400,
+}
+
+THROTTLE_MESSAGE = 'Zbyt wiele żądań. Spróbuj ponownie za chwilę.'
+
+# Endpointy objęte limitami (dla raportu throttle_stats)
+throttled_endpoints = []
+
+
+def parse_rate(rate: str) -> tuple:
+    """'10/min' -> (10, 60)"""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period]
+
+
+def get_subnet(ip_address: str):
+    """Podsieć /24 (IPv4) lub /64 (IPv6) adresu"""
+    # inet_pton zamiast ipaddress - funkcja jest na ścieżce każdego głosu
+    try:
+        if ':' in ip_address:
+            packed = socket.inet_pton(socket.AF_INET6, ip_address.partition('%')[0])
+            return socket.inet_ntop(socket.AF_INET6, packed[:8] + bytes(8)) + '/64'
+        packed = socket.inet_pton(socket.AF_INET, ip_address)
+    except (OSError, TypeError, ValueError):
+        return None
+    return f'{packed[0]}.{packed[1]}.{packed[2]}.0/24'
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def _take_token(bucket: str, capacity: int, period: int, now: float):
+    """Pobiera żeton z kubełka; zwraca czas oczekiwania w sekundach lub None"""
+    window = int(now // period)
+    current = _incr(f'{KEY_PREFIX}:{bucket}:{window}', period * 2)
+    previous = cache.get(f'{KEY_PREFIX}:{bucket}:{window - 1}', 0)
+
+    # Żetony z poprzedniego okna "wyciekają" liniowo - przybliżenie ciągłego napełniania
+    elapsed = (now % period) / period
+    used = previous * (1 - elapsed) + current
+    if used > capacity:
+        return period - (now % period)
+    return None
+
+
+def check_write_throttle(request, scope: str, endpoint: str):
+    """Sprawdza limity IP i podsieci dla zakresu; zwraca czas oczekiwania lub None"""
+    rates = getattr(settings, 'WRITE_THROTTLE_RATES', {}).get(scope)
+    if not rates:
+        return None
+
+    client_ip = get_trusted_client_ip(request)
+    now = time.time()
+    # Adres spoza IPv4/IPv6 trafia do wspólnego kubełka podsieci zamiast go omijać
+    buckets = [('ip', client_ip or 'unknown'), ('subnet', get_subnet(client_ip) or 'invalid')]
+
+    wait = None
+    for kind, value in buckets:
+        if not value or kind not in rates:
+            continue
+        capacity, period = parse_rate(rates[kind])
+        bucket_wait = _take_token(f'{scope}:{kind}:{value}', capacity, period, now)
+        if bucket_wait is not None:
+            wait = max(wait or 0, bucket_wait)
+
+    if wait is not None:
+        _incr(f'{STATS_KEY_PREFIX}:{endpoint}', None)
+    return wait
+
+
+def get_throttle_stats() -> dict:
+    """Liczba odrzuconych żądań per endpoint"""
+    keys = [f'{STATS_KEY_PREFIX}:{endpoint}' for endpoint in throttled_endpoints]
+    counters = cache.get_many(keys)
+    return {endpoint: counters.get(f'{STATS_KEY_PREFIX}:{endpoint}', 0) for endpoint in throttled_endpoints}
+
+
+def reset_throttle_stats():
+    cache.delete_many([f'{STATS_KEY_PREFIX}:{endpoint}' for endpoint in throttled_endpoints])
+
+
+def register_endpoint(endpoint: str):
+    if endpoint not in throttled_endpoints:
+        throttled_endpoints.append(endpoint)
+
+
+def throttle_writes(scope: str, endpoint: str = None):
+    """Dekorator widoku: odrzuca nadmiarowe żądania POST kodem 429 przed wykonaniem widoku"""
+    def decorator(view_func):
+        endpoint_name = endpoint or view_func.__name__
+        register_endpoint(endpoint_name)
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                wait = check_write_throttle(request, scope, endpoint_name)
+                if wait is not None:
+                    if request.content_type == 'application/json':
+                        response = JsonResponse({'success': False, 'message': THROTTLE_MESSAGE}, status=429)
+                    else:
+                        response = HttpResponse(THROTTLE_MESSAGE, status=429, content_type='text/plain; charset=utf-8')
+                    response['Retry-After'] = str(math.ceil(wait))
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
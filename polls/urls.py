@@ -12,16 +12,20 @@ urlpatterns = [
     path('event/<uuid:event_id>/reset-vote/', views.reset_vote, name='reset_vote'),
     path('event/<uuid:event_id>/results/', views.get_results, name='get_results'),
     path('candidate/<uuid:candidate_id>/', views.candidate_detail, name='candidate_detail'),
+    path('candidate/<uuid:candidate_id>/comments/', views.candidate_comments, name='candidate_comments'),
     path('history/', views.event_history, name='event_history'),
     
     # Panel administratora
     path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('dashboard/analytics/daily/', views.dashboard_daily_votes, name='dashboard_daily_votes'),
     path('dashboard/event/create/', views.admin_event_create, name='admin_event_create'),
     path('dashboard/event/<uuid:event_id>/edit/', views.admin_event_edit, name='admin_event_edit'),
     path('dashboard/event/<uuid:event_id>/', views.admin_event_detail, name='admin_event_detail'),
     path('dashboard/event/<uuid:event_id>/candidate/create/', views.admin_candidate_create, name='admin_candidate_create'),
     path('dashboard/candidate/<uuid:candidate_id>/edit/', views.admin_candidate_edit, name='admin_candidate_edit'),
     path('dashboard/event/<uuid:event_id>/export/', views.export_results, name='export_results'),
+    path('dashboard/event/<uuid:event_id>/export/votes/', views.export_votes, name='export_votes'),
+    path('dashboard/event/<uuid:event_id>/export/xlsx/', views.export_results_xlsx, name='export_results_xlsx'),
 
     path('dashboard/comments/<uuid:comment_id>/delete/', views.delete_comment, name='delete_comment'),
     path('dashboard/event/<uuid:event_id>/delete/', views.delete_event, name='delete_event'),
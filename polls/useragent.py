@@ -0,0 +1,116 @@
+"""
+Rozpoznawanie urządzenia, systemu i przeglądarki z nagłówka User-Agent.
+
+Ruch ma zwykle kilkaset różnych User Agentów na miliony głosów, więc wyniki
+parsowania trzymamy w ograniczonym cache LRU (USER_AGENT_CACHE_SIZE), a przy
+zliczaniu grupujemy głosy po User Agencie w bazie - każdy napis jest
+parsowany raz, niezależnie od liczby głosów.
+"""
+
+import functools
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Count
+
+UNKNOWN = 'Nieznane'
+OTHER = 'Inne'
+
+BOT_RE = re.compile(r'bot|crawl|spider|slurp|curl|wget|python-requests|httpclient|headless', re.IGNORECASE)
+
+# Kolejność ma znaczenie - pierwsza pasująca reguła wygrywa
+OS_RULES = [
+    (re.compile(r'Windows NT|Windows Phone'), 'Windows'),
+    (re.compile(r'iPhone|iPad|iPod'), 'iOS'),
+    (re.compile(r'Android'), 'Android'),
+    (re.compile(r'CrOS'), 'ChromeOS'),
+    (re.compile(r'Mac OS X|Macintosh'), 'macOS'),
+    (re.compile(r'Linux|X11'), 'Linux'),
+]
+
+BROWSER_RULES = [
+    (re.compile(r'Edg(e|A|iOS)?/'), 'Edge'),
+    (re.compile(r'OPR/|Opera'), 'Opera'),
+    (re.compile(r'SamsungBrowser/'), 'Samsung Internet'),
+    (re.compile(r'Firefox/|FxiOS/'), 'Firefox'),
+    (re.compile(r'Chrome/|CriOS/|Chromium/'), 'Chrome'),
+    (re.compile(r'Version/[\d.]+.*Safari/'), 'Safari'),
+]
+
+TABLET_RE = re.compile(r'iPad|Tablet|Kindle|Silk/')
+PHONE_RE = re.compile(r'Mobi|iPhone|iPod|Android|Windows Phone')
+
+
+def _match(rules, user_agent):
+    for pattern, label in rules:
+        if pattern.search(user_agent):
+            return label
+    return OTHER
+
+
+def parse_user_agent(user_agent: str) -> tuple:
+    """User Agent -> (urządzenie, system, przeglądarka), z cache LRU"""
+    return get_parse_cache()(user_agent)
+
+
+_parse_cache = None
+_parse_cache_size = None
+
+
+def get_parse_cache():
+    """
+    Parser z cache LRU o rozmiarze USER_AGENT_CACHE_SIZE. Tworzony przy
+    pierwszym użyciu i od nowa po zmianie ustawienia (np. override_settings),
+    a nie przy imporcie modułu.
+    """
+    global _parse_cache, _parse_cache_size
+    size = getattr(settings, 'USER_AGENT_CACHE_SIZE', 1024)
+    if _parse_cache is None or size != _parse_cache_size:
+        _parse_cache, _parse_cache_size = functools.lru_cache(maxsize=size)(_parse_user_agent), size
+    return _parse_cache
+
+
+def _parse_user_agent(user_agent: str) -> tuple:
+    if not user_agent:
+        return UNKNOWN, UNKNOWN, UNKNOWN
+    if BOT_RE.search(user_agent):
+        return 'Bot', _match(OS_RULES, user_agent), OTHER
+
+    operating_system = _match(OS_RULES, user_agent)
+    if TABLET_RE.search(user_agent) or (operating_system == 'Android' and 'Mobile' not in user_agent):
+        device = 'Tablet'
+    elif PHONE_RE.search(user_agent):
+        device = 'Telefon'
+    else:
+        device = 'Komputer'
+    return device, operating_system, _match(BROWSER_RULES, user_agent)
+
+
+def get_parse_cache_stats() -> dict:
+    """Skuteczność cache parsowania w bieżącym procesie"""
+    info = get_parse_cache().cache_info()
+    total = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+        'hit_ratio': round(info.hits / total, 4) if total else 0,
+    }
+
+
+def count_user_agents(votes) -> dict:
+    """Rozkład urządzeń, systemów i przeglądarek w głosach (grupowanie po User Agencie w bazie)"""
+    devices, systems, browsers = Counter(), Counter(), Counter()
+    grouped = votes.order_by().values_list('user_agent').annotate(count=Count('pk'))
+    for user_agent, count in grouped.iterator():
+        device, operating_system, browser = parse_user_agent(user_agent)
+        devices[device] += count
+        systems[operating_system] += count
+        browsers[browser] += count
+    return {
+        'devices': dict(devices.most_common()),
+        'operating_systems': dict(systems.most_common()),
+        'browsers': dict(browsers.most_common()),
+    }
@@ -1,8 +1,19 @@
-import hashlib
 import json
+from collections import Counter
+from itertools import islice
 from django.http import HttpRequest
 from django.core.cache import cache
-from .models import Vote, Event
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.conf import settings
+from .models import Vote, Event, Candidate, PollAnalytics, SiteStatistics
+from .fingerprints import matching_fingerprint_digest
+from .iprange import PUBLIC_NETWORK_LABEL, network_table
+from .useragent import count_user_agents
+from .rollups import event_vote_totals, get_rollup_watermark, site_total_votes
+
+DASHBOARD_STATS_CACHE_KEY = 'dashboard_stats'
 
 
 def get_client_ip(request: HttpRequest) -> str:
@@ -15,44 +26,48 @@ def get_client_ip(request: HttpRequest) -> str:
     return ip
 
 
-def get_browser_fingerprint(request: HttpRequest) -> str:
-    """Generuje fingerprint przeglądarki"""
-    # Pobierz dane z request
-    user_agent = request.META.get('HTTP_USER_AGENT', '')
-    accept_language = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
-    accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
-    
-    # Utwórz fingerprint
-    fingerprint_data = f"{user_agent}|{accept_language}|{accept_encoding}"
-    fingerprint = hashlib.md5(fingerprint_data.encode()).hexdigest()
+def get_trusted_client_ip(request: HttpRequest) -> str:
+    """
+    Adres IP klienta odporny na podrobiony X-Forwarded-For (limity, wykrywanie anomalii).
     
-    return fingerprint
+    Klient może wpisać do X-Forwarded-For dowolne wartości, ale każde z
+    TRUSTED_PROXY_COUNT zaufanych proxy dopisuje na końcu adres, z którego
+    przyszło żądanie - bierzemy więc wpis dopisany przez pierwsze z nich.
+    Bez proxy (0) liczy się REMOTE_ADDR.
+    """
+    proxy_count = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if proxy_count:
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        if len(hops) >= proxy_count:
+            return hops[-proxy_count]
+    return request.META.get('REMOTE_ADDR', '')
 
 
-def check_vote_eligibility(request: HttpRequest, event: Event, client_ip: str) -> bool:
+def check_vote_eligibility(request: HttpRequest, event: Event, client_ip: str, browser_fingerprint: str = '') -> bool:
     """Sprawdza czy użytkownik może głosować"""
     # Sprawdź czy sondaż jest aktywny
     if not event.is_active:
         return False
     
-    # Sprawdź czy już głosował z tego IP
+    # Sprawdź czy już głosował z tego IP (indeks event, ip_address); zgodny
+    # fingerprint z innego IP tylko oznacza głos - fingerprint_already_voted
     if Vote.objects.filter(event=event, ip_address=client_ip).exists():
         return False
     
-    # Sprawdź czy głosował z tej przeglądarki (fingerprint)
-    browser_fingerprint = get_browser_fingerprint(request)
-    if browser_fingerprint and Vote.objects.filter(
-        event=event, 
-        browser_fingerprint=browser_fingerprint
-    ).exists():
-        return False
-    
     # Sprawdź localStorage/cookie (implementacja po stronie frontendu)
     # Tutaj możemy dodać dodatkowe sprawdzenia
     
     return True
 
 
+def fingerprint_already_voted(event: Event, browser_fingerprint: str = '') -> bool:
+    """Czy z tej przeglądarki (pełny fingerprint) oddano już głos w wydarzeniu"""
+    digest = matching_fingerprint_digest(browser_fingerprint)
+    if digest is None:
+        return False
+    return Vote.objects.filter(event=event, fingerprint_digest=digest).exists()
+
+
 def get_vote_cache_key(event_id: str) -> str:
     """Generuje klucz cache dla wyników głosowania"""
     return f"vote_results_{event_id}"
@@ -76,27 +91,35 @@ def invalidate_vote_cache(event_id: str):
     cache.delete(cache_key)
 
 
-def calculate_vote_statistics(event: Event) -> dict:
+def classify_ip_region(ip_address: str) -> str:
+    """Przypisuje adres IP do klasy sieci (prywatna, lokalna, Internet) wg zakresów CIDR"""
+    return network_table.lookup(ip_address, unmatched=PUBLIC_NETWORK_LABEL)
+
+
+def count_vote_regions(votes, chunk_size: int = 5000, progress=None) -> dict:
+    """
+    Zlicza głosy w klasach sieci strumieniowo, porcjami adresów, bez tworzenia
+    obiektów Vote. progress(processed) jest wywoływane po każdej porcji.
+    """
+    ip_addresses = votes.values_list('ip_address', flat=True).iterator(chunk_size=chunk_size)
+    geographic_data = Counter()
+    processed = 0
+    for chunk in iter(lambda: list(islice(ip_addresses, chunk_size)), []):
+        geographic_data.update(network_table.count(chunk, unmatched=PUBLIC_NETWORK_LABEL))
+        processed += len(chunk)
+        if progress:
+            progress(processed)
+    return dict(geographic_data)
+
+
+def calculate_vote_statistics(event: Event, total_votes: int = None, progress=None) -> dict:
     """Oblicza statystyki głosowania"""
-    total_votes = event.votes.count()
+    if total_votes is None:
+        total_votes = event.votes.count()
     unique_voters = event.votes.values('ip_address').distinct().count()
     
-    # Statystyki geograficzne (przykład)
-    geographic_data = {}
-    for vote in event.votes.all():
-        # Tutaj można dodać geolokalizację na podstawie IP
-        # Na razie używamy prostego podziału
-        region = "Nieznany"
-        if vote.ip_address:
-            # Prosty podział na podstawie IP (przykład)
-            if vote.ip_address.startswith('192.168.'):
-                region = "Sieć lokalna"
-            elif vote.ip_address.startswith('10.'):
-                region = "Sieć prywatna"
-            else:
-                region = "Internet"
-        
-        geographic_data[region] = geographic_data.get(region, 0) + 1
+    # Statystyki geograficzne
+    geographic_data = count_vote_regions(event.votes.all(), progress=progress)
     
     return {
         'total_votes': total_votes,
@@ -106,10 +129,94 @@ def calculate_vote_statistics(event: Event) -> dict:
     }
 
 
-def generate_vote_report(event: Event) -> dict:
-    """Generuje raport z głosowania"""
-    candidates = event.candidates.all()
-    total_votes = event.votes.count()
+def refresh_site_statistics() -> SiteStatistics:
+    """Przelicza zmaterializowane statystyki serwisu (komenda refresh_site_statistics)"""
+    # Liczby głosów z dziennych agregatów (polls.rollups) zamiast zliczania tabeli głosów
+    event_totals = event_vote_totals()
+    popular_ids = sorted(event_totals, key=event_totals.get, reverse=True)[:5]
+    titles = dict(Event.objects.filter(id__in=popular_ids).values_list('id', 'title'))
+    
+    statistics, created = SiteStatistics.objects.update_or_create(
+        pk=1,
+        defaults={
+            'total_events': Event.objects.count(),
+            'active_events': Event.objects.filter(status='active').count(),
+            'total_votes': sum(event_totals.values()),
+            'total_candidates': Candidate.objects.count(),
+            'popular_events': [
+                {
+                    'id': str(event_id),
+                    'title': titles[event_id],
+                    'vote_count': event_totals[event_id]
+                } for event_id in popular_ids if event_id in titles
+            ],
+            # Dokładne liczby ze wszystkich głosów (bez próbkowania)
+            'geographic_stats': count_vote_regions(Vote.objects.all()),
+            'computed_at': timezone.now(),
+        }
+    )
+    return statistics
+
+
+def estimated_row_count(model):
+    """Szacowana liczba wierszy tabeli ze statystyk PostgreSQL (None dla innych baz lub bez statystyk)"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 oznacza tabelę jeszcze nieanalizowaną
+    return row[0] if row and row[0] >= 0 else None
+
+
+def get_dashboard_stats() -> dict:
+    """Liczby panelu administratora (cache na DASHBOARD_STATS_TIMEOUT sekund)"""
+    stats = cache.get(DASHBOARD_STATS_CACHE_KEY)
+    if stats is not None:
+        return stats
+    
+    now = timezone.now()
+    # Wydarzenia, aktywne wydarzenia i kandydaci w jednym zapytaniu (kandydat należy do jednego wydarzenia)
+    stats = Event.objects.aggregate(
+        total_events=Count('pk', distinct=True),
+        active_events=Count('pk', distinct=True, filter=Q(event_date__gt=now, status__in=['active', 'upcoming'])),
+        total_candidates=Count('candidates'),
+    )
+    
+    # Dokładna liczba głosów z dziennych agregatów; bez nich duża tabela głosów
+    # na PostgreSQL jest szacowana ze statystyk planera zamiast COUNT(*)
+    estimate = None
+    if get_rollup_watermark() is None:
+        estimate = estimated_row_count(Vote)
+        if estimate is not None and estimate < getattr(settings, 'DASHBOARD_ESTIMATE_THRESHOLD', 100000):
+            estimate = None
+    stats['total_votes'] = estimate if estimate is not None else site_total_votes()
+    stats['votes_approximate'] = estimate is not None
+    stats['computed_at'] = now
+    
+    cache.set(DASHBOARD_STATS_CACHE_KEY, stats, getattr(settings, 'DASHBOARD_STATS_TIMEOUT', 30))
+    return stats
+
+
+def refresh_poll_demographics(event: Event) -> PollAnalytics:
+    """Zapisuje rozkład urządzeń, systemów i przeglądarek głosujących w PollAnalytics.demographic_data"""
+    demographic_data = count_user_agents(event.votes.all())
+    demographic_data['computed_at'] = timezone.now().isoformat()
+    
+    analytics, created = PollAnalytics.objects.get_or_create(event=event)
+    analytics.demographic_data = demographic_data
+    analytics.save(update_fields=['demographic_data', 'updated_at'])
+    return analytics
+
+
+def generate_vote_report(event: Event, progress=None) -> dict:
+    """
+    Generuje raport z głosowania (polls.reports liczy go w tle).
+    progress(processed) - liczba przetworzonych głosów, po każdej porcji.
+    """
+    # Liczby głosów kandydatów w jednym zapytaniu zamiast 1 + N
+    candidates = list(Candidate.objects.filter(event=event).with_results())
+    total_votes = sum(candidate.vote_count for candidate in candidates)
     
     report = {
         'event': {
@@ -119,7 +226,7 @@ def generate_vote_report(event: Event) -> dict:
             'total_votes': total_votes,
         },
         'candidates': [],
-        'statistics': calculate_vote_statistics(event)
+        'statistics': calculate_vote_statistics(event, total_votes, progress)
     }
     
     for candidate in candidates:
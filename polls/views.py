@@ -1,5 +1,5 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.admin.views.decorators import staff_member_required
@@ -13,11 +13,18 @@ from django.core.mail import send_mail
 from django.conf import settings
 import json
 import csv
+import uuid
 from datetime import datetime, timedelta
 
 from .models import Event, Candidate, Vote, Comment, UserBadge, PollAnalytics
 from .forms import CommentForm, EventForm, CandidateForm
-from .utils import get_client_ip, get_browser_fingerprint, check_vote_eligibility
+from .utils import get_client_ip, get_trusted_client_ip, check_vote_eligibility, fingerprint_already_voted, get_dashboard_stats
+from .fingerprints import fingerprint_fields
+from .anomalies import BLOCK_MESSAGE as ANOMALY_BLOCK_MESSAGE, check_vote_anomalies
+from .throttling import throttle_writes
+from .exports import iter_event_xlsx, iter_votes_csv, parse_export_bound
+from .xlsx import XLSX_CONTENT_TYPE
+from .rollups import daily_votes, get_rollup_watermark
 
 
 def home(request):
@@ -115,6 +122,7 @@ def event_detail(request, event_id):
     return render(request, 'polls/event_detail.html', context)
 
 
+@throttle_writes('vote')
 @require_POST
 @csrf_exempt
 def vote(request, event_id):
@@ -128,21 +136,35 @@ def vote(request, event_id):
         candidate = get_object_or_404(Candidate, id=candidate_id, event=event)
         
         client_ip = get_client_ip(request)
+        fingerprint = fingerprint_fields(browser_fingerprint)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        
+        # Fale głosów z jednej podsieci / przeglądarki / User Agenta
+        is_flagged, is_blocked = check_vote_anomalies(event.id, get_trusted_client_ip(request), fingerprint['browser_fingerprint'], user_agent)
+        if is_blocked:
+            return JsonResponse({
+                'success': False,
+                'message': ANOMALY_BLOCK_MESSAGE
+            }, status=429)
         
         # Sprawdź czy można głosować
-        if not check_vote_eligibility(request, event, client_ip):
+        if not check_vote_eligibility(request, event, client_ip, browser_fingerprint):
             return JsonResponse({
                 'success': False,
                 'message': 'Już oddałeś głos w tym sondażu lub sondaż jest nieaktywny.'
             }, status=400)
         
+        # Ta sama przeglądarka z innego IP - możliwe dwa identyczne urządzenia, więc tylko oznaczamy
+        is_flagged = is_flagged or fingerprint_already_voted(event, browser_fingerprint)
+        
         # Utwórz głos
         vote = Vote.objects.create(
             event=event,
             candidate=candidate,
             ip_address=client_ip,
-            browser_fingerprint=browser_fingerprint,
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            **fingerprint,
+            user_agent=user_agent,
+            is_flagged=is_flagged,
         )
         
         print(f"Vote created: {vote.id} for candidate {candidate.name}")  # Debug log
@@ -171,6 +193,7 @@ def vote(request, event_id):
         }, status=500)
 
 
+@throttle_writes('vote')
 @require_POST
 @csrf_exempt
 def change_vote(request, event_id):
@@ -184,6 +207,16 @@ def change_vote(request, event_id):
         candidate = get_object_or_404(Candidate, id=candidate_id, event=event)
         
         client_ip = get_client_ip(request)
+        fingerprint = fingerprint_fields(browser_fingerprint)
+        user_agent = request.META.get('HTTP_USER_AGENT', '')
+        
+        # Zmiany głosu też liczą się do fal z jednej podsieci / przeglądarki / User Agenta
+        is_flagged, is_blocked = check_vote_anomalies(event.id, get_trusted_client_ip(request), fingerprint['browser_fingerprint'], user_agent)
+        if is_blocked:
+            return JsonResponse({
+                'success': False,
+                'message': ANOMALY_BLOCK_MESSAGE
+            }, status=429)
         
         # Sprawdź czy użytkownik już głosował
         existing_vote = Vote.objects.filter(event=event, ip_address=client_ip).first()
@@ -204,12 +237,14 @@ def change_vote(request, event_id):
         old_candidate = existing_vote.candidate
         existing_vote.delete()
         
+        # Oznaczenie podejrzanego głosu przechodzi na nowy głos
         new_vote = Vote.objects.create(
             event=event,
             candidate=candidate,
             ip_address=client_ip,
-            browser_fingerprint=browser_fingerprint,
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            **fingerprint,
+            user_agent=user_agent,
+            is_flagged=existing_vote.is_flagged or is_flagged,
         )
         
         # Aktualizuj analitykę
@@ -233,6 +268,7 @@ def change_vote(request, event_id):
         }, status=500)
 
 
+@throttle_writes('vote')
 @require_POST
 @csrf_exempt
 def reset_vote(request, event_id):
@@ -306,14 +342,29 @@ def get_results(request, event_id):
     return JsonResponse(response_data)
 
 
-def candidate_detail(request, candidate_id):
-    """Profil kandydata/partii"""
-    candidate = get_object_or_404(Candidate, id=candidate_id)
-    comments = candidate.comments.all()
-    
+COMMENTS_PER_PAGE = 20
 
-    
 
+def get_approved_comments(candidate):
+    """Zatwierdzone komentarze kandydata (nazwa autora zapisana w display_name, bez N+1)"""
+    return candidate.comments.filter(is_approved=True).order_by('-created_at')
+
+
+def serialize_comment(comment, can_delete=False):
+    """Zamienia komentarz na słownik dla odpowiedzi JSON (can_delete - przycisk usuwania dla administracji)"""
+    return {
+        'id': str(comment.id),
+        'author_name': comment.author_name,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat(),
+        'can_delete': can_delete,
+    }
+
+
+@throttle_writes('comment', endpoint='comment')
+def candidate_detail(request, candidate_id):
+    """Profil kandydata/partii"""
+    candidate = get_object_or_404(Candidate.objects.select_related('event'), id=candidate_id)
     
     if request.method == 'POST':
         form = CommentForm(request.POST, user=request.user)
@@ -335,14 +386,35 @@ def candidate_detail(request, candidate_id):
     else:
         form = CommentForm(user=request.user)
     
+    # Tylko pierwsza strona komentarzy - kolejne doładowywane przez candidate_comments
+    paginator = Paginator(get_approved_comments(candidate), COMMENTS_PER_PAGE)
+    comments_page = paginator.get_page(1)
+    
     context = {
         'candidate': candidate,
-        'comments': comments,
+        'comments': comments_page,
+        'comments_count': paginator.count,
         'form': form,
     }
     return render(request, 'polls/candidate_detail.html', context)
 
 
+def candidate_comments(request, candidate_id):
+    """Kolejne strony zatwierdzonych komentarzy kandydata (JSON)"""
+    candidate = get_object_or_404(Candidate, id=candidate_id)
+    
+    paginator = Paginator(get_approved_comments(candidate), COMMENTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    return JsonResponse({
+        'comments': [serialize_comment(comment, can_delete=request.user.is_staff) for comment in page_obj],
+        'page': page_obj.number,
+        'num_pages': paginator.num_pages,
+        'total': paginator.count,
+        'next_page': page_obj.next_page_number() if page_obj.has_next() else None,
+    })
+
+
 def event_history(request):
     """Historia zakończonych sondaży"""
     now = timezone.now()
@@ -367,24 +439,19 @@ def event_history(request):
 def admin_dashboard(request):
     """Panel administratora"""
     now = timezone.now()
-    
-    total_events = Event.objects.count()
-    # Licz aktywne wydarzenia na podstawie daty
-    active_events = Event.objects.filter(
-        event_date__gt=now,
-        status__in=['active', 'upcoming']
-    ).count()
-    total_votes = Vote.objects.count()
-    total_candidates = Candidate.objects.count()
+    # Liczby z jednego zapytania, krótko trzymane w cache
+    stats = get_dashboard_stats()
     
     recent_events = Event.objects.order_by('-created_at')[:5]
     recent_votes = Vote.objects.select_related('event', 'candidate').order_by('-created_at')[:10]
     
     context = {
-        'total_events': total_events,
-        'active_events': active_events,
-        'total_votes': total_votes,
-        'total_candidates': total_candidates,
+        'total_events': stats['total_events'],
+        'active_events': stats['active_events'],
+        'total_votes': stats['total_votes'],
+        'votes_approximate': stats['votes_approximate'],
+        'total_candidates': stats['total_candidates'],
+        'stats_computed_at': stats['computed_at'],
         'recent_events': recent_events,
         'recent_votes': recent_votes,
         'now': now,
@@ -392,6 +459,35 @@ def admin_dashboard(request):
     return render(request, 'polls/admin/dashboard.html', context)
 
 
+@staff_member_required
+def dashboard_daily_votes(request):
+    """Dzienna liczba głosów serwisu lub wydarzenia (?event=, ?date_from=, ?date_to=) z agregatów"""
+    event = None
+    if request.GET.get('event'):
+        try:
+            event_id = uuid.UUID(request.GET['event'])
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'Niepoprawny identyfikator wydarzenia.'}, status=400)
+        event = get_object_or_404(Event, id=event_id)
+    
+    try:
+        date_from = parse_export_bound(request.GET.get('date_from'))
+        date_to = parse_export_bound(request.GET.get('date_to'))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Niepoprawny format daty (oczekiwano RRRR-MM-DD).'}, status=400)
+    
+    days = daily_votes(
+        event,
+        timezone.localdate(date_from) if date_from else None,
+        timezone.localdate(date_to) if date_to else None,
+    )
+    watermark = get_rollup_watermark()
+    return JsonResponse({
+        'days': [{'day': row['day'].isoformat(), 'vote_count': row['vote_count']} for row in days],
+        'rolled_up_until': watermark.isoformat() if watermark else None,
+    })
+
+
 @staff_member_required
 def admin_event_create(request):
     """Tworzenie nowego wydarzenia"""
@@ -540,6 +636,32 @@ def export_results(request, event_id):
     return response
 
 
+@staff_member_required
+def export_votes(request, event_id):
+    """Strumieniowy eksport surowych głosów do CSV (?date_from=, ?date_to=)"""
+    event = get_object_or_404(Event, id=event_id)
+    
+    try:
+        date_from = parse_export_bound(request.GET.get('date_from'))
+        date_to = parse_export_bound(request.GET.get('date_to'), end=True)
+    except ValueError:
+        return HttpResponseBadRequest('Niepoprawny format daty (oczekiwano RRRR-MM-DD).')
+    
+    response = StreamingHttpResponse(iter_votes_csv(event, date_from, date_to), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="glosy_{event.id}_{timezone.now().strftime("%Y%m%d")}.csv"'
+    return response
+
+
+@staff_member_required
+def export_results_xlsx(request, event_id):
+    """Eksport wyników, głosów i trendu godzinowego do Excela (strumieniowo)"""
+    event = get_object_or_404(Event, id=event_id)
+    
+    response = StreamingHttpResponse(iter_event_xlsx(event), content_type=XLSX_CONTENT_TYPE)
+    response['Content-Disposition'] = f'attachment; filename="wyniki_{event.id}_{timezone.now().strftime("%Y%m%d")}.xlsx"'
+    return response
+
+
 
 
 
@@ -0,0 +1,220 @@
+"""
+Strumieniowy zapis skoroszytów XLSX.
+
+Plik XLSX to archiwum ZIP z częściami XML. Arkusze są zapisywane wiersz po
+wierszu bezpośrednio do archiwum (zipfile obsługuje wyjście bez seek),
+a gotowe bajty są oddawane w porcjach - pamięć nie zależy od liczby
+wierszy, a pierwsze bajty trafiają do klienta od razu. Tekst zapisywany
+jest jako inlineStr (bez tabeli współdzielonych napisów, która musiałaby
+trzymać wszystkie wartości w pamięci).
+
+    sheets = [('Wyniki', rows_iterator), ...]
+    StreamingHttpResponse(iter_xlsx(sheets), content_type=XLSX_CONTENT_TYPE)
+
+Wiersz to lista wartości: str, int, float, Decimal, bool, datetime/date
+lub None (pusta komórka). Pierwszy wiersz arkusza jest pogrubiony.
+"""
+
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape, quoteattr
+
+from django.utils import timezone
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Limit wierszy arkusza w Excelu
+MAX_SHEET_ROWS = 1_048_576
+
+FLUSH_BYTES = 64 * 1024
+ROWS_PER_WRITE = 500
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Znaki niedozwolone w XML 1.0 (np. sterujące w User Agencie)
+ILLEGAL_XML_CHARS_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+STYLE_HEADER = 1
+STYLE_DATETIME = 2
+STYLE_DATE = 3
+
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '{sheets}'
+    '</Types>'
+)
+
+SHEET_CONTENT_TYPE_XML = (
+    '<Override PartName="/xl/worksheets/sheet{index}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}'
+    '<Relationship Id="rIdStyles" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+STYLES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+SHEET_HEADER_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+SHEET_FOOTER_XML = '</sheetData></worksheet>'
+
+
+def column_letter(index: int) -> str:
+    """0 -> 'A', 27 -> 'AB'"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def excel_serial(value, tz=None) -> float:
+    """Data jako liczba dni od epoki Excela (w strefie czasowej tz lub bieżącej)"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(tz or timezone.get_current_timezone()).replace(tzinfo=None)
+        return (value - EXCEL_EPOCH).total_seconds() / 86400
+    return float((value - EXCEL_EPOCH.date()).days)
+
+
+def render_cell(reference: str, value, style: int = 0, tz=None) -> str:
+    style_attr = f' s="{style}"' if style else ''
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{reference}"{style_attr}><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        return f'<c r="{reference}" s="{STYLE_DATETIME}"><v>{excel_serial(value, tz)}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{reference}" s="{STYLE_DATE}"><v>{excel_serial(value)}</v></c>'
+    text = escape(ILLEGAL_XML_CHARS_RE.sub('', str(value)))
+    return f'<c r="{reference}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def render_row(row_number: int, values, columns: list, style: int = 0, tz=None) -> str:
+    while len(columns) < len(values):
+        columns.append(column_letter(len(columns)))
+    cells = ''.join(
+        render_cell(f'{columns[index]}{row_number}', value, style, tz)
+        for index, value in enumerate(values) if value is not None
+    )
+    return f'<row r="{row_number}">{cells}</row>'
+
+
+class _StreamSink:
+    """Wyjście archiwum ZIP bez seek - zbiera bajty do oddania w kolejnej porcji"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+def iter_xlsx(sheets):
+    """Kolejne porcje bajtów pliku XLSX; sheets - pary (nazwa, iterator wierszy)"""
+    sheets = list(sheets)
+    sink = _StreamSink()
+    tz = timezone.get_current_timezone()
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES_XML.format(sheets=''.join(
+            SHEET_CONTENT_TYPE_XML.format(index=index) for index in range(1, len(sheets) + 1)
+        )))
+        archive.writestr('_rels/.rels', ROOT_RELS_XML)
+        archive.writestr('xl/workbook.xml', WORKBOOK_XML.format(sheets=''.join(
+            f'<sheet name={quoteattr(name[:31])} sheetId="{index}" r:id="rId{index}"/>'
+            for index, (name, _) in enumerate(sheets, start=1)
+        )))
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS_XML.format(sheets=''.join(
+            f'<Relationship Id="rId{index}" '
+            f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+            f'Target="worksheets/sheet{index}.xml"/>'
+            for index in range(1, len(sheets) + 1)
+        )))
+        archive.writestr('xl/styles.xml', STYLES_XML)
+        yield sink.drain()
+
+        for index, (_, rows) in enumerate(sheets, start=1):
+            columns = []
+            with archive.open(f'xl/worksheets/sheet{index}.xml', 'w', force_zip64=True) as part:
+                buffer = [SHEET_HEADER_XML]
+                for row_number, values in enumerate(rows, start=1):
+                    style = STYLE_HEADER if row_number == 1 else 0
+                    buffer.append(render_row(row_number, values, columns, style, tz))
+                    if len(buffer) >= ROWS_PER_WRITE:
+                        part.write(''.join(buffer).encode())
+                        buffer = []
+                        if sink.size >= FLUSH_BYTES:
+                            yield sink.drain()
+                buffer.append(SHEET_FOOTER_XML)
+                part.write(''.join(buffer).encode())
+            yield sink.drain()
+
+    yield sink.drain()
@@ -0,0 +1,153 @@
+"""
+Kompresja odpowiedzi HTTP (brotli lub gzip, wg nagłówka Accept-Encoding).
+
+- odpowiedzi mniejsze niż COMPRESSION_MIN_LENGTH bajtów są wysyłane bez zmian,
+- pomijane są media już skompresowane (obrazy, wideo, archiwa, XLSX/Parquet)
+  oraz odpowiedzi z ustawionym Content-Encoding (np. pliki .br/.gz z WhiteNoise),
+- odpowiedzi strumieniowe (eksport CSV) są kompresowane porcjami,
+  a strumienie SSE (text/event-stream) nigdy - kompresja blokowałaby flush,
+- silny ETag staje się słaby (W/"..."), bo treść po kompresji jest inna.
+
+HTML jest zawsze kompresowany gzipem z losowym dopełnieniem nagłówka
+(ochrona przed BREACH, jak w GZipMiddleware), brotli trafia do JSON-a,
+CSS, JS i pozostałych typów tekstowych.
+"""
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    brotli = None
+
+ACCEPT_ENCODING_RE = _lazy_re_compile(r'^\s*([^\s;]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+INCOMPRESSIBLE_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff',
+    'application/zip', 'application/gzip', 'application/x-gzip', 'application/x-bzip2',
+    'application/x-7z-compressed', 'application/pdf', 'application/octet-stream',
+    'application/vnd.openxmlformats-officedocument', 'application/vnd.apache.parquet',
+    'application/vnd.apache.arrow',
+)
+
+COMPRESSIBLE_IMAGE_TYPES = ('image/svg+xml',)
+
+BROTLI_QUALITY = 5
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """'gzip, br;q=0.8' -> {'gzip': 1.0, 'br': 0.8}"""
+    encodings = {}
+    for part in header.split(','):
+        match = ACCEPT_ENCODING_RE.match(part)
+        if not match:
+            continue
+        name, quality = match.groups()
+        try:
+            encodings[name.lower()] = float(quality) if quality else 1.0
+        except ValueError:
+            continue
+    return encodings
+
+
+def choose_encoding(accept_encoding: str, content_type: str):
+    """Wybiera kodowanie obsługiwane przez klienta i przez nas (lub None)"""
+    encodings = parse_accept_encoding(accept_encoding)
+    wildcard = encodings.get('*', 0)
+
+    def quality(name):
+        return encodings.get(name, wildcard)
+
+    if brotli is not None and not content_type.startswith('text/html') and quality('br') > 0:
+        if quality('br') >= quality('gzip'):
+            return 'br'
+    if quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def agzip_sequence(sequence, max_random_bytes):
+    # Jak w GZipMiddleware: każda porcja to osobny człon gzip
+    async for item in sequence:
+        yield compress_string(item, max_random_bytes=max_random_bytes)
+
+
+async def abrotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    async for item in sequence:
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Kompresuje odpowiedzi brotli/gzip, jeśli przeglądarka to obsługuje"""
+
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+
+        content_type = response.get('Content-Type', '').lower()
+        if content_type.startswith('text/event-stream'):
+            return response
+        if content_type.startswith(INCOMPRESSIBLE_TYPES) and not content_type.startswith(COMPRESSIBLE_IMAGE_TYPES):
+            return response
+
+        min_length = getattr(settings, 'COMPRESSION_MIN_LENGTH', 500)
+        if not response.streaming and len(response.content) < min_length:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), content_type)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                original_iterator = response.streaming_content
+                if encoding == 'br':
+                    response.streaming_content = abrotli_sequence(original_iterator)
+                else:
+                    response.streaming_content = agzip_sequence(original_iterator, self.max_random_bytes)
+            elif encoding == 'br':
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=self.max_random_bytes
+                )
+            # Długość po kompresji nie jest znana z góry
+            del response.headers['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed_content = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            else:
+                compressed_content = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # Treść się zmieniła - silny ETag musi stać się słaby
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'django.contrib.sites',
     
@@ -57,6 +58,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'wysonda.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -98,6 +101,17 @@ DATABASES = {
 }
 
 
+# Cache
+# Wersje cache API i liczniki muszą być współdzielone między procesami -
+# w produkcji Redis (wysonda.settings_production)
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -172,10 +186,54 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
 
+# Liczba zaufanych proxy przed aplikacją (np. 1 dla nginx); limity zapisów i wykrywanie
+# anomalii biorą adres klienta z wpisu X-Forwarded-For dopisanego przez proxy (polls.utils)
+TRUSTED_PROXY_COUNT = 0
+
+# Limity zapisów (polls.throttling) - żetony na adres IP i na podsieć /24 (/64 dla IPv6)
+WRITE_THROTTLE_RATES = {
+    'vote': {'ip': '10/min', 'subnet': '120/min'},
+    'comment': {'ip': '5/min', 'subnet': '30/min'},
+}
+
+# Kompresja odpowiedzi (wysonda.middleware.CompressionMiddleware) -
+# mniejsze odpowiedzi nie zyskują na kompresji więcej niż kosztuje nagłówek
+COMPRESSION_MIN_LENGTH = 500
+
+# Lokalna baza zakresów IP -> region (polls.geoip, format: polls/data/geoip_ranges.sample.csv)
+GEOIP_RANGES_FILE = BASE_DIR / 'data' / 'geoip_ranges.csv'
+
+# Pula wątków zadań w tle (polls.tasks)
+BACKGROUND_TASK_WORKERS = 2
+
+# Po ilu sekundach liczone zlecenie raportu uznajemy za przerwane (polls.reports)
+REPORT_JOB_TIMEOUT = 600
+
+# Rozmiar cache sparsowanych User Agentów (polls.useragent)
+USER_AGENT_CACHE_SIZE = 1024
+
+# Ile ostatnich dni przelicza ponownie każde uruchomienie rollup_votes (polls.rollups)
+ROLLUP_REFRESH_DAYS = 3
+
+# Wykrywanie fal głosów (polls.anomalies): okno w sekundach, progi głosów w oknie
+# na wydarzenie (w jednym procesie) i reakcja - 'flag' (oznacz głos) lub 'block' (odrzuć)
+VOTE_ANOMALY_WINDOW = 300
+VOTE_ANOMALY_THRESHOLDS = {'subnet': 50, 'fingerprint': 10, 'user_agent': 500}
+VOTE_ANOMALY_ACTION = 'flag'
+
+# Panel administratora: czas cache liczb (s) i rozmiar tabeli głosów, od którego
+# na PostgreSQL liczba głosów jest szacowana (gdy brak dziennych agregatów)
+DASHBOARD_STATS_TIMEOUT = 30
+DASHBOARD_ESTIMATE_THRESHOLD = 100000
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:8000",
@@ -0,0 +1,100 @@
+"""
+Ustawienia produkcyjne projektu wysonda.
+
+Uruchomienie: DJANGO_SETTINGS_MODULE=wysonda.settings_production
+Wartości wrażliwe i zależne od środowiska są czytane z pliku .env
+lub zmiennych środowiskowych (python-decouple).
+"""
+
+from decouple import Csv, config
+
+from .settings import *  # noqa: F401,F403
+
+
+SECRET_KEY = config('SECRET_KEY')
+
+DEBUG = False
+
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv())
+
+# Aplikacja działa za nginx, który dopisuje adres klienta do X-Forwarded-For
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=1, cast=int)
+
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_URL', default='redis://127.0.0.1:6379/1'),
+    }
+}
+
+
+# Templates
+# Szablony są kompilowane raz i trzymane w pamięci procesu (cached loader).
+# Procesor kontekstu 'debug' jest pominięty - w produkcji i tak nic nie dodaje,
+# a jest wywoływany przy każdym renderowaniu.
+
+TEMPLATE_RENDER_TIMING = config('TEMPLATE_RENDER_TIMING', default=False, cast=bool)
+TEMPLATE_RENDER_SLOW_MS = config('TEMPLATE_RENDER_SLOW_MS', default=100, cast=int)
+
+TEMPLATES = [
+    {
+        'BACKEND': (
+            'wysonda.template_timing.TimedDjangoTemplates'
+            if TEMPLATE_RENDER_TIMING
+            else 'django.template.backends.django.DjangoTemplates'
+        ),
+        'DIRS': [BASE_DIR / 'templates'],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+
+# Static files
+# WhiteNoise serwuje pliki po collectstatic: nazwy z hashem treści, gotowe
+# warianty .gz i .br oraz nagłówki Cache-Control: max-age=10 lat, immutable
+# dla plików z hashem (powracający użytkownik nie wysyła żadnych żądań).
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+WHITENOISE_MAX_AGE = config('WHITENOISE_MAX_AGE', default=3600, cast=int)
+
+
+# Logging
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'wysonda.templates': {
+            'handlers': ['console'],
+            'level': 'DEBUG' if TEMPLATE_RENDER_TIMING else 'WARNING',
+        },
+    },
+}
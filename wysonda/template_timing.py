@@ -0,0 +1,45 @@
+"""
+Pomiar czasu renderowania szablonów.
+
+Backend szablonów zgodny z DjangoTemplates, który mierzy czas każdego
+render() i zapisuje go do loggera 'wysonda.templates'. Renderowania
+dłuższe niż TEMPLATE_RENDER_SLOW_MS są logowane jako ostrzeżenia.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger('wysonda.templates')
+
+
+class TimedTemplate(Template):
+    """Szablon, który loguje czas swojego renderowania"""
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            template_name = self.origin.template_name
+            if elapsed_ms >= getattr(settings, 'TEMPLATE_RENDER_SLOW_MS', 100):
+                logger.warning('Wolne renderowanie %s: %.2f ms', template_name, elapsed_ms)
+            else:
+                logger.debug('Renderowanie %s: %.2f ms', template_name, elapsed_ms)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates zwracający szablony z pomiarem czasu"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
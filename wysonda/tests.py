@@ -0,0 +1,106 @@
+import gzip
+from unittest import skipUnless
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.views.decorators.http import etag
+
+from .middleware import CompressionMiddleware, brotli
+
+BODY = ('{"wynik": "' + 'głos ' * 400 + '"}').encode()
+
+
+@override_settings(COMPRESSION_MIN_LENGTH=500)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Kompresja odpowiedzi brotli/gzip"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept_encoding='gzip, br', **headers):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding, **headers)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json_response(self, content=BODY, **kwargs):
+        return HttpResponse(content, content_type='application/json', **kwargs)
+
+    @skipUnless(brotli, 'brak pakietu brotli')
+    def test_brotli_preferred_for_json(self):
+        response = self.process(self.json_response())
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), BODY)
+
+    def test_gzip_for_html_and_when_brotli_refused(self):
+        for content_type, accept_encoding in (('text/html; charset=utf-8', 'gzip, br'), ('application/json', 'gzip, br;q=0')):
+            with self.subTest(content_type=content_type, accept_encoding=accept_encoding):
+                response = self.process(HttpResponse(BODY, content_type=content_type), accept_encoding)
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_no_compression_when_refused(self):
+        for accept_encoding in ('', 'identity', 'gzip;q=0, br;q=0', '*;q=0'):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.process(self.json_response(), accept_encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(response.content, BODY)
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_short_response_is_skipped(self):
+        response = self.process(self.json_response(b'{"ok": true}'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+    def test_incompressible_and_encoded_responses_are_skipped(self):
+        responses = [
+            HttpResponse(BODY, content_type='image/png'),
+            HttpResponse(BODY, content_type='application/vnd.apache.parquet'),
+            HttpResponse(BODY, content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+            HttpResponse(BODY, content_type='application/javascript', headers={'Content-Encoding': 'br'}),
+        ]
+        for original in responses:
+            with self.subTest(content_type=original['Content-Type']):
+                response = self.process(original)
+                self.assertEqual(response.content, BODY)
+                self.assertNotEqual(response.get('Content-Encoding'), 'gzip')
+
+    def test_svg_is_compressed(self):
+        response = self.process(HttpResponse(BODY, content_type='image/svg+xml'), 'gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_event_stream_is_not_compressed(self):
+        original = StreamingHttpResponse(iter([b'data: 1\n\n'] * 100), content_type='text/event-stream')
+        response = self.process(original)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), b'data: 1\n\n' * 100)
+
+    def test_streaming_body_is_compressed_without_length(self):
+        chunks = [BODY[index:index + 100] for index in range(0, len(BODY), 100)]
+        original = StreamingHttpResponse(iter(chunks), content_type='text/csv')
+        original['Content-Length'] = str(len(BODY))
+        response = self.process(original, 'gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), BODY)
+
+    def test_content_length_matches_compressed_body(self):
+        response = self.process(self.json_response(), 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+    def test_strong_etag_becomes_weak(self):
+        response = self.process(self.json_response(headers={'ETag': '"v1"'}), 'gzip')
+        self.assertEqual(response['ETag'], 'W/"v1"')
+        response = self.process(self.json_response(headers={'ETag': 'W/"v1"'}), 'gzip')
+        self.assertEqual(response['ETag'], 'W/"v1"')
+
+    def test_conditional_request_with_weak_etag_returns_304(self):
+        view = etag(lambda request: '"v1"')(lambda request: self.json_response())
+        middleware = CompressionMiddleware(view)
+
+        response = middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['ETag'], 'W/"v1"')
+
+        response = middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']))
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(response.has_header('Content-Encoding'))
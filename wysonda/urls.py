@@ -27,7 +27,6 @@ urlpatterns = [
     path('api/', include('api.urls')),
 ]
 
-# Dodaj obsługę plików media w trybie deweloperskim
+# Dodaj obsługę plików media w trybie deweloperskim (pliki statyczne serwuje WhiteNoise)
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)